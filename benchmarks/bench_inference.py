@@ -0,0 +1,128 @@
+"""
+Microbenchmark of single-row vs batched inference on the shipped model.
+
+For every available engine (the NumPy tree bundle, the lookup table if it has been
+built, and CatBoost if it is installed), measures `predict_proba` throughput when
+called once per row and when called on batches of several sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference [--rows 10000] [--batch-sizes 10 100 1000] [--repeat 3]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.utils.data_helpers import BALLS_PER_INNINGS, FEATURE_COLUMNS
+from src.utils.model_helpers import (
+    LOOKUP_TABLE_PATH,
+    MODEL_PATH,
+    TREE_BUNDLE_PATH,
+    LookupTable,
+    TablePredictor,
+    TreeEnsemble,
+    _load_catboost_model,
+)
+
+
+def sample_states(rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Random, plausible match states in FEATURE_COLUMNS order: first innings without a
+    target, second innings chasing a first-innings total.
+    """
+    rng = np.random.default_rng(seed)
+    innings = rng.integers(1, 3, rows)
+    target = rng.integers(100, 240, rows)
+    # A chase ends once the target is passed
+    runs = np.where(innings == 2, rng.integers(0, target + 2), rng.integers(0, 240, rows))
+    X = np.column_stack([
+        innings,
+        rng.integers(1, BALLS_PER_INNINGS + 1, rows),
+        runs,
+        rng.integers(0, 10, rows),
+        np.where(innings == 2, target, np.nan),
+    ]).astype(float)
+    assert X.shape[1] == len(FEATURE_COLUMNS)
+    return X
+
+
+def load_engines() -> dict:
+    """
+    Return {name: predictor} for each inference engine available here.
+    """
+    engines = {}
+    trees = TreeEnsemble.load(TREE_BUNDLE_PATH) if os.path.exists(TREE_BUNDLE_PATH) else None
+    if trees is not None:
+        engines["numpy_trees"] = trees
+    if os.path.exists(LOOKUP_TABLE_PATH + ".npy") and trees is not None:
+        engines["lookup_table"] = TablePredictor(LookupTable.load(LOOKUP_TABLE_PATH), lambda: trees)
+    try:
+        engines["catboost"] = _load_catboost_model(MODEL_PATH)
+    except ImportError:
+        pass
+    return engines
+
+
+def _best_of(repeat: int, run) -> float:
+    """
+    Fastest of `repeat` runs of `run()`, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(engine, X: np.ndarray, batch_sizes: list, single_rows: int, repeat: int) -> list:
+    """
+    Measure one engine.
+
+    Returns
+    -------
+    list of dict
+        One result per mode: {"mode", "rows", "seconds", "rows_per_s", "us_per_row"}.
+    """
+    engine.predict_proba(X[:1])  # warm up (lazy loads, caches)
+    results = []
+
+    rows = X[:single_rows]
+    seconds = _best_of(repeat, lambda: [engine.predict_proba(row.reshape(1, -1)) for row in rows])
+    results.append({"mode": "single-row", "rows": len(rows), "seconds": seconds})
+
+    for batch_size in batch_sizes:
+        def run():
+            for start in range(0, len(X), batch_size):
+                engine.predict_proba(X[start:start + batch_size])
+
+        seconds = _best_of(repeat, run)
+        results.append({"mode": f"batch={batch_size}", "rows": len(X), "seconds": seconds})
+
+    for result in results:
+        result["rows_per_s"] = result["rows"] / result["seconds"]
+        result["us_per_row"] = result["seconds"] / result["rows"] * 1e6
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Single-row vs batched inference throughput.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows scored in each batched run.")
+    parser.add_argument("--single-rows", type=int, default=1_000, help="Rows scored one call at a time.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the fastest is kept).")
+    args = parser.parse_args(argv)
+
+    X = sample_states(args.rows)
+    print(f"{'engine':<14} {'mode':<14} {'rows':>8} {'rows/s':>12} {'us/row':>10}")
+    for name, engine in load_engines().items():
+        for result in benchmark(engine, X, args.batch_sizes, args.single_rows, args.repeat):
+            print(
+                f"{name:<14} {result['mode']:<14} {result['rows']:>8} "
+                f"{result['rows_per_s']:>12,.0f} {result['us_per_row']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
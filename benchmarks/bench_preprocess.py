@@ -0,0 +1,166 @@
+"""
+End-to-end preprocessing benchmark on a synthetic Cricsheet corpus.
+
+Generates (or reuses) a synthetic corpus, then times `process_json` over every file
+and `read_and_process_data` for each requested worker count. Each case runs in a
+fresh process so its peak RSS is measured in isolation. Results are written as JSON
+and can be compared against a previous run to catch regressions.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_preprocess --matches 2000 --workers 1 4 \\
+        --output bench_results.json --baseline previous_results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import write_synthetic_corpus
+
+# Throughput metrics compared against the baseline (higher is better)
+THROUGHPUT_METRICS = ["matches_per_sec", "rows_per_sec"]
+
+
+def _peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process and its (finished) children, in MB.
+    """
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+def _run_case(case: str, folder: str, workers: int) -> dict:
+    """
+    Run a single benchmark case (in a fresh worker process) and return its metrics.
+    """
+    from model_training.preprocess_data import process_json, read_and_process_data
+
+    filenames = sorted(os.listdir(folder))
+    start = time.perf_counter()
+
+    if case == "process_json":
+        rows = sum(len(process_json(folder, filename)) for filename in filenames)
+    else:
+        rows = len(read_and_process_data(folder, workers=workers))
+
+    seconds = time.perf_counter() - start
+    return {
+        "case": case,
+        "workers": workers,
+        "matches": len(filenames),
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "matches_per_sec": round(len(filenames) / seconds, 2),
+        "rows_per_sec": round(rows / seconds, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def run_isolated(case: str, folder: str, workers: int) -> dict:
+    """
+    Run `_run_case` in a freshly spawned process so peak RSS is not shared between cases.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_case, case, folder, workers).result()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Return a list of human-readable regressions: cases whose throughput dropped by more
+    than `tolerance` (a fraction) relative to the baseline run.
+    """
+    baseline_cases = {(case["case"], case["workers"]): case for case in baseline["cases"]}
+    regressions = []
+
+    for case in results["cases"]:
+        previous = baseline_cases.get((case["case"], case["workers"]))
+        if previous is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if case[metric] < previous[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{case['case']} (workers={case['workers']}): {metric} "
+                    f"{case[metric]} vs baseline {previous[metric]}"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Cricsheet preprocessing throughput.")
+    parser.add_argument("--matches", type=int, default=500, help="Synthetic matches to generate.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=None,
+                        help="Reuse/create the synthetic corpus here (default: a temp directory).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="Worker counts to benchmark read_and_process_data with.")
+    parser.add_argument("--output", default="bench_preprocess.json", help="Where to write results.")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed fractional throughput drop before flagging a regression.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder = args.data_dir or os.path.join(tmp_dir, "synthetic_data")
+        if not (os.path.isdir(folder) and len(os.listdir(folder)) == args.matches):
+            write_synthetic_corpus(folder, args.matches, seed=args.seed)
+
+        cases = [run_isolated("process_json", folder, 1)]
+        for workers in args.workers:
+            cases.append(run_isolated("read_and_process_data", folder, workers))
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "matches": args.matches,
+        "seed": args.seed,
+        "cases": cases,
+    }
+
+    for case in cases:
+        print(
+            f"{case['case']:<22} workers={case['workers']:<3} "
+            f"{case['matches_per_sec']:>10.1f} matches/s {case['rows_per_sec']:>12.0f} rows/s "
+            f"peak RSS {case['peak_rss_mb']:.0f} MB"
+        )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
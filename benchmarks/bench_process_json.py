@@ -0,0 +1,138 @@
+"""
+Benchmark the columnar `process_json` builder against the original row-by-row
+`pd.concat` implementation on the fixtures in tests/test_data.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_process_json [--repeat 5] [--folder tests/test_data]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_training.preprocess_data import COLUMNS, process_json
+
+
+def process_json_concat(folder: str, filename: str) -> pd.DataFrame:
+    """
+    The original ball-by-ball builder, kept verbatim as the benchmark baseline.
+    Appends one row per legal delivery with `pd.concat`, so it is O(n^2) per match.
+    """
+    file_path = os.path.join(folder, filename)
+    with open(file_path, "r", encoding="utf-8") as json_file:
+        data = json.load(json_file)
+
+    match_df = pd.DataFrame(columns=COLUMNS)
+    match_id = filename.split(".")[0]
+
+    total_runs = [0, 0]
+    total_wickets = [0, 0]
+
+    if len(data.get("innings", [])) == 2:
+        for innings_index in range(2):
+            ball_count = 0
+            extra_runs = 0
+
+            for over_index, over_data in enumerate(data["innings"][innings_index]["overs"]):
+                for delivery in over_data["deliveries"]:
+                    runs = delivery["runs"]["total"]
+
+                    if "extras" in delivery and (
+                        "wides" in delivery["extras"] or "noballs" in delivery["extras"]
+                    ):
+                        extra_runs += runs
+                    else:
+                        total_runs[innings_index] += runs + extra_runs
+
+                        wicket_count = 0
+                        if "wickets" in delivery:
+                            wicket_count = len(delivery["wickets"])
+                            total_wickets[innings_index] += wicket_count
+
+                        ball_count += 1
+
+                        match_df = pd.concat(
+                            [
+                                match_df,
+                                pd.DataFrame(
+                                    {
+                                        "matchid": [match_id],
+                                        "innings": [innings_index + 1],
+                                        "over": [over_index],
+                                        "ball": [ball_count],
+                                        "runs": [total_runs[innings_index]],
+                                        "wickets": [total_wickets[innings_index]],
+                                        "chasing_team_won": [None],
+                                        "total_chasing": [None],
+                                    }
+                                ),
+                            ],
+                            ignore_index=True,
+                        )
+
+                        extra_runs = 0
+
+            if extra_runs > 0:
+                total_runs[innings_index] += extra_runs
+                last_row_idx = match_df[match_df["innings"] == (innings_index + 1)].index[-1]
+                match_df.at[last_row_idx, "runs"] += extra_runs
+                extra_runs = 0
+
+    match_df["chasing_team_won"] = np.where(
+        total_runs[0] > total_runs[1],
+        0,
+        np.where(total_runs[1] > total_runs[0], 1, None),
+    )
+    match_df["total_chasing"] = np.where(
+        match_df["innings"] == 2, total_runs[0], np.nan
+    )
+
+    return match_df
+
+
+def time_builder(builder, folder: str, filenames: list, repeat: int) -> float:
+    """
+    Return the best wall-clock time (seconds) over `repeat` passes of `builder`
+    across every file in `filenames`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for filename in filenames:
+            builder(folder, filename)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """
+    Check that both builders agree on every fixture, then print their timings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--folder", default=os.path.join("tests", "test_data"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    filenames = sorted(f for f in os.listdir(args.folder) if f.endswith(".json"))
+
+    # The new builder must produce exactly the same frames as the original
+    for filename in filenames:
+        pd.testing.assert_frame_equal(
+            process_json_concat(args.folder, filename),
+            process_json(args.folder, filename),
+        )
+
+    old_seconds = time_builder(process_json_concat, args.folder, filenames, args.repeat)
+    new_seconds = time_builder(process_json, args.folder, filenames, args.repeat)
+
+    print(f"Matches: {len(filenames)} (best of {args.repeat})")
+    print(f"pd.concat builder: {old_seconds * 1000:9.2f} ms")
+    print(f"columnar builder:  {new_seconds * 1000:9.2f} ms")
+    print(f"Speed-up:          {old_seconds / new_seconds:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
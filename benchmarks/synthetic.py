@@ -0,0 +1,200 @@
+"""
+Generate synthetic matches in Cricsheet JSON format for benchmarking.
+
+The matches are not meant to be realistic cricket, only to exercise the same code
+paths as real data: wides and no-balls (including runs off no-balls), deliveries
+with more than one wicket, innings ending on all out or a successful chase, and
+matches with super overs (extra innings flagged with "super_over": true, which
+preprocessing rejects).
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic --matches 1000 --output synthetic_data
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+TEAMS = [
+    "Northern Lights", "Southern Cross", "Eastern Storm", "Western Rangers",
+    "Central Strikers", "Coastal Kings", "Highland Hawks", "Valley Vipers",
+]
+
+# Runs off the bat for a legal delivery and their relative frequencies
+RUN_VALUES = [0, 1, 2, 3, 4, 6]
+RUN_WEIGHTS = [38, 35, 8, 1, 12, 6]
+
+
+class SyntheticConfig:
+    """
+    Probabilities controlling the synthetic delivery generator.
+    """
+
+    def __init__(
+        self,
+        wide_rate: float = 0.035,
+        noball_rate: float = 0.008,
+        wicket_rate: float = 0.05,
+        double_wicket_rate: float = 0.002,
+        super_over_rate: float = 0.02,
+    ):
+        self.wide_rate = wide_rate
+        self.noball_rate = noball_rate
+        self.wicket_rate = wicket_rate
+        self.double_wicket_rate = double_wicket_rate
+        self.super_over_rate = super_over_rate
+
+
+def _delivery(rng: random.Random, config: SyntheticConfig) -> dict:
+    """
+    Generate one delivery dict in Cricsheet format.
+    """
+    delivery = {"batter": "Batter", "bowler": "Bowler", "non_striker": "Partner"}
+    draw = rng.random()
+
+    if draw < config.wide_rate:
+        wides = rng.choice([1, 1, 1, 2, 5])
+        delivery["runs"] = {"batter": 0, "extras": wides, "total": wides}
+        delivery["extras"] = {"wides": wides}
+        return delivery
+
+    if draw < config.wide_rate + config.noball_rate:
+        batter_runs = rng.choices(RUN_VALUES, RUN_WEIGHTS)[0]
+        delivery["runs"] = {"batter": batter_runs, "extras": 1, "total": batter_runs + 1}
+        delivery["extras"] = {"noballs": 1}
+        return delivery
+
+    batter_runs = rng.choices(RUN_VALUES, RUN_WEIGHTS)[0]
+    delivery["runs"] = {"batter": batter_runs, "extras": 0, "total": batter_runs}
+
+    if rng.random() < config.wicket_rate:
+        delivery["runs"] = {"batter": 0, "extras": 0, "total": 0}
+        delivery["wickets"] = [{"player_out": "Batter", "kind": "caught"}]
+    elif rng.random() < config.double_wicket_rate:
+        delivery["wickets"] = [
+            {"player_out": "Batter", "kind": "run out"},
+            {"player_out": "Partner", "kind": "run out"},
+        ]
+    return delivery
+
+
+def _innings(
+    rng: random.Random,
+    config: SyntheticConfig,
+    team: str,
+    overs: int,
+    target: int = None,
+) -> tuple:
+    """
+    Generate one innings, stopping at the end of `overs`, all out, or when `target`
+    is reached. Returns (innings dict, runs scored).
+    """
+    runs = 0
+    wickets = 0
+    over_list = []
+
+    for over_index in range(overs):
+        deliveries = []
+        legal = 0
+        while legal < 6:
+            delivery = _delivery(rng, config)
+            deliveries.append(delivery)
+            runs += delivery["runs"]["total"]
+            if "extras" not in delivery:
+                legal += 1
+            wickets += len(delivery.get("wickets", []))
+            if wickets >= 10 or (target is not None and runs >= target):
+                break
+        over_list.append({"over": over_index, "deliveries": deliveries})
+        if wickets >= 10 or (target is not None and runs >= target):
+            break
+
+    return {"team": team, "overs": over_list}, runs
+
+
+def generate_match(rng: random.Random, config: SyntheticConfig, match_number: int) -> dict:
+    """
+    Generate one synthetic T20 match as a Cricsheet-format dict.
+    """
+    batting_first, batting_second = rng.sample(TEAMS, 2)
+    start = date(2015, 1, 1) + timedelta(days=match_number % 3650)
+
+    first_innings, first_runs = _innings(rng, config, batting_first, 20)
+    second_innings, second_runs = _innings(rng, config, batting_second, 20, target=first_runs + 1)
+    innings = [first_innings, second_innings]
+
+    if first_runs > second_runs:
+        outcome = {"winner": batting_first, "by": {"runs": first_runs - second_runs}}
+    elif second_runs > first_runs:
+        outcome = {"winner": batting_second, "by": {"wickets": 1}}
+    else:
+        outcome = {"result": "tie"}
+
+    # Ties (and a small share of other matches, to exercise the rejection path)
+    # get super overs, stored as extra innings
+    if first_runs == second_runs or rng.random() < config.super_over_rate:
+        for team in (batting_second, batting_first):
+            super_over, _ = _innings(rng, config, team, 1)
+            super_over["super_over"] = True
+            innings.append(super_over)
+
+    return {
+        "meta": {"data_version": "1.0.0", "created": start.isoformat(), "revision": 1},
+        "info": {
+            "balls_per_over": 6,
+            "dates": [start.isoformat()],
+            "event": {"name": "Synthetic League"},
+            "gender": "male",
+            "match_type": "T20",
+            "outcome": outcome,
+            "overs": 20,
+            "season": str(start.year),
+            "team_type": "club",
+            "teams": [batting_first, batting_second],
+            "venue": "Synthetic Oval",
+        },
+        "innings": innings,
+    }
+
+
+def write_synthetic_corpus(
+    output_dir: str,
+    matches: int,
+    seed: int = 42,
+    config: SyntheticConfig = None,
+) -> list:
+    """
+    Write `matches` synthetic Cricsheet JSON files into `output_dir`.
+
+    Returns
+    -------
+    list of str
+        The filenames written, in sorted order.
+    """
+    config = config or SyntheticConfig()
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    filenames = []
+    for match_number in range(matches):
+        filename = f"{9_000_000 + match_number}.json"
+        with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(generate_match(rng, config, match_number), f)
+        filenames.append(filename)
+    return filenames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic Cricsheet T20 matches.")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--output", default="synthetic_data")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    write_synthetic_corpus(args.output, args.matches, seed=args.seed)
+    print(f"Wrote {args.matches} synthetic matches to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from model_training.dataset_io import load_dataset, save_dataset
+from src.utils.data_helpers import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# The model's input features, which identify a match state
+STATE_FEATURES = FEATURE_COLUMNS
+
+
+def aggregate_states(df: pd.DataFrame, features: Optional[list] = None) -> pd.DataFrame:
+    """
+    Collapse identical match states into one row each.
+
+    Ties (missing chasing_team_won) are dropped first, as in training. Each remaining
+    state gets a 'weight' (the number of balls seen in that state) and 'wins' (how
+    many of those ended with the chasing team winning).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Ball-by-ball data with the feature columns and 'chasing_team_won'.
+    features : list of str or None
+        Columns defining a state; defaults to STATE_FEATURES.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per distinct state, with the feature columns plus 'weight' and 'wins'.
+    """
+    features = features or STATE_FEATURES
+    df = df[df["chasing_team_won"].notna()]
+
+    state_df = df[features].astype(float)
+    state_df["wins"] = df["chasing_team_won"].astype(float).to_numpy()
+
+    # dropna=False keeps first-innings states, whose total_chasing is NaN
+    aggregated_df = (
+        state_df.groupby(features, dropna=False, sort=True)["wins"]
+        .agg(["size", "sum"])
+        .rename(columns={"size": "weight", "sum": "wins"})
+        .reset_index()
+    )
+    aggregated_df["weight"] = aggregated_df["weight"].astype(np.int32)
+    aggregated_df["wins"] = aggregated_df["wins"].astype(np.int32)
+
+    logger.info(
+        f"Aggregated {len(df)} rows into {len(aggregated_df)} states "
+        f"({len(aggregated_df) / max(len(df), 1):.1%})."
+    )
+    return aggregated_df
+
+
+def to_weighted_training_set(aggregated_df: pd.DataFrame, features: Optional[list] = None) -> tuple:
+    """
+    Turn aggregated states into a weighted binary training set.
+
+    Each state becomes up to two rows: label 1 weighted by 'wins' and label 0 weighted
+    by 'weight - wins' (zero-weight rows are dropped). The weighted log loss over
+    these rows is identical to the log loss over the original ball-by-ball rows.
+
+    Parameters
+    ----------
+    aggregated_df : pd.DataFrame
+        Output of `aggregate_states`.
+    features : list of str or None
+        Feature columns; defaults to STATE_FEATURES.
+
+    Returns
+    -------
+    (pd.DataFrame, np.ndarray, np.ndarray)
+        Features X, labels y and sample weights w.
+    """
+    features = features or STATE_FEATURES
+    wins = aggregated_df["wins"].to_numpy()
+    losses = aggregated_df["weight"].to_numpy() - wins
+
+    X = pd.concat([aggregated_df[features], aggregated_df[features]], ignore_index=True)
+    y = np.concatenate([np.ones(len(wins), dtype=np.int8), np.zeros(len(losses), dtype=np.int8)])
+    w = np.concatenate([wins, losses]).astype(float)
+
+    keep = w > 0
+    return X[keep].reset_index(drop=True), y[keep], w[keep]
+
+
+def _split_by_match(df: pd.DataFrame, test_size: float, random_state: int) -> tuple:
+    """
+    Split rows into train/test so that all rows of a match land in the same set.
+    """
+    match_ids = df.index.to_numpy() if df.index.name == "matchid" else df["matchid"].to_numpy()
+    unique_ids = np.unique(match_ids.astype(str))
+    rng = np.random.default_rng(random_state)
+    test_ids = rng.choice(unique_ids, size=max(1, int(round(len(unique_ids) * test_size))), replace=False)
+
+    is_test = np.isin(match_ids.astype(str), test_ids)
+    return df[~is_test], df[is_test]
+
+
+def _evaluate(model, X: pd.DataFrame, y: np.ndarray) -> dict:
+    """
+    Accuracy (0.5 threshold) and log loss of `model` on (X, y).
+    """
+    proba = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+    return {
+        "accuracy": float(np.mean((proba >= 0.5) == y)),
+        "log_loss": float(-np.mean(y * np.log(proba) + (1 - y) * np.log(1 - proba))),
+    }
+
+
+def compare_with_raw(
+    df: pd.DataFrame,
+    features: Optional[list] = None,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    **catboost_params,
+) -> dict:
+    """
+    Measure how training on aggregated states changes accuracy versus the raw dataset.
+
+    The data is split by match (as in train_model.ipynb), one CatBoost model is trained
+    on the raw training rows and one on their aggregated, weighted form, and both are
+    evaluated on the same raw test rows.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Ball-by-ball data (e.g. from `read_and_process_data` or `load_dataset`).
+    features : list of str or None
+        Feature columns; defaults to STATE_FEATURES.
+    test_size : float
+        Fraction of matches held out for evaluation.
+    random_state : int
+        Seed for the split and for CatBoost.
+    **catboost_params
+        Extra CatBoostClassifier parameters (e.g. iterations=200).
+
+    Returns
+    -------
+    dict
+        For 'raw' and 'aggregated': training rows, fit time, accuracy and log loss;
+        plus 'accuracy_change' and 'log_loss_change' (aggregated minus raw).
+    """
+    from catboost import CatBoostClassifier
+
+    features = features or STATE_FEATURES
+    df = df[df["chasing_team_won"].notna()]
+    train_df, test_df = _split_by_match(df, test_size, random_state)
+
+    X_test = test_df[features].astype(float)
+    y_test = test_df["chasing_team_won"].astype(int).to_numpy()
+
+    # allow_writing_files=False: no catboost_info/ training logs in the working directory
+    params = {"random_state": random_state, "verbose": False, "allow_writing_files": False, **catboost_params}
+    results = {}
+
+    raw_model = CatBoostClassifier(**params)
+    start = time.perf_counter()
+    raw_model.fit(train_df[features].astype(float), train_df["chasing_team_won"].astype(int))
+    results["raw"] = {"train_rows": len(train_df), "fit_seconds": time.perf_counter() - start}
+    results["raw"].update(_evaluate(raw_model, X_test, y_test))
+
+    X_train, y_train, w_train = to_weighted_training_set(aggregate_states(train_df, features), features)
+    aggregated_model = CatBoostClassifier(**params)
+    start = time.perf_counter()
+    aggregated_model.fit(X_train, y_train, sample_weight=w_train)
+    results["aggregated"] = {"train_rows": len(X_train), "fit_seconds": time.perf_counter() - start}
+    results["aggregated"].update(_evaluate(aggregated_model, X_test, y_test))
+
+    results["accuracy_change"] = results["aggregated"]["accuracy"] - results["raw"]["accuracy"]
+    results["log_loss_change"] = results["aggregated"]["log_loss"] - results["raw"]["log_loss"]
+    return results
+
+
+def main(argv: Optional[list] = None) -> None:
+    """
+    Aggregate a preprocessed dataset into weighted states, optionally reporting the
+    accuracy change compared with training on the raw rows.
+    """
+    parser = argparse.ArgumentParser(description="Aggregate identical match states with weights.")
+    parser.add_argument("--input", default="preprocessed_data.parquet", help="Preprocessed dataset path.")
+    parser.add_argument("--output", default="aggregated_data.parquet", help="Aggregated dataset path.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Train raw vs aggregated CatBoost models and report the accuracy change.")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="CatBoost iterations for --compare (default: CatBoost's default).")
+    args = parser.parse_args(argv)
+
+    df = load_dataset(args.input, columns=STATE_FEATURES + ["matchid", "chasing_team_won"])
+    aggregated_df = aggregate_states(df)
+    save_dataset(aggregated_df, args.output)
+    print(f"{len(df)} rows -> {len(aggregated_df)} weighted states, written to {args.output}")
+
+    if args.compare:
+        params = {} if args.iterations is None else {"iterations": args.iterations}
+        results = compare_with_raw(df, **params)
+        for name in ("raw", "aggregated"):
+            result = results[name]
+            print(
+                f"{name:<10} rows={result['train_rows']:<9} fit={result['fit_seconds']:.1f}s "
+                f"accuracy={result['accuracy']:.4f} log_loss={result['log_loss']:.4f}"
+            )
+        print(
+            f"Accuracy change: {results['accuracy_change']:+.4f}, "
+            f"log loss change: {results['log_loss_change']:+.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import json
+import os
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Compact dtypes for the preprocessed dataset. Innings/over/ball/wickets all fit in
+# int8 (ball <= 120 after filtering), runs in int16, and chasing_team_won is a
+# nullable int so ties stay missing rather than turning the column into object/float.
+DATASET_DTYPES = {
+    "matchid": "category",
+    "innings": "int8",
+    "over": "int8",
+    "ball": "int8",
+    "runs": "int16",
+    "wickets": "int8",
+    "chasing_team_won": "Int8",
+    "total_chasing": "float32",
+}
+
+# Sentinel used for missing chasing_team_won values in the raw .npy columns
+NPY_MISSING_INT8 = -1
+NPY_META_NAME = "meta.json"
+
+
+def to_typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a preprocessed DataFrame to the compact dtypes in DATASET_DTYPES.
+
+    A 'matchid' index (as returned by `read_and_process_data`) is moved into a column,
+    and columns not listed in DATASET_DTYPES are left unchanged.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The preprocessed ball-by-ball data.
+
+    Returns
+    -------
+    pd.DataFrame
+        A new DataFrame with a default RangeIndex and compact column dtypes.
+    """
+    if df.index.name == "matchid":
+        df = df.reset_index()
+    else:
+        df = df.reset_index(drop=True)
+
+    dtypes = {column: dtype for column, dtype in DATASET_DTYPES.items() if column in df.columns}
+    if "matchid" in dtypes:
+        df["matchid"] = df["matchid"].astype(str)
+    return df.astype(dtypes)
+
+
+def _require_pyarrow(fmt: str):
+    """
+    Import pyarrow, raising an informative ImportError if it is not installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(f"The '{fmt}' dataset format requires pyarrow (pip install pyarrow).") from exc
+
+
+# -------------------------------------------------------------------
+#  Writers
+# -------------------------------------------------------------------
+def write_csv(df: pd.DataFrame, path: str) -> None:
+    df.to_csv(path, index=False)
+
+
+def write_parquet(df: pd.DataFrame, path: str) -> None:
+    _require_pyarrow("parquet")
+    df.to_parquet(path, index=False)
+
+
+def write_feather(df: pd.DataFrame, path: str) -> None:
+    _require_pyarrow("feather")
+    # Uncompressed so the file can be memory-mapped on read
+    df.to_feather(path, compression="uncompressed")
+
+
+def write_npy(df: pd.DataFrame, path: str) -> None:
+    """
+    Write one .npy file per column into the directory `path`, plus a small JSON file
+    describing each column's dtype (and the category labels for categoricals).
+    """
+    os.makedirs(path, exist_ok=True)
+    meta = {"columns": {}}
+
+    for column in df.columns:
+        series = df[column]
+        column_meta = {"dtype": str(series.dtype)}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+            column_meta["categories"] = series.cat.categories.astype(str).tolist()
+        elif pd.api.types.is_extension_array_dtype(series) and pd.api.types.is_integer_dtype(series):
+            # Nullable ints are stored as plain ints with a sentinel for missing values
+            values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=NPY_MISSING_INT8)
+            column_meta["missing"] = NPY_MISSING_INT8
+        else:
+            values = series.to_numpy()
+
+        np.save(os.path.join(path, f"{column}.npy"), values, allow_pickle=False)
+        meta["columns"][column] = column_meta
+
+    with open(os.path.join(path, NPY_META_NAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+# -------------------------------------------------------------------
+#  Loaders
+# -------------------------------------------------------------------
+def load_csv(path: str, columns: Optional[list], memory_map: bool) -> pd.DataFrame:
+    df = pd.read_csv(path, usecols=columns, dtype={"matchid": str}, memory_map=memory_map)
+    return to_typed_frame(df)
+
+
+def load_parquet(path: str, columns: Optional[list], memory_map: bool) -> pd.DataFrame:
+    _require_pyarrow("parquet")
+    return pd.read_parquet(path, columns=columns, memory_map=memory_map)
+
+
+def load_feather(path: str, columns: Optional[list], memory_map: bool) -> pd.DataFrame:
+    _require_pyarrow("feather")
+    from pyarrow import feather
+
+    table = feather.read_table(path, columns=columns, memory_map=memory_map)
+    return table.to_pandas()
+
+
+def load_npy(path: str, columns: Optional[list], memory_map: bool) -> pd.DataFrame:
+    """
+    Load the .npy column directory written by `write_npy`. With `memory_map`, plain
+    numeric columns are backed directly by the memory-mapped files.
+    """
+    with open(os.path.join(path, NPY_META_NAME), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    mmap_mode = "r" if memory_map else None
+    data = {}
+    for column in columns or list(meta["columns"]):
+        column_meta = meta["columns"][column]
+        values = np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode)
+
+        if "categories" in column_meta:
+            data[column] = pd.Categorical.from_codes(values, categories=column_meta["categories"])
+        elif "missing" in column_meta:
+            data[column] = pd.array(
+                np.where(values == column_meta["missing"], None, values),
+                dtype=column_meta["dtype"],
+            )
+        else:
+            data[column] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+# Registered formats: name -> (file extension, writer, loader)
+FORMATS = {
+    "csv": (".csv", write_csv, load_csv),
+    "parquet": (".parquet", write_parquet, load_parquet),
+    "feather": (".feather", write_feather, load_feather),
+    "npy": (".npy", write_npy, load_npy),
+}
+
+
+def register_format(name: str, extension: str, writer: Callable, loader: Callable) -> None:
+    """
+    Register an additional dataset format.
+
+    Parameters
+    ----------
+    name : str
+        The format name used by `save_dataset`/`load_dataset`.
+    extension : str
+        File (or directory) extension used to infer the format from a path.
+    writer : callable
+        `writer(df, path)`, called with an already typed DataFrame.
+    loader : callable
+        `loader(path, columns, memory_map)` returning a DataFrame.
+    """
+    FORMATS[name] = (extension, writer, loader)
+
+
+def infer_format(path: str) -> str:
+    """
+    Return the registered format whose extension matches `path`.
+
+    Raises
+    ------
+    ValueError
+        If no registered format uses the path's extension.
+    """
+    extension = os.path.splitext(path.rstrip("/\\"))[1].lower()
+    for name, (format_extension, _, _) in FORMATS.items():
+        if extension == format_extension:
+            return name
+    raise ValueError(f"Cannot infer dataset format from '{path}'; expected one of {list(FORMATS)}.")
+
+
+def save_dataset(df: pd.DataFrame, path: str, fmt: Optional[str] = None) -> None:
+    """
+    Convert `df` to compact dtypes and write it with the chosen format's writer.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The preprocessed dataset (e.g. from `read_and_process_data`).
+    path : str
+        Output path. For the 'npy' format this is a directory.
+    fmt : str or None
+        A registered format name; inferred from the path's extension if None.
+    """
+    fmt = fmt or infer_format(path)
+    _, writer, _ = FORMATS[fmt]
+    writer(to_typed_frame(df), path)
+
+
+def load_dataset(
+    path: str,
+    columns: Optional[list] = None,
+    memory_map: bool = False,
+    fmt: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Load a dataset written by `save_dataset`.
+
+    Parameters
+    ----------
+    path : str
+        The dataset path.
+    columns : list of str or None
+        Only read these columns (all columns if None).
+    memory_map : bool
+        Memory-map the underlying file(s) instead of reading them into memory,
+        where the format supports it.
+    fmt : str or None
+        A registered format name; inferred from the path's extension if None.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataset with the dtypes from DATASET_DTYPES.
+    """
+    fmt = fmt or infer_format(path)
+    _, _, loader = FORMATS[fmt]
+    return loader(path, columns, memory_map)
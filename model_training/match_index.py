@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import zipfile
+from typing import Optional
+
+import pandas as pd
+
+from model_training.dataset_io import load_dataset, save_dataset
+
+logger = logging.getLogger(__name__)
+
+# Columns of the match index. 'source' is the file (or zip member) name, and
+# 'size'/'stamp' fingerprint it (stamp is the mtime in ns for files, CRC-32 for members).
+INDEX_COLUMNS = [
+    "matchid",
+    "source",
+    "size",
+    "stamp",
+    "gender",
+    "match_type",
+    "team_type",
+    "start_date",
+    "season",
+    "event",
+    "team1",
+    "team2",
+    "venue",
+    "winner",
+]
+
+# String columns are stored as categoricals, which keeps the index small on disk
+CATEGORICAL_COLUMNS = [
+    "source", "gender", "match_type", "team_type", "season", "event",
+    "team1", "team2", "venue", "winner",
+]
+
+_INFO_KEY = b'"info"'
+
+
+def read_match_info(stream, chunk_size: int = 16384) -> dict:
+    """
+    Decode only the 'info' block of a Cricsheet JSON document.
+
+    Cricsheet files store 'meta' and 'info' ahead of the (much larger) 'innings'
+    section, so the stream is read in chunks until the 'info' object can be decoded;
+    the ball-by-ball data is normally never read or parsed.
+
+    Parameters
+    ----------
+    stream : binary file-like object
+        An open Cricsheet JSON file (or zip member).
+    chunk_size : int
+        Number of bytes read per step.
+
+    Returns
+    -------
+    dict
+        The decoded 'info' block (empty if the document has none).
+    """
+    decoder = json.JSONDecoder()
+    buffer = b""
+
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+
+        key_pos = buffer.find(_INFO_KEY)
+        colon_pos = buffer.find(b":", key_pos + len(_INFO_KEY)) if key_pos >= 0 else -1
+        if colon_pos >= 0:
+            # A multi-byte character may be cut at the end of the buffer; that is
+            # harmless because decoding only succeeds once the whole block is present.
+            text = buffer[colon_pos + 1:].decode("utf-8", errors="ignore").lstrip()
+            try:
+                info, _ = decoder.raw_decode(text)
+                return info
+            except json.JSONDecodeError:
+                pass
+
+        if not chunk:
+            # Unusual layout: fall back to decoding the whole document
+            return json.loads(buffer).get("info", {})
+
+
+def _index_row(match_id: str, source: str, size: int, stamp: int, info: dict) -> dict:
+    """
+    Flatten a Cricsheet 'info' block into one match index row.
+    """
+    teams = list(info.get("teams", [])) + [None, None]
+    dates = info.get("dates") or [None]
+    season = info.get("season")
+    return {
+        "matchid": match_id,
+        "source": source,
+        "size": size,
+        "stamp": stamp,
+        "gender": info.get("gender"),
+        "match_type": info.get("match_type"),
+        "team_type": info.get("team_type"),
+        "start_date": dates[0],
+        "season": str(season) if season is not None else None,
+        "event": info.get("event", {}).get("name"),
+        "team1": teams[0],
+        "team2": teams[1],
+        "venue": info.get("venue"),
+        "winner": info.get("outcome", {}).get("winner"),
+    }
+
+
+def _to_index_frame(rows: list) -> pd.DataFrame:
+    """
+    Build a typed match index DataFrame from a list of row dicts.
+    """
+    index_df = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+    index_df["matchid"] = index_df["matchid"].astype(str)
+    index_df["size"] = index_df["size"].astype("int64")
+    index_df["stamp"] = index_df["stamp"].astype("int64")
+    index_df["start_date"] = pd.to_datetime(index_df["start_date"])
+    for column in CATEGORICAL_COLUMNS:
+        index_df[column] = index_df[column].astype("category")
+    return index_df
+
+
+def _source_stamps(folder: Optional[str], zip_path: Optional[str]) -> dict:
+    """
+    Return {source name: (size, stamp)} for every JSON file in `folder` or member of `zip_path`.
+    """
+    if zip_path is not None:
+        with zipfile.ZipFile(zip_path) as archive:
+            return {
+                info.filename: (info.file_size, info.CRC)
+                for info in archive.infolist()
+                if info.filename.endswith(".json")
+            }
+
+    stamps = {}
+    for filename in os.listdir(folder):
+        if filename.endswith(".json"):
+            stat = os.stat(os.path.join(folder, filename))
+            stamps[filename] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def update_match_index(
+    index_path: str = "match_index.npy",
+    folder: Optional[str] = None,
+    zip_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Build or incrementally update the metadata index of a Cricsheet corpus.
+
+    Only files that are new or whose size/stamp changed are scanned (and only their
+    'info' blocks are decoded); entries for sources that no longer exist are dropped.
+
+    Parameters
+    ----------
+    index_path : str
+        Where the index is stored, in any `dataset_io` format (inferred from the extension).
+    folder : str or None
+        Directory of Cricsheet JSON files to index.
+    zip_path : str or None
+        Cricsheet zip archive to index instead of `folder`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The updated index, one row per match, sorted by source name.
+
+    Raises
+    ------
+    ValueError
+        If neither (or both) of `folder` and `zip_path` are given.
+    """
+    if (folder is None) == (zip_path is None):
+        raise ValueError("Pass exactly one of 'folder' or 'zip_path' to index.")
+
+    stamps = _source_stamps(folder, zip_path)
+
+    kept_rows = []
+    if os.path.exists(index_path):
+        existing_df = load_dataset(index_path)
+        for row in existing_df.astype({"source": str}).to_dict("records"):
+            if stamps.get(row["source"]) == (row["size"], row["stamp"]):
+                kept_rows.append(row)
+
+    known = {row["source"] for row in kept_rows}
+    to_scan = sorted(source for source in stamps if source not in known)
+
+    new_rows = []
+    if zip_path is not None:
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in to_scan:
+                with archive.open(member) as stream:
+                    info = read_match_info(stream)
+                match_id = os.path.basename(member).split(".")[0]
+                new_rows.append(_index_row(match_id, member, *stamps[member], info))
+    else:
+        for filename in to_scan:
+            with open(os.path.join(folder, filename), "rb") as stream:
+                info = read_match_info(stream)
+            match_id = filename.split(".")[0]
+            new_rows.append(_index_row(match_id, filename, *stamps[filename], info))
+
+    logger.info(
+        f"Match index: {len(kept_rows)} unchanged, {len(new_rows)} scanned, "
+        f"{len(stamps)} sources in total."
+    )
+
+    rows = sorted(kept_rows + new_rows, key=lambda row: row["source"])
+    for row in rows:
+        # Missing values read back from the index are NaN/NaT; normalise them to None
+        for key, value in row.items():
+            if pd.isna(value):
+                row[key] = None
+
+    index_df = _to_index_frame(rows)
+    save_dataset(index_df, index_path)
+    return index_df
+
+
+def select_matches(
+    index_df: pd.DataFrame,
+    gender: Optional[str] = None,
+    match_type: Optional[str] = None,
+    team_type: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    event: Optional[str] = None,
+    team: Optional[str] = None,
+    query: Optional[str] = None,
+) -> list:
+    """
+    Select matches from the index, returning their source names.
+
+    All given filters must match. For example, men's T20s since 2015:
+        select_matches(index_df, gender="male", match_type="T20", since="2015-01-01")
+
+    Parameters
+    ----------
+    index_df : pd.DataFrame
+        The index returned by `update_match_index`.
+    gender, match_type, team_type : str or None
+        Exact (case-insensitive) matches on the corresponding 'info' fields.
+    since, until : str or None
+        Inclusive bounds on the match start date (ISO format).
+    event : str or None
+        Case-insensitive substring of the competition name (e.g. "Indian Premier League").
+    team : str or None
+        Only matches involving this team.
+    query : str or None
+        An additional `DataFrame.query` expression over the index columns.
+
+    Returns
+    -------
+    list of str
+        Source file/member names of the selected matches, in sorted order.
+    """
+    mask = pd.Series(True, index=index_df.index)
+
+    for column, value in (("gender", gender), ("match_type", match_type), ("team_type", team_type)):
+        if value is not None:
+            mask &= index_df[column].astype(str).str.lower() == value.lower()
+
+    if since is not None:
+        mask &= index_df["start_date"] >= pd.Timestamp(since)
+    if until is not None:
+        mask &= index_df["start_date"] <= pd.Timestamp(until)
+
+    if event is not None:
+        events = index_df["event"].astype(object).fillna("").astype(str)
+        mask &= events.str.contains(event, case=False, regex=False)
+
+    if team is not None:
+        mask &= (index_df["team1"] == team) | (index_df["team2"] == team)
+
+    selected_df = index_df[mask]
+    if query is not None:
+        selected_df = selected_df.query(query)
+
+    return sorted(selected_df["source"].astype(str))
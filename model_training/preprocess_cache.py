@@ -0,0 +1,268 @@
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Return the hex SHA-256 digest of a file's contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_cache_dir(cache_dir: str, source: str) -> str:
+    """
+    Return the subdirectory of `cache_dir` that caches one source folder or zip archive.
+
+    It is named after the source's base name plus a hash of its absolute path, so
+    each source keeps its own manifest: refreshing one never drops another's entries.
+    """
+    source_path = os.path.abspath(source)
+    digest = hashlib.sha256(source_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(source_path.rstrip(os.sep))}-{digest}")
+
+
+class PreprocessCache:
+    """
+    A persistent, per-file cache of processed match DataFrames.
+
+    The cache directory holds a JSON manifest plus one pickled DataFrame per match,
+    named by a hash of the source's full name (zip members in different directories
+    may share a base name).
+    For each source file the manifest records its size, mtime and SHA-256 hash along
+    with the name of its cached output (None when the match was rejected). A file
+    whose size and mtime are unchanged is trusted without being read; otherwise it is
+    re-hashed, and only reprocessed if its contents actually changed. Members of a zip
+    archive are fingerprinted by their size and CRC-32 instead (see `refresh_archive`).
+
+    Each cache covers a single source (one folder or archive); entries for files it
+    no longer contains are dropped, so use `source_cache_dir` to give every source its
+    own directory.
+
+    Typical use:
+        cache = PreprocessCache(source_cache_dir(".preprocess_cache", folder))
+        stale = cache.refresh(folder, filenames)
+        for filename in stale:
+            cache.store(filename, process(filename))
+        cache.save()
+        frames = [cache.load(filename) for filename in filenames]
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Open (or create) the cache stored in `cache_dir`.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Directory holding the manifest and the cached per-match outputs.
+        """
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.entries = self._read_manifest()
+        # Fingerprints of files found stale by `refresh`, recorded when they are stored
+        self._pending = {}
+
+    def _read_manifest(self) -> dict:
+        """
+        Load the manifest entries, starting empty if it is missing, unreadable or
+        written by a different cache version.
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable preprocessing manifest {self.manifest_path}: {exc}")
+            return {}
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.info("Preprocessing manifest version changed; rebuilding the cache.")
+            return {}
+        return manifest.get("files", {})
+
+    def _output_path(self, output_name: str) -> str:
+        return os.path.join(self.cache_dir, output_name)
+
+    def _remove_output(self, entry: dict) -> None:
+        output_name = entry.get("output")
+        if output_name:
+            try:
+                os.remove(self._output_path(output_name))
+            except FileNotFoundError:
+                pass
+
+    def _has_output(self, entry: Optional[dict]) -> bool:
+        """
+        Return True if `entry` exists and its cached output (if any) is still on disk.
+        """
+        return entry is not None and (
+            entry.get("output") is None or os.path.exists(self._output_path(entry["output"]))
+        )
+
+    def _drop_missing(self, names: list) -> None:
+        """
+        Drop manifest entries (and cached outputs) for sources not in `names`.
+        """
+        present = set(names)
+        for name in [name for name in self.entries if name not in present]:
+            self._remove_output(self.entries.pop(name))
+        self._pending = {}
+
+    def refresh(self, folder: str, filenames: list, present: Optional[list] = None) -> list:
+        """
+        Compare `filenames` in `folder` against the manifest.
+
+        Entries for files that no longer exist are dropped (with their outputs), and
+        the files that are new or whose contents changed are returned.
+
+        Parameters
+        ----------
+        folder : str
+            The directory containing the source JSON files.
+        filenames : list of str
+            The source files to check.
+        present : list of str or None
+            Every source file currently in `folder`, when only a subset is being checked;
+            entries are only dropped for files missing from this list. Defaults to `filenames`.
+
+        Returns
+        -------
+        list of str
+            The filenames that must be (re)processed, in the order given.
+        """
+        self._drop_missing(filenames if present is None else present)
+
+        stale = []
+        for filename in filenames:
+            stat = os.stat(os.path.join(folder, filename))
+            entry = self.entries.get(filename)
+            output_ok = self._has_output(entry)
+
+            if (
+                output_ok
+                and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                continue
+
+            sha256 = file_sha256(os.path.join(folder, filename))
+            fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+            if output_ok and entry.get("sha256") == sha256:
+                # Touched but unchanged (e.g. re-downloaded): just record the new stat
+                entry.update(fingerprint)
+                continue
+
+            self._pending[filename] = fingerprint
+            stale.append(filename)
+
+        logger.info(
+            f"Preprocessing cache: {len(filenames) - len(stale)} cached, {len(stale)} to process."
+        )
+        return stale
+
+    def refresh_archive(self, zip_path: str, members: list, present: Optional[list] = None) -> list:
+        """
+        Compare `members` of a zip archive against the manifest, like `refresh`.
+
+        Members are fingerprinted by the uncompressed size and CRC-32 stored in the
+        archive's central directory, so unchanged members are detected without
+        decompressing anything.
+
+        Parameters
+        ----------
+        zip_path : str
+            Path to the zip archive.
+        members : list of str
+            The member names to check.
+        present : list of str or None
+            Every member currently in the archive, when only a subset is being checked.
+            Defaults to `members`.
+
+        Returns
+        -------
+        list of str
+            The members that must be (re)processed, in the order given.
+        """
+        self._drop_missing(members if present is None else present)
+
+        with zipfile.ZipFile(zip_path) as archive:
+            infos = {info.filename: info for info in archive.infolist()}
+
+        stale = []
+        for member in members:
+            info = infos[member]
+            fingerprint = {"size": info.file_size, "crc32": info.CRC}
+            entry = self.entries.get(member)
+
+            if self._has_output(entry) and all(
+                entry.get(key) == value for key, value in fingerprint.items()
+            ):
+                continue
+
+            self._pending[member] = fingerprint
+            stale.append(member)
+
+        logger.info(
+            f"Preprocessing cache: {len(members) - len(stale)} cached, {len(stale)} to process."
+        )
+        return stale
+
+    def store(self, filename: str, match_df: Optional[pd.DataFrame]) -> None:
+        """
+        Record the processed output for a file returned by `refresh` or `refresh_archive`.
+
+        Parameters
+        ----------
+        filename : str
+            The source filename.
+        match_df : pd.DataFrame or None
+            The processed match, or None if the match was rejected.
+        """
+        entry = dict(self._pending.pop(filename))
+        previous = self.entries.get(filename)
+        if previous is not None:
+            self._remove_output(previous)
+
+        entry["output"] = None
+        if match_df is not None:
+            entry["output"] = hashlib.sha256(filename.encode("utf-8")).hexdigest()[:16] + ".pkl"
+            match_df.to_pickle(self._output_path(entry["output"]))
+
+        self.entries[filename] = entry
+
+    def load(self, filename: str) -> Optional[pd.DataFrame]:
+        """
+        Return the cached DataFrame for `filename`, or None if the match was rejected.
+        """
+        output_name = self.entries[filename].get("output")
+        if output_name is None:
+            return None
+        return pd.read_pickle(self._output_path(output_name))
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to disk.
+        """
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.entries}, f)
+        os.replace(tmp_path, self.manifest_path)
@@ -1,9 +1,21 @@
+import argparse
+import fnmatch
 import json
 import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
 
 import numpy as np
 import pandas as pd
 
+from model_training.aggregate import aggregate_states
+from model_training.dataset_io import FORMATS, save_dataset
+from model_training.match_index import select_matches, update_match_index
+from model_training.preprocess_cache import PreprocessCache, source_cache_dir
+from model_training.shards import write_shards
+from src.utils.data_helpers import DERIVED_FEATURES, MOMENTUM_WINDOWS, derive_features
+
 # Columns for the processed match DataFrame
 COLUMNS = [
     "matchid",
@@ -17,6 +29,163 @@ COLUMNS = [
 ]
 
 
+def process_match_data(data: dict, match_id: str) -> pd.DataFrame:
+    """
+    Build the ball-by-ball DataFrame for a single, already parsed Cricsheet match.
+
+    Per-delivery runs and wickets are collected into flat arrays for each innings and
+    turned into running totals with a cumulative sum, so the DataFrame is created once
+    per match rather than grown one legal delivery at a time.
+
+    Parameters
+    ----------
+    data : dict
+        The decoded Cricsheet JSON document for the match.
+    match_id : str
+        The match ID to store in the 'matchid' column.
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame with the columns described in `process_json`.
+    """
+    innings_data = data.get("innings", [])
+
+    # Track runs for each of the two innings (used to decide the winner)
+    total_runs = [0, 0]
+    innings_columns = []
+
+    # Only process if we have exactly two innings
+    if len(innings_data) == 2:
+        for innings_index in range(2):
+            over_indices = []
+            ball_runs = []
+            ball_wickets = []
+            extra_runs = 0  # holds any wide/noball runs that do not count towards legal deliveries
+
+            for over_index, over_data in enumerate(innings_data[innings_index]["overs"]):
+                for delivery in over_data["deliveries"]:
+                    runs = delivery["runs"]["total"]
+                    extras = delivery.get("extras", {})
+
+                    # Wides and no-balls are carried forward onto the next legal delivery
+                    if "wides" in extras or "noballs" in extras:
+                        extra_runs += runs
+                    else:
+                        over_indices.append(over_index)
+                        ball_runs.append(runs + extra_runs)
+                        ball_wickets.append(len(delivery.get("wickets", [])))
+                        extra_runs = 0
+
+            cumulative_runs = np.cumsum(np.asarray(ball_runs, dtype=np.int64))
+            cumulative_wickets = np.cumsum(np.asarray(ball_wickets, dtype=np.int64))
+
+            # If extra_runs remain at the end of an innings, add them to the final row's total
+            if extra_runs > 0 and len(cumulative_runs) > 0:
+                cumulative_runs[-1] += extra_runs
+            total_runs[innings_index] = (
+                int(cumulative_runs[-1]) if len(cumulative_runs) > 0 else extra_runs
+            )
+
+            innings_columns.append(
+                (
+                    np.full(len(ball_runs), innings_index + 1, dtype=np.int64),
+                    np.asarray(over_indices, dtype=np.int64),
+                    np.arange(1, len(ball_runs) + 1, dtype=np.int64),
+                    cumulative_runs,
+                    cumulative_wickets,
+                )
+            )
+
+    if innings_columns:
+        innings, over, ball, runs, wickets = (
+            np.concatenate(parts) for parts in zip(*innings_columns)
+        )
+    else:
+        innings = over = ball = runs = wickets = np.empty(0, dtype=np.int64)
+
+    # Object columns of Python ints keep the output identical to the original row-by-row builder
+    match_df = pd.DataFrame(
+        {
+            "matchid": np.full(len(ball), match_id, dtype=object),
+            "innings": innings.astype(object),
+            "over": over.astype(object),
+            "ball": ball.astype(object),
+            "runs": runs.astype(object),
+            "wickets": wickets.astype(object),
+            "chasing_team_won": np.full(len(ball), None, dtype=object),
+            "total_chasing": np.full(len(ball), None, dtype=object),
+        },
+        columns=COLUMNS,
+        dtype=object,
+    )
+
+    # Determine which team ended up winning
+    # If first-innings runs > second-innings runs => chasing_team_won = 0
+    # If second-innings runs > first-innings runs => chasing_team_won = 1
+    # If tie => None
+    match_df["chasing_team_won"] = np.where(
+        total_runs[0] > total_runs[1],
+        0,
+        np.where(total_runs[1] > total_runs[0], 1, None),
+    )
+
+    # The 'total_chasing' column is the runs scored by the first innings, but only for the second innings rows
+    match_df["total_chasing"] = np.where(
+        innings == 2, total_runs[0], np.nan
+    )
+
+    return match_df
+
+
+def add_derived_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the DERIVED_FEATURES (see `src.utils.data_helpers`) to a preprocessed DataFrame.
+
+    The rate/target features come from `derive_features`, applied to whole columns.
+    The momentum features use a grouped shift over each (match, innings): for window
+    k, runs_last_k = runs - runs k balls earlier, with 0 before the first ball, which
+    is the same definition `prepare_features` applies to live data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Ball-by-ball data with 'matchid' as a column or the index, one row per legal
+        ball in ball order within each innings (as produced by `process_json`).
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of `df` with the derived feature columns (float32) appended.
+    """
+    df = df.copy()
+    innings = df["innings"].to_numpy(dtype=float)
+    runs = df["runs"].to_numpy(dtype=float)
+    wickets = df["wickets"].to_numpy(dtype=float)
+
+    derived = derive_features(
+        innings,
+        df["ball"].to_numpy(dtype=float),
+        runs,
+        df["total_chasing"].to_numpy(dtype=float),
+    )
+
+    # Group on plain arrays so this works whether 'matchid' is the index or a column
+    match_ids = df.index.to_numpy() if df.index.name == "matchid" else df["matchid"].to_numpy()
+    state = pd.DataFrame({"matchid": match_ids, "innings": innings, "runs": runs, "wickets": wickets})
+    grouped = state.groupby(["matchid", "innings"], sort=False)
+
+    for window in MOMENTUM_WINDOWS:
+        shifted = grouped[["runs", "wickets"]].shift(window, fill_value=0)
+        derived[f"runs_last_{window}"] = runs - shifted["runs"].to_numpy(dtype=float)
+        derived[f"wickets_last_{window}"] = wickets - shifted["wickets"].to_numpy(dtype=float)
+
+    for name in DERIVED_FEATURES:
+        df[name] = derived[name].astype(np.float32)
+
+    return df
+
+
 def process_json(folder: str, filename: str) -> pd.DataFrame:
     """
     Read a JSON file from the specified folder, parse cricket match data, and return a
@@ -47,100 +216,266 @@ def process_json(folder: str, filename: str) -> pd.DataFrame:
     with open(file_path, "r", encoding="utf-8") as json_file:
         data = json.load(json_file)
 
-    # Initialize a DataFrame with the expected columns
-    match_df = pd.DataFrame(columns=COLUMNS)
-
     # Extract match ID from the filename
     match_id = filename.split(".")[0]
 
-    # Track runs and wickets for each of the two innings
-    total_runs = [0, 0]
-    total_wickets = [0, 0]
+    return process_match_data(data, match_id)
 
-    # Only process if we have exactly two innings
-    if len(data.get("innings", [])) == 2:
-        # Loop over each innings index
-        for innings_index in range(2):
-            ball_count = 0
-            extra_runs = 0  # holds any wide/noball runs that do not count towards legal deliveries
 
-            for over_index, over_data in enumerate(data["innings"][innings_index]["overs"]):
-                for delivery in over_data["deliveries"]:
-                    runs = delivery["runs"]["total"]
+def is_valid_match(match_df: pd.DataFrame) -> bool:
+    """
+    Return True if a processed match should be kept in the training data.
 
-                    # If the delivery includes extras (e.g., wide, no-ball), 
-                    # accumulate them into extra_runs without incrementing ball count.
-                    if "extras" in delivery and (
-                        "wides" in delivery["extras"] or "noballs" in delivery["extras"]
-                    ):
-                        extra_runs += runs
-                    else:
-                        # Add both the current delivery runs and any leftover extras.
-                        total_runs[innings_index] += runs + extra_runs
-
-                        # Check if a wicket occurred on this delivery
-                        wicket_count = 0
-                        if "wickets" in delivery:
-                            wicket_count = len(delivery["wickets"])
-                            total_wickets[innings_index] += wicket_count
-
-                        # Now that it's a legal delivery, increment the ball count
-                        ball_count += 1
-
-                        # Append the new row to the match_df
-                        match_df = pd.concat(
-                            [
-                                match_df,
-                                pd.DataFrame(
-                                    {
-                                        "matchid": [match_id],
-                                        "innings": [innings_index + 1],
-                                        "over": [over_index],
-                                        "ball": [ball_count],
-                                        "runs": [total_runs[innings_index]],
-                                        "wickets": [total_wickets[innings_index]],
-                                        "chasing_team_won": [None],
-                                        "total_chasing": [None],
-                                    }
-                                ),
-                            ],
-                            ignore_index=True,
-                        )
-
-                        # Reset extra_runs after counting them
-                        extra_runs = 0
+    Matches with more than 120 legal deliveries in an innings are anomalous, and
+    matches without exactly two innings produce no rows (their max ball is NaN).
+    """
+    return match_df["ball"].max() <= 120
 
-            # If extra_runs remain at the end of an innings, add them to the final row's total
-            if extra_runs > 0:
-                total_runs[innings_index] += extra_runs
-                last_row_idx = match_df[match_df["innings"] == (innings_index + 1)].index[-1]
-                match_df.at[last_row_idx, "runs"] += extra_runs
-                extra_runs = 0
 
-    # Determine which team ended up winning
-    # If first-innings runs > second-innings runs => chasing_team_won = 0
-    # If second-innings runs > first-innings runs => chasing_team_won = 1
-    # If tie => None
-    match_df["chasing_team_won"] = np.where(
-        total_runs[0] > total_runs[1],
-        0,
-        np.where(total_runs[1] > total_runs[0], 1, None),
+def process_zip_member(zip_path: str, member: str) -> pd.DataFrame:
+    """
+    Decompress a single Cricsheet JSON member of a zip archive in memory and process it
+    like `process_json`, without extracting anything to disk.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to the Cricsheet zip archive.
+    member : str
+        The archive member to process (e.g. "1234567.json").
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame with the columns described in `process_json`.
+    """
+    data = json.loads(_open_archive(zip_path).read(member))
+
+    # Extract match ID from the member's filename
+    match_id = os.path.basename(member).split(".")[0]
+
+    return process_match_data(data, match_id)
+
+
+# Open archives for this process, so each worker reads the central directory only once.
+# Keyed by PID so a forked worker never shares a file handle (and offset) with its parent.
+_open_archives = {}
+_open_archives_pid = None
+
+
+def _open_archive(zip_path: str) -> zipfile.ZipFile:
+    """
+    Return a ZipFile for `zip_path` that is reused across calls within this process.
+    """
+    global _open_archives, _open_archives_pid
+
+    if _open_archives_pid != os.getpid():
+        _open_archives = {}
+        _open_archives_pid = os.getpid()
+
+    archive = _open_archives.get(zip_path)
+    if archive is None:
+        archive = zipfile.ZipFile(zip_path)
+        _open_archives[zip_path] = archive
+    return archive
+
+
+def list_zip_members(zip_path: str, patterns: Optional[list] = None) -> list:
+    """
+    List the members of a zip archive that match any of the given glob patterns.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to the Cricsheet zip archive.
+    patterns : list of str or None
+        Glob patterns matched against member names (e.g. ["12*.json"]).
+        Defaults to all JSON members, which skips Cricsheet's README.txt.
+
+    Returns
+    -------
+    list of str
+        Matching member names in sorted order.
+    """
+    patterns = patterns or ["*.json"]
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+    return sorted(
+        name for name in names
+        if not name.endswith("/") and any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
     )
 
-    # The 'total_chasing' column is the runs scored by the first innings, but only for the second innings rows
-    match_df["total_chasing"] = np.where(
-        match_df["innings"] == 2, total_runs[0], np.nan
+
+def _process_valid_json(folder: str, filename: str) -> Optional[pd.DataFrame]:
+    """
+    Process a single file and apply the anomaly filter, returning None for rejected
+    matches. Runs inside the worker processes so rejected matches are never sent back.
+    """
+    match_df = process_json(folder, filename)
+    if is_valid_match(match_df):
+        return match_df
+    return None
+
+
+def _process_valid_zip_member(zip_path: str, member: str) -> Optional[pd.DataFrame]:
+    """
+    The zip archive counterpart of `_process_valid_json`.
+    """
+    match_df = process_zip_member(zip_path, member)
+    if is_valid_match(match_df):
+        return match_df
+    return None
+
+
+def _iter_sources(processor, source: str, names: list, workers: int, chunksize: int) -> Iterator:
+    """
+    Run `processor(source, name)` over `names`, serially or on a process pool, yielding
+    one result (a DataFrame or None) per name in the same order.
+
+    In parallel mode tasks are submitted in bounded windows, so completed results never
+    pile up in memory faster than the caller consumes them.
+    """
+    if workers > 1 and len(names) > 1:
+        chunksize = max(1, chunksize)
+        window = workers * chunksize * 4
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(names), window):
+                batch = names[start:start + window]
+                # executor.map yields results in submission order, keeping the output deterministic
+                yield from executor.map(
+                    processor,
+                    [source] * len(batch),
+                    batch,
+                    chunksize=chunksize,
+                )
+    else:
+        for name in names:
+            yield processor(source, name)
+
+
+def _iter_dataset(
+    processor,
+    source: str,
+    names: list,
+    workers: Optional[int],
+    chunksize: int,
+    cache_dir: Optional[str],
+    refresh,
+) -> Iterator[pd.DataFrame]:
+    """
+    Process `names` from `source` (through the source's own cache under `cache_dir`,
+    when given) and yield the valid matches in order. `refresh(cache)` returns the
+    names to reprocess.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if cache_dir is not None:
+        cache = PreprocessCache(source_cache_dir(cache_dir, source))
+        stale = refresh(cache)
+        for name, match_df in zip(stale, _iter_sources(processor, source, stale, workers, chunksize)):
+            cache.store(name, match_df)
+        cache.save()
+        results = (cache.load(name) for name in names)
+    else:
+        results = _iter_sources(processor, source, names, workers, chunksize)
+
+    for match_df in results:
+        if match_df is not None:
+            yield match_df
+
+
+def _concat_matches(match_dfs: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate per-match DataFrames into one dataset indexed by 'matchid'.
+    """
+    preprocessed_df = pd.concat(list(match_dfs), ignore_index=True)
+    preprocessed_df.set_index("matchid", inplace=True)
+    return preprocessed_df
+
+
+def iter_processed_data(
+    folder: str = "historical_data",
+    workers: Optional[int] = 1,
+    chunksize: int = 16,
+    cache_dir: Optional[str] = None,
+    only: Optional[list] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the processed DataFrame of each valid match in `folder`, one at a time, in
+    sorted filename order. Takes the same arguments as `read_and_process_data`, which
+    concatenates this stream; use it directly to avoid holding every match in memory.
+    """
+    present = sorted(os.listdir(folder))
+    files = present if only is None else sorted(set(only).intersection(present))
+    return _iter_dataset(
+        _process_valid_json,
+        folder,
+        files,
+        workers,
+        chunksize,
+        cache_dir,
+        lambda cache: cache.refresh(folder, files, present=present),
     )
 
-    return match_df
+
+def iter_processed_zip(
+    zip_path: str,
+    members: Optional[list] = None,
+    workers: Optional[int] = 1,
+    chunksize: int = 16,
+    cache_dir: Optional[str] = None,
+    only: Optional[list] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    The zip archive counterpart of `iter_processed_data`; takes the same arguments
+    as `read_and_process_zip`.
+    """
+    present = list_zip_members(zip_path, members)
+    names = present if only is None else sorted(set(only).intersection(present))
+    return _iter_dataset(
+        _process_valid_zip_member,
+        zip_path,
+        names,
+        workers,
+        chunksize,
+        cache_dir,
+        lambda cache: cache.refresh_archive(zip_path, names, present=present),
+    )
 
 
-def read_and_process_data() -> pd.DataFrame:
+def read_and_process_data(
+    folder: str = "historical_data",
+    workers: Optional[int] = 1,
+    chunksize: int = 16,
+    cache_dir: Optional[str] = None,
+    only: Optional[list] = None,
+) -> pd.DataFrame:
     """
     Read all JSON files in the 'historical_data' folder, process each one via `process_json`,
     and concatenate them into a single DataFrame. Filters out matches where the ball count
     exceeds 120 (data errors).
 
+    Files are processed in sorted filename order, so the row order is the same however
+    many workers are used.
+
+    Parameters
+    ----------
+    folder : str
+        The directory containing the Cricsheet JSON files.
+    workers : int or None
+        Number of worker processes. 1 processes the files serially in this process;
+        None uses one worker per CPU.
+    chunksize : int
+        Number of files submitted to a worker per task when running in parallel.
+    cache_dir : str or None
+        If given, the cache directory (the folder is cached in its own subdirectory,
+        see `source_cache_dir`): only new or changed files are processed, and
+        everything else is loaded from the cache.
+    only : list of str or None
+        Restrict processing to these filenames, e.g. a selection from the match index
+        (see `model_training.match_index.select_matches`).
+
     Returns
     -------
     pd.DataFrame
@@ -148,31 +483,143 @@ def read_and_process_data() -> pd.DataFrame:
         The index is set to 'matchid', but note that some match IDs may appear multiple times
         if the data is stored ball-by-ball.
     """
-    folder = "historical_data"
-    files = os.listdir(folder)
-    match_dfs = []
+    return _concat_matches(
+        iter_processed_data(folder, workers, chunksize, cache_dir, only)
+    )
 
-    for filename in files:
-        match_df = process_json(folder, filename)
 
-        # Exclude data with more than 120 legal deliveries in an innings (anomalous data)
-        if match_df["ball"].max() <= 120:
-            match_dfs.append(match_df)
+def read_and_process_zip(
+    zip_path: str,
+    members: Optional[list] = None,
+    workers: Optional[int] = 1,
+    chunksize: int = 16,
+    cache_dir: Optional[str] = None,
+    only: Optional[list] = None,
+) -> pd.DataFrame:
+    """
+    Like `read_and_process_data`, but streams matches straight out of a downloaded
+    Cricsheet zip archive: each member is decompressed in memory and never extracted.
 
-    # Concatenate all match-level DataFrames
-    preprocessed_df = pd.concat(match_dfs, ignore_index=True)
-    preprocessed_df.set_index("matchid", inplace=True)
+    Parameters
+    ----------
+    zip_path : str
+        Path to the Cricsheet zip archive (e.g. t20s_json.zip).
+    members : list of str or None
+        Glob patterns selecting which members to process (see `list_zip_members`).
+    workers : int or None
+        Number of worker processes. 1 processes the members serially in this process;
+        None uses one worker per CPU.
+    chunksize : int
+        Number of members submitted to a worker per task when running in parallel.
+    cache_dir : str or None
+        If given, the cache directory (the archive is cached in its own subdirectory,
+        see `source_cache_dir`): only new or changed members are processed.
+    only : list of str or None
+        Restrict processing to these member names, e.g. a selection from the match index.
 
-    return preprocessed_df
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame containing the concatenated data from all valid matches, indexed by 'matchid'.
+    """
+    return _concat_matches(
+        iter_processed_zip(zip_path, members, workers, chunksize, cache_dir, only)
+    )
 
 
-def main() -> None:
+def main(argv: Optional[list] = None) -> None:
     """
-    Main entry point: reads and processes the match data, then writes a CSV to disk.
+    Main entry point: reads and processes the match data, then writes it to disk in a
+    typed columnar format (see `model_training.dataset_io`), either as one file or as
+    a directory of row shards (see `model_training.shards`).
     """
-    preprocessed_df = read_and_process_data()
-    preprocessed_df.to_csv("preprocessed_data.csv")
+    parser = argparse.ArgumentParser(description="Preprocess Cricsheet T20 match data.")
+    parser.add_argument("--folder", default="historical_data",
+                        help="Directory containing the Cricsheet JSON files.")
+    parser.add_argument("--zip", default=None,
+                        help="Read matches directly from a Cricsheet zip archive instead of --folder.")
+    parser.add_argument("--members", action="append", default=None,
+                        help="Glob pattern selecting zip members (repeatable; default *.json).")
+    parser.add_argument("--index", default=None,
+                        help="Match index path; when given, the index is updated and the "
+                             "selection filters below are applied before parsing any matches.")
+    parser.add_argument("--gender", default=None, help="Only matches with this gender (e.g. male).")
+    parser.add_argument("--match-type", default=None, help="Only matches of this type (e.g. T20).")
+    parser.add_argument("--since", default=None, help="Only matches starting on/after this date.")
+    parser.add_argument("--until", default=None, help="Only matches starting on/before this date.")
+    parser.add_argument("--event", default=None, help="Only matches whose event name contains this.")
+    parser.add_argument("--no-derived-features", action="store_true",
+                        help="Only write the base columns, without the derived features.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU).")
+    parser.add_argument("--chunksize", type=int, default=16,
+                        help="Files submitted to a worker per task in parallel mode.")
+    parser.add_argument("--cache-dir", default=".preprocess_cache",
+                        help="Incremental preprocessing cache directory, with one subdirectory "
+                             "per source folder or archive ('' to disable).")
+    parser.add_argument("--output", default="preprocessed_data.parquet",
+                        help="Output path; the format is inferred from the extension "
+                             "(.parquet, .feather, .npy directory or .csv).")
+    parser.add_argument("--format", default=None, choices=sorted(FORMATS),
+                        help="Override the output format.")
+    parser.add_argument("--shard-dir", default=None,
+                        help="Stream matches into fixed-size row shards in this directory "
+                             "(constant memory) instead of writing a single --output file.")
+    parser.add_argument("--shard-rows", type=int, default=1_000_000,
+                        help="Maximum rows per shard.")
+    parser.add_argument("--aggregated-output", default=None,
+                        help="Also write a state-aggregated, weighted copy of the dataset here "
+                             "(see model_training.aggregate); not supported with --shard-dir.")
+    args = parser.parse_args(argv)
+    if args.shard_dir and args.aggregated_output:
+        # Shards are streamed without ever holding the whole dataset, which aggregation needs
+        parser.error("--aggregated-output cannot be combined with --shard-dir.")
+
+    only = None
+    if args.index:
+        if args.zip:
+            index_df = update_match_index(args.index, zip_path=args.zip)
+        else:
+            index_df = update_match_index(args.index, folder=args.folder)
+        only = select_matches(
+            index_df,
+            gender=args.gender,
+            match_type=args.match_type,
+            since=args.since,
+            until=args.until,
+            event=args.event,
+        )
+
+    if args.zip:
+        match_dfs = iter_processed_zip(
+            args.zip,
+            members=args.members,
+            workers=args.workers or None,
+            chunksize=args.chunksize,
+            cache_dir=args.cache_dir or None,
+            only=only,
+        )
+    else:
+        match_dfs = iter_processed_data(
+            args.folder,
+            workers=args.workers or None,
+            chunksize=args.chunksize,
+            cache_dir=args.cache_dir or None,
+            only=only,
+        )
+
+    if not args.no_derived_features:
+        match_dfs = (add_derived_features(match_df) for match_df in match_dfs)
+
+    if args.shard_dir:
+        write_shards(match_dfs, args.shard_dir, shard_rows=args.shard_rows, fmt=args.format or "npy")
+        return
+
+    df = _concat_matches(match_dfs)
+    save_dataset(df, args.output, fmt=args.format)
+    if args.aggregated_output:
+        save_dataset(aggregate_states(df), args.aggregated_output)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
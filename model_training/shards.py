@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from model_training.dataset_io import FORMATS, load_dataset, save_dataset, to_typed_frame
+
+logger = logging.getLogger(__name__)
+
+SHARD_INDEX_NAME = "shard_index.csv"
+SHARD_META_NAME = "shards.json"
+
+# Columns of the shard index: each match's shard and its row range within that shard
+# (shard_start:shard_stop) and within the whole dataset (row_start:row_stop).
+SHARD_INDEX_COLUMNS = ["matchid", "shard", "shard_start", "shard_stop", "row_start", "row_stop"]
+
+
+class ShardWriter:
+    """
+    Write a stream of per-match DataFrames to disk as fixed-size row shards.
+
+    Matches are buffered until adding the next one would exceed `shard_rows`, at which
+    point the buffer is written out as one shard, so memory use is bounded by the
+    shard size rather than the dataset size. A match is never split across shards
+    (a single match larger than `shard_rows` gets a shard of its own). Closing the
+    writer flushes the last shard and writes the shard index.
+
+    Typical use:
+        with ShardWriter("preprocessed_shards", shard_rows=500_000) as writer:
+            for match_df in iter_processed_data(folder):
+                writer.write(match_df)
+    """
+
+    def __init__(self, output_dir: str, shard_rows: int = 1_000_000, fmt: str = "npy"):
+        """
+        Parameters
+        ----------
+        output_dir : str
+            Directory for the shards and the shard index.
+        shard_rows : int
+            Maximum number of rows per shard.
+        fmt : str
+            A `dataset_io` format used for each shard ('npy' supports memory-mapped reads).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown shard format '{fmt}'; expected one of {list(FORMATS)}.")
+
+        self.output_dir = output_dir
+        self.shard_rows = shard_rows
+        self.fmt = fmt
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._buffer = []
+        self._buffer_rows = 0
+        self._shard = 0
+        self._rows_written = 0
+        self._index_rows = []
+
+    def write(self, match_df: pd.DataFrame) -> None:
+        """
+        Add one processed match (as produced by `process_json`) to the output.
+        """
+        match_df = to_typed_frame(match_df)
+        n_rows = len(match_df)
+        if n_rows == 0:
+            return
+
+        if self._buffer and self._buffer_rows + n_rows > self.shard_rows:
+            self.flush()
+
+        match_id = str(match_df["matchid"].iloc[0])
+        row_start = self._rows_written + self._buffer_rows
+        self._index_rows.append(
+            {
+                "matchid": match_id,
+                "shard": self._shard,
+                "shard_start": self._buffer_rows,
+                "shard_stop": self._buffer_rows + n_rows,
+                "row_start": row_start,
+                "row_stop": row_start + n_rows,
+            }
+        )
+        self._buffer.append(match_df)
+        self._buffer_rows += n_rows
+
+    def flush(self) -> None:
+        """
+        Write the buffered matches out as the next shard.
+        """
+        if not self._buffer:
+            return
+
+        shard_df = pd.concat(self._buffer, ignore_index=True)
+        save_dataset(shard_df, _shard_path(self.output_dir, self._shard, self.fmt), fmt=self.fmt)
+        logger.info(f"Wrote shard {self._shard} ({len(shard_df)} rows).")
+
+        self._rows_written += self._buffer_rows
+        self._buffer = []
+        self._buffer_rows = 0
+        self._shard += 1
+
+    def close(self) -> pd.DataFrame:
+        """
+        Flush the final shard and write the shard index.
+
+        Returns
+        -------
+        pd.DataFrame
+            The shard index, one row per match.
+        """
+        self.flush()
+        index_df = pd.DataFrame(self._index_rows, columns=SHARD_INDEX_COLUMNS)
+        index_df.to_csv(os.path.join(self.output_dir, SHARD_INDEX_NAME), index=False)
+
+        meta = {"format": self.fmt, "shards": self._shard, "shard_rows": self.shard_rows}
+        with open(os.path.join(self.output_dir, SHARD_META_NAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return index_df
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+
+
+def write_shards(
+    match_dfs: Iterable[pd.DataFrame],
+    output_dir: str,
+    shard_rows: int = 1_000_000,
+    fmt: str = "npy",
+) -> pd.DataFrame:
+    """
+    Stream `match_dfs` (e.g. from `iter_processed_data`) into row shards.
+
+    Returns
+    -------
+    pd.DataFrame
+        The shard index, one row per match.
+    """
+    writer = ShardWriter(output_dir, shard_rows=shard_rows, fmt=fmt)
+    for match_df in match_dfs:
+        writer.write(match_df)
+    return writer.close()
+
+
+def _shard_path(output_dir: str, shard: int, fmt: str) -> str:
+    extension = FORMATS[fmt][0]
+    return os.path.join(output_dir, f"shard-{shard:05d}{extension}")
+
+
+def _read_meta(output_dir: str) -> dict:
+    with open(os.path.join(output_dir, SHARD_META_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_shard_index(output_dir: str) -> pd.DataFrame:
+    """
+    Load the shard index written by `ShardWriter`.
+    """
+    return pd.read_csv(os.path.join(output_dir, SHARD_INDEX_NAME), dtype={"matchid": str})
+
+
+def load_match(
+    output_dir: str,
+    match_id: str,
+    columns: Optional[list] = None,
+    index_df: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Load the rows of a single match straight from its shard.
+
+    Parameters
+    ----------
+    output_dir : str
+        The shard directory.
+    match_id : str
+        The match to load.
+    columns : list of str or None
+        Only read these columns.
+    index_df : pd.DataFrame or None
+        A previously loaded shard index, to avoid re-reading it for every match.
+
+    Returns
+    -------
+    pd.DataFrame
+        The match's rows.
+
+    Raises
+    ------
+    KeyError
+        If the match is not in the shard index.
+    """
+    if index_df is None:
+        index_df = load_shard_index(output_dir)
+
+    rows = index_df[index_df["matchid"] == str(match_id)]
+    if rows.empty:
+        raise KeyError(f"Match {match_id} is not in the shard index of '{output_dir}'.")
+    row = rows.iloc[0]
+
+    fmt = _read_meta(output_dir)["format"]
+    shard_path = _shard_path(output_dir, int(row["shard"]), fmt)
+    shard_df = load_dataset(shard_path, columns=columns, memory_map=True, fmt=fmt)
+    return shard_df.iloc[int(row["shard_start"]):int(row["shard_stop"])].reset_index(drop=True)
+
+
+def iter_shards(output_dir: str, columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield each shard as a DataFrame, in order.
+    """
+    meta = _read_meta(output_dir)
+    for shard in range(meta["shards"]):
+        yield load_dataset(
+            _shard_path(output_dir, shard, meta["format"]),
+            columns=columns,
+            memory_map=True,
+            fmt=meta["format"],
+        )
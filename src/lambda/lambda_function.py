@@ -4,17 +4,19 @@ import numpy as np
 import os
 import time
 from datetime import datetime
-from catboost import CatBoostClassifier
 
 from src.utils.api_helpers import (
+    MatchSnapshots,
     get_api_key,
-    get_current_matches,
-    get_match_info
+    get_current_matches
 )
-from src.utils.db_helpers import Predictions
+from src.utils.db_helpers import MatchFingerprints, Predictions
+from src.utils.model_helpers import load_predictor
+from src.utils.quota_helpers import Priority, quota_scheduler, request_priority
+from src.utils.timing import StageTimer, use_timer
 from src.utils.data_helpers import (
+    build_feature_matrix,
     filter_mens_t20,
-    prepare_features, 
     select_random_match,
     to_decimal
 )
@@ -22,72 +24,166 @@ from src.utils.data_helpers import (
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# "random" predicts one randomly selected match per run (cheapest on CricAPI quota);
+# "all" predicts every in-progress men's T20 match. An invocation event can override
+# it with {"mode": "all"} or {"mode": "random"}.
+PREDICTION_MODE = os.environ.get("PREDICTION_MODE", "random")
+PREDICTION_MODES = ("random", "all")
+
+# Seconds the container-level state (DynamoDB helpers, model) is reused before it is
+# rebuilt, so a long-lived warm container still picks up table or model changes
+STATE_MAX_AGE = float(os.environ.get("STATE_MAX_AGE", 3600))
+
+
+class WarmState:
+    """
+    Container-level objects that survive across warm Lambda invocations.
+
+    Each object is created lazily by its factory on first use, reused while the
+    container stays warm, and rebuilt once it is older than `max_age` seconds.
+    """
+
+    def __init__(self, max_age=STATE_MAX_AGE, clock=time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self._values = {}
+
+    def get(self, name, factory):
+        """
+        Return the object `name`, calling `factory()` if it is missing or too old.
+        """
+        entry = self._values.get(name)
+        if entry is not None and self.clock() - entry[0] < self.max_age:
+            return entry[1]
+
+        value = factory()
+        self._values[name] = (self.clock(), value)
+        logger.info(f"Initialized container state '{name}'.")
+        return value
+
+    def clear(self):
+        self._values.clear()
+
+
+state = WarmState()
+_cold_start = True
+
+
+def load_model():
+    """
+    Load the predictor shipped with the function: the precomputed lookup table when
+    the image includes it, otherwise the model's trees evaluated with NumPy.
+    """
+    current_dir = os.path.dirname(__file__)     # e.g., src/lambda
+    parent_dir = os.path.dirname(current_dir)   # e.g., src
+    return load_predictor(model_path=os.path.join(parent_dir, "model.cbm"))
+
+
 def main(event=None, context=None):
     """
     Main entry point for the Lambda function or script.
-    Fetches current matches, selects a men's T20 match,
-    makes a prediction, inserts into DynamoDB, and updates pending results.
+    Fetches current matches, selects a men's T20 match (or all of them),
+    makes predictions, inserts them into DynamoDB, and updates pending results.
 
-    If we cannot parse which team is batting first/second, a ValueError will be raised.
+    In "random" mode, if we cannot parse which team is batting first/second,
+    a ValueError will be raised.
     """
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+    timer = StageTimer()
+
+    # CricAPI calls made here are scheduled Lambda predictions (result resolution
+    # raises its own priority). Stage timings (including the Secrets Manager, CricAPI
+    # and feature-prep hooks) and quota counters are logged at the end. The hooked
+    # stages are nested inside the coarse ones ('cricapi' and 'feature_prep' time is
+    # also part of 'update_pending_results', 'current_matches' and 'predict'), so the
+    # stages can add up to more than 'total'.
+    try:
+        with request_priority(Priority.LAMBDA), use_timer(timer):
+            return predict_and_store(event, context, timer)
+    finally:
+        logger.info(f"{'Cold' if cold_start else 'Warm'} invocation stage timings (ms): {timer.summary()}")
+        logger.info(f"CricAPI quota: {quota_scheduler.counters()}")
+
 
-    # 1. Retrieve the API key
+def predict_and_store(event=None, context=None, timer=None):
+    """
+    Update pending results, then predict the in-progress men's T20 matches selected
+    by the prediction mode and store the predictions in DynamoDB.
+    """
+    timer = timer or StageTimer()
+    mode = (event or {}).get("mode", PREDICTION_MODE)
+    if mode not in PREDICTION_MODES:
+        raise ValueError(f"Unknown prediction mode '{mode}'; expected one of {PREDICTION_MODES}.")
+
+    # 1. Retrieve the API key (held in memory by the secret cache while warm); timed
+    #    as the 'api_key' stage by get_api_key itself
     api_key = get_api_key()
 
-    # 2. Initialize DynamoDB resource and Predictions table helper
-    dynamodb_resource = boto3.resource("dynamodb", region_name="eu-north-1")
-    predictions_table = Predictions(dynamodb_resource, "Predictions")
+    # 2. DynamoDB resource and table helpers, reused across warm invocations
+    with timer.stage("dynamodb"):
+        dynamodb_resource = state.get(
+            "dynamodb", lambda: boto3.resource("dynamodb", region_name="eu-north-1")
+        )
+        predictions_table = state.get(
+            "predictions_table", lambda: Predictions(dynamodb_resource, "Predictions")
+        )
+        fingerprints = state.get(
+            "fingerprints", lambda: MatchFingerprints(dynamodb_resource, "MatchFingerprints")
+        )
 
-    # 3. Update any pending results first
-    predictions_table.update_pending_results(api_key)
+    # 3. Update any pending results first. Matches fetched for this are kept in the
+    #    run's snapshot memo, so the predictions below never re-fetch them.
+    snapshots = MatchSnapshots(api_key)
+    with timer.stage("update_pending_results"):
+        predictions_table.update_pending_results(api_key, snapshots)
 
-    # 4. Load the CatBoost model
-    model = CatBoostClassifier()
-    current_dir = os.path.dirname(__file__)     # e.g., src/lambda
-    parent_dir = os.path.dirname(current_dir)   # e.g., src
-    model_path = os.path.join(parent_dir, "model.cbm")
-    model.load_model(model_path)
+    # 4. The model (or its lookup table), loaded once per container
+    with timer.stage("model"):
+        model = state.get("model", load_model)
 
     # 5. Fetch current matches and filter for men's T20
-    matches = get_current_matches(api_key)
-    filtered_matches = filter_mens_t20(matches)
-    selected_match = select_random_match(filtered_matches)
+    with timer.stage("current_matches"):
+        matches = get_current_matches(api_key)
+        filtered_matches = filter_mens_t20(matches)
 
-    if not selected_match:
-        logger.info("No men's T20 matches are currently in play.")
-        return
+    with timer.stage("predict"):
+        if mode == "all":
+            return predict_all_matches(filtered_matches, snapshots, model, predictions_table, fingerprints)
+        return predict_random_match(filtered_matches, snapshots, model, predictions_table, fingerprints)
 
-    match_id = selected_match.get("id")
-    if not match_id:
-        logger.warning("Selected match does not have an ID. Skipping prediction.")
-        return
 
-    # 6. Retrieve detailed match information
-    match_info = get_match_info(api_key, match_id)
-    if not match_info:
-        logger.info("No match information available for the selected match.")
-        return
+def new_prediction_ids(count=1):
+    """
+    Return `count` consecutive prediction IDs (the table's primary key): the current
+    time in milliseconds since the epoch, plus each prediction's offset in the batch.
+    Both prediction modes use it, so IDs are comparable across modes and runs.
+    """
+    base_id = int(time.time() * 1000)
+    return list(range(base_id, base_id + count))
 
-    # 7. Prepare features (including batting teams) and make prediction
-    try:
-        feature_vector = prepare_features(match_info)
-    except ValueError as e:
-        logger.error(f"Failed to parse batting order or innings data: {e}")
-        # Re-raise if you want the Lambda to fail, or you can return gracefully.
-        raise
 
-    feature_names = ["innings", "ball", "runs", "wickets", "total_chasing"]
-    X = [feature_vector.get(f, 0) for f in feature_names]
-    X = np.array(X).reshape(1, -1)
+def build_prediction_item(prediction_id, match_id, feature_vector, probability):
+    """
+    Build the DynamoDB item for one prediction.
 
-    probability = model.predict_proba(X)[:, 1][0]  # Probability of the chasing team winning
-    probability_percent = probability * 100
-    logger.info(f"Predicted Probability of chasing team winning: {probability_percent:.2f}%")
+    Parameters
+    ----------
+    prediction_id : int
+        The item's primary key.
+    match_id : str
+        The CricAPI match identifier.
+    feature_vector : dict
+        The output of `prepare_features` for the match.
+    probability : float
+        Predicted probability of the chasing team winning.
 
-    # 8. Insert the prediction data into DynamoDB
-    prediction_id = int(time.time())  # Simple integer-based unique identifier
-
-    prediction_data = {
+    Returns
+    -------
+    dict
+        The item, with numeric fields as Decimals.
+    """
+    return {
         "prediction_id": prediction_id,
         "predicted_at": datetime.utcnow().isoformat(),
         "match_id": match_id,
@@ -109,8 +205,127 @@ def main(event=None, context=None):
         "result": None
     }
 
+
+def predict_random_match(filtered_matches, snapshots, model, predictions_table, fingerprints):
+    """
+    Predict one randomly selected match and store the prediction.
+    """
+    selected_match = select_random_match(filtered_matches)
+
+    if not selected_match:
+        logger.info("No men's T20 matches are currently in play.")
+        return
+
+    match_id = selected_match.get("id")
+    if not match_id:
+        logger.warning("Selected match does not have an ID. Skipping prediction.")
+        return
+
+    # 6. Retrieve detailed match information (from the memo if already fetched)
+    snapshot = snapshots.get(match_id)
+    if not snapshot:
+        logger.info("No match information available for the selected match.")
+        return
+
+    # Skip the prediction and the write if the match hasn't moved on since the last run
+    fingerprint = snapshot.fingerprint
+    if fingerprints.is_unchanged(match_id, fingerprint):
+        logger.info(f"Match {match_id} is unchanged since the last prediction ({fingerprint}). Skipping.")
+        return
+
+    # 7. Build the model input and make prediction
+    X, errors = build_feature_matrix([snapshot.match_info])
+    if errors[0]:
+        logger.error(f"Failed to parse batting order or innings data: {errors[0]}")
+        # Re-raise if you want the Lambda to fail, or you can return gracefully.
+        raise ValueError(errors[0])
+    # Batting teams, state and derived features for the stored item; the momentum
+    # features use the states stored by earlier runs
+    snapshot.set_history(predictions_table.match_history(match_id, snapshot.innings))
+    feature_vector = snapshot.features
+
+    probability = model.predict_proba(X)[:, 1][0]  # Probability of the chasing team winning
+    probability_percent = probability * 100
+    logger.info(f"Predicted Probability of chasing team winning: {probability_percent:.2f}%")
+
+    # 8. Insert the prediction data into DynamoDB
+    prediction_id = new_prediction_ids()[0]
+    prediction_data = build_prediction_item(prediction_id, match_id, feature_vector, probability)
+
     predictions_table.insert_prediction(prediction_data)
     logger.info(f"Inserted prediction data with prediction_id {prediction_id}")
+    fingerprints.record(match_id, fingerprint)
+
+
+def predict_all_matches(filtered_matches, snapshots, model, predictions_table, fingerprints):
+    """
+    Predict every in-progress match: fetch their info concurrently, run one batched
+    `predict_proba` over a single feature matrix, and write all predictions in bulk.
+
+    Matches without info, whose score hasn't changed since the last run, or whose
+    batting order can't be parsed are skipped (and logged) rather than failing the run.
+
+    Returns
+    -------
+    int
+        The number of predictions written.
+    """
+    match_ids = [match.get("id") for match in filtered_matches if match.get("id")]
+    if not match_ids:
+        logger.info("No men's T20 matches are currently in play.")
+        return 0
+
+    # 6. Retrieve detailed match information for every match at once
+    candidates = []
+    for match_id, snapshot in zip(match_ids, snapshots.get_many(match_ids)):
+        if not snapshot:
+            logger.info(f"No match information available for match {match_id}.")
+            continue
+
+        fingerprint = snapshot.fingerprint
+        if fingerprints.is_unchanged(match_id, fingerprint):
+            logger.info(f"Match {match_id} is unchanged since the last prediction ({fingerprint}). Skipping.")
+            continue
+
+        candidates.append((match_id, fingerprint, snapshot))
+
+    # 7. One feature matrix and one batched prediction for all matches
+    X, errors = build_feature_matrix([snapshot.match_info for _, _, snapshot in candidates])
+    parsed = np.array([error is None for error in errors], dtype=bool)
+    for (match_id, _, _), error in zip(candidates, errors):
+        if error:
+            logger.error(f"Failed to parse batting order or innings data for match {match_id}: {error}")
+
+    # Momentum features use the states stored by earlier runs, read for all matches at once
+    parsed_candidates = [candidate for candidate, error in zip(candidates, errors) if error is None]
+    histories = predictions_table.match_histories(
+        [(match_id, snapshot.innings) for match_id, _, snapshot in parsed_candidates]
+    )
+    batch = []
+    for (match_id, fingerprint, snapshot), history in zip(parsed_candidates, histories):
+        snapshot.set_history(history)
+        batch.append((match_id, fingerprint, snapshot.features))
+    if not batch:
+        logger.info("No match has a new state to predict.")
+        return 0
+
+    probabilities = model.predict_proba(X[parsed])[:, 1]
+
+    # 8. Bulk insert, with one ID per prediction
+    items = []
+    for prediction_id, (match_id, _, feature_vector), probability in zip(
+        new_prediction_ids(len(batch)), batch, probabilities
+    ):
+        logger.info(f"Match {match_id}: predicted probability of chasing team winning {probability * 100:.2f}%")
+        items.append(build_prediction_item(prediction_id, match_id, feature_vector, float(probability)))
+
+    predictions_table.insert_predictions(items)
+    for match_id, fingerprint, _ in batch:
+        fingerprints.record(match_id, fingerprint)
+
+    logger.info(f"Inserted {len(items)} predictions.")
+    return len(items)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,16 +1,335 @@
+import asyncio
+import contextvars
 import json
 import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, Optional
 
 import boto3
 import requests
 from botocore.exceptions import ClientError
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
 
-from src.utils.data_helpers import extract_winning_team, determine_chasing_team
+from src.utils.data_helpers import MatchSnapshot
+from src.utils.quota_helpers import quota_scheduler
+from src.utils.timing import timed
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+AWS_REGION = "eu-north-1"
 
+# How long a secret is served from memory, and how long before expiry it is refreshed
+# in the background (both in seconds, overridable through the environment)
+SECRET_CACHE_TTL = float(os.environ.get("SECRET_CACHE_TTL", 900))
+SECRET_REFRESH_AHEAD = float(os.environ.get("SECRET_REFRESH_AHEAD", 60))
+
+# After a failed refresh the last known value is served for this long before retrying
+SECRET_RETRY_AFTER = 30.0
+
+CRICAPI_BASE_URL = "https://api.cricapi.com/v1"
+
+# Connection pooling, timeout (seconds) and retry settings for CricAPI requests
+CRICAPI_POOL_SIZE = int(os.environ.get("CRICAPI_POOL_SIZE", 10))
+CRICAPI_CONNECT_TIMEOUT = float(os.environ.get("CRICAPI_CONNECT_TIMEOUT", 3.05))
+CRICAPI_READ_TIMEOUT = float(os.environ.get("CRICAPI_READ_TIMEOUT", 10))
+CRICAPI_RETRIES = int(os.environ.get("CRICAPI_RETRIES", 3))
+CRICAPI_BACKOFF_FACTOR = float(os.environ.get("CRICAPI_BACKOFF_FACTOR", 0.5))
+
+# Maximum number of CricAPI requests in flight at once in the async fan-out helpers
+CRICAPI_CONCURRENCY = int(os.environ.get("CRICAPI_CONCURRENCY", 8))
+
+
+class CricAPIError(RuntimeError):
+    """
+    A CricAPI request failed or was refused by the quota scheduler.
+    """
+
+
+class SecretCache:
+    """
+    A thread-safe, in-process TTL cache in front of a secret lookup.
+
+    - A cached value is returned without any network call until it expires.
+    - Within `refresh_ahead` seconds of expiry, the first caller starts a background
+      refresh and still gets the current value, so callers normally never wait.
+    - When a value is missing or expired, only one thread per secret fetches it
+      (single-flight); concurrent callers wait for that fetch instead of repeating it.
+    - If a refresh fails and a previous value exists, that value keeps being served
+      (and the fetch is retried after `retry_after` seconds) instead of raising.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], str],
+        ttl: float = SECRET_CACHE_TTL,
+        refresh_ahead: float = SECRET_REFRESH_AHEAD,
+        retry_after: float = SECRET_RETRY_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters
+        ----------
+        fetch : callable
+            Looks up a secret by name (e.g. `get_secret`).
+        ttl : float
+            Seconds a fetched value stays valid.
+        refresh_ahead : float
+            Seconds before expiry at which a background refresh is started.
+        retry_after : float
+            Seconds to keep serving the last known value after a failed refresh.
+        clock : callable
+            Monotonic time source, in seconds.
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_after = retry_after
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._fetch_locks = {}
+
+    def _fetch_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._fetch_locks.setdefault(name, threading.Lock())
+
+    def _load(self, name: str) -> str:
+        """
+        Fetch `name` and store it, falling back to the previous value on failure.
+        Must be called with the secret's fetch lock held.
+        """
+        try:
+            value = self.fetch(name)
+        except Exception as exc:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is None:
+                    raise
+                entry["expires_at"] = self.clock() + self.retry_after
+            logger.warning(f"Refreshing secret {name} failed; using the last known value: {exc}")
+            return entry["value"]
+
+        with self._lock:
+            self._entries[name] = {"value": value, "expires_at": self.clock() + self.ttl}
+        return value
+
+    def _refresh_in_background(self, name: str) -> None:
+        fetch_lock = self._fetch_lock(name)
+        if not fetch_lock.acquire(blocking=False):
+            # Another thread is already fetching this secret
+            return
+
+        def refresh():
+            try:
+                self._load(name)
+            except Exception as exc:
+                logger.warning(f"Background refresh of secret {name} failed: {exc}")
+            finally:
+                fetch_lock.release()
+
+        threading.Thread(target=refresh, name=f"secret-refresh-{name}", daemon=True).start()
+
+    def get(self, name: str) -> str:
+        """
+        Return the secret `name`, from memory when possible.
+
+        Raises
+        ------
+        Exception
+            Whatever `fetch` raises, but only if no value has ever been fetched.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(name)
+
+        if entry is not None and now < entry["expires_at"]:
+            if now >= entry["expires_at"] - self.refresh_ahead:
+                self._refresh_in_background(name)
+            return entry["value"]
+
+        with self._fetch_lock(name):
+            # Another thread may have fetched it while we waited for the lock
+            with self._lock:
+                entry = self._entries.get(name)
+            if entry is not None and self.clock() < entry["expires_at"]:
+                return entry["value"]
+            return self._load(name)
+
+    def invalidate(self, name: str = None) -> None:
+        """
+        Forget one cached secret (or all of them), e.g. after a key rotation.
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+
+@lru_cache(maxsize=None)
+def _secrets_client(region_name: str = AWS_REGION):
+    """
+    Return a Secrets Manager client, created once per process and region.
+    boto3 clients are thread-safe, so it is shared by all threads.
+    """
+    return boto3.session.Session().client(service_name="secretsmanager", region_name=region_name)
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry with "full jitter": each backoff sleep is drawn uniformly between
+    zero and the exponential backoff time, so retrying workers don't hit CricAPI in
+    lockstep. (Done here rather than with `backoff_jitter`, which older urllib3
+    releases, such as the one bundled with the Lambda runtime, don't support.)
+
+    Every retry is another CricAPI hit, so it is charged to the quota scheduler at
+    the call's priority; when the budget refuses it, the request fails instead.
+    """
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if not quota_scheduler.admit_retry():
+            raise MaxRetryError(_pool, url, error or ResponseError("CricAPI budget refuses the retry"))
+        return retry
+
+
+def create_cricapi_session(
+    pool_size: int = CRICAPI_POOL_SIZE,
+    retries: int = CRICAPI_RETRIES,
+    backoff_factor: float = CRICAPI_BACKOFF_FACTOR,
+) -> requests.Session:
+    """
+    Create a keep-alive session for CricAPI with a connection pool and retries.
+
+    Connection errors and 5xx responses are retried with jittered exponential backoff,
+    each retry charged to the quota scheduler. A 429 (rate limited) is not retried,
+    as more hits would only make it worse. When the retries run out, the last
+    response is returned rather than raised, so callers can log its status code.
+
+    Parameters
+    ----------
+    pool_size : int
+        Maximum number of connections kept open to the CricAPI host.
+    retries : int
+        Maximum number of retries per request.
+    backoff_factor : float
+        Base of the exponential backoff, in seconds.
+
+    Returns
+    -------
+    requests.Session
+        The configured session.
+    """
+    retry = JitteredRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_cricapi_session() -> requests.Session:
+    """
+    Return this process's shared CricAPI session, creating it on first use.
+
+    Sessions are keyed by process ID, so a worker forked from a parent that already
+    made requests (e.g. a preloaded gunicorn app) opens its own connections instead
+    of sharing the parent's sockets.
+    """
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(pid)
+            if session is None:
+                session = _sessions[pid] = create_cricapi_session()
+    return session
+
+
+@timed("cricapi")
+def _request_json(endpoint: str, params: dict) -> Optional[dict]:
+    """
+    GET a CricAPI endpoint through the pooled session and decode the response.
+
+    The usage CricAPI reports in the response's 'info' block is passed on to the
+    quota scheduler.
+
+    Returns
+    -------
+    dict or None
+        The decoded JSON response, or None if the request failed (timed out, could not
+        connect, returned a non-200 status or a non-success API status).
+    """
+    try:
+        response = get_cricapi_session().get(
+            f"{CRICAPI_BASE_URL}/{endpoint}",
+            params=params,
+            timeout=(CRICAPI_CONNECT_TIMEOUT, CRICAPI_READ_TIMEOUT),
+        )
+    except requests.RequestException as exc:
+        logger.error(f"Request to CricAPI endpoint {endpoint} failed: {exc}")
+        return None
+
+    if response.status_code != 200:
+        logger.error(f"Request to CricAPI endpoint {endpoint} failed. Status Code: {response.status_code}")
+        return None
+
+    data = response.json()
+    quota_scheduler.observe(data.get("info"))
+    if data.get("status") != "success":
+        logger.error(f"CricAPI endpoint {endpoint} returned status '{data.get('status')}': {data.get('reason')}")
+        return None
+    return data
+
+
+def _cricapi_get(endpoint: str, params: dict) -> Optional[dict]:
+    """
+    Request a CricAPI endpoint subject to the quota scheduler.
+
+    The call's priority comes from `request_priority` (page view by default). When
+    the budget is tight, the scheduler answers with the last successful response to
+    the same request instead of spending a hit.
+
+    Parameters
+    ----------
+    endpoint : str
+        The endpoint name, e.g. "currentMatches".
+    params : dict
+        Query parameters, including the API key.
+
+    Returns
+    -------
+    dict or None
+        The decoded JSON response, or None if the request failed or was refused.
+    """
+    key = (endpoint,) + tuple(sorted((name, value) for name, value in params.items() if name != "apikey"))
+    return quota_scheduler.call(key, lambda: _request_json(endpoint, params))
+
+
+@timed("secrets_manager")
 def get_secret(secret_name: str) -> str:
     """
     Retrieve a secret value (string) from AWS Secrets Manager.
@@ -30,9 +349,7 @@ def get_secret(secret_name: str) -> str:
     ClientError
         If there is an error retrieving the secret from Secrets Manager.
     """
-    region_name = "eu-north-1"
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=region_name)
+    client = _secrets_client()
 
     try:
         get_secret_value_response = client.get_secret_value(SecretId=secret_name)
@@ -43,21 +360,29 @@ def get_secret(secret_name: str) -> str:
         raise exc
 
 
+# Process-wide cache shared by every caller of get_api_key
+secret_cache = SecretCache(get_secret)
+
+
+@timed("api_key")
 def get_api_key() -> str:
     """
     Retrieve the cricket API key from the "cricket_data" secret.
 
+    The secret is served from `secret_cache`, so Secrets Manager is only called
+    when the cached value is (about to be) out of date.
+
     Returns
     -------
     str
         The cricket API key.
     """
-    secret = get_secret("cricket_data")
+    secret = secret_cache.get("cricket_data")
     secret_dict = json.loads(secret)
     return secret_dict["cricket-api-key"]
 
 
-def get_current_matches(api_key: str) -> list:
+def get_current_matches(api_key: str, raise_on_error: bool = False) -> list:
     """
     Fetch the list of current matches from the CricAPI.
 
@@ -65,25 +390,31 @@ def get_current_matches(api_key: str) -> list:
     ----------
     api_key : str
         The API key used to authenticate with the CricAPI.
+    raise_on_error : bool
+        Raise instead of returning an empty list when the request fails or is refused,
+        so callers that cache the list (see `SharedCache`) keep their last good value.
 
     Returns
     -------
     list
         A list of dictionaries describing the current matches.
-        Returns an empty list if the request fails.
-    """
-    url = "https://api.cricapi.com/v1/currentMatches"
-    params = {"apikey": api_key}
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        matches = data.get("data", [])
-        return matches
-    else:
-        logger.error(f"Failed to fetch current matches. Status Code: {response.status_code}")
+        Returns an empty list if the request fails (unless `raise_on_error`).
+
+    Raises
+    ------
+    CricAPIError
+        If the request fails and `raise_on_error` is True.
+    """
+    data = _cricapi_get("currentMatches", {"apikey": api_key})
+    if data is None:
+        logger.error("Failed to fetch current matches.")
+        if raise_on_error:
+            raise CricAPIError("Failed to fetch current matches.")
         return []
 
+    matches = data.get("data", [])
+    return matches
+
 
 def get_match_info(api_key: str, match_id: str) -> dict:
     """
@@ -102,19 +433,11 @@ def get_match_info(api_key: str, match_id: str) -> dict:
         A dictionary containing match information if successful,
         or None if an error occurs or if the API reports a failure.
     """
-    url = "https://api.cricapi.com/v1/match_info"
-    params = {"apikey": api_key, "id": match_id}
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("status") != "success":
-            logger.error(f"Failed to fetch match info for match_id {match_id}.")
-            return None
-        return data
-    else:
-        logger.error(f"Failed to fetch match info for match_id {match_id}. Status Code: {response.status_code}")
+    data = _cricapi_get("match_info", {"apikey": api_key, "id": match_id})
+    if data is None:
+        logger.error(f"Failed to fetch match info for match_id {match_id}.")
         return None
+    return data
 
 
 def get_match_result(api_key: str, match_id: str) -> tuple:
@@ -122,9 +445,10 @@ def get_match_result(api_key: str, match_id: str) -> tuple:
     Determine the match result and whether the chasing team won.
 
     This function calls the CricAPI's /match_info endpoint to retrieve
-    the most recent match information. It checks the match status to see
-    if the game is finished (e.g., 'won by', 'tie', 'draw', 'no result', 'abandoned')
-    and identifies the winning team and the team that was chasing.
+    the most recent match information, and `MatchSnapshot.result` checks the
+    match status to see if the game is finished (e.g., 'won by', 'tie', 'draw',
+    'no result', 'abandoned') and identifies the winning team and the team that
+    was chasing.
 
     Parameters
     ----------
@@ -143,44 +467,198 @@ def get_match_result(api_key: str, match_id: str) -> tuple:
 
         If the match is still ongoing or data is missing, returns (None, None).
     """
-    url = f"https://api.cricapi.com/v1/match_info?apikey={api_key}&id={match_id}"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        data = response.json()
-        match_info = data.get("data", {})
-        status = match_info.get("status", "")
-        teams = match_info.get("teams", [])
-        score = match_info.get("score", [])
-
-        # Check if the match status indicates a finished game
-        if status and teams and score:
-            status_lower = status.lower()
-            finished_keywords = ["won by", "tie", "draw", "no result", "abandoned"]
-
-            if any(keyword in status_lower for keyword in finished_keywords):
-                winning_team = extract_winning_team(status, teams)
-                if not winning_team:
-                    logger.warning(f"Could not determine winning team from status '{status}'.")
-                    return None, None
-
-                chasing_team = determine_chasing_team(score)
-                if not chasing_team:
-                    logger.warning(f"Could not determine chasing team for match_id {match_id}.")
-                    return None, None
-
-                chasing_team_won = 1 if winning_team == chasing_team else 0
-                return status, chasing_team_won
-            else:
-                # Match is still ongoing
-                logger.info(f"Match {match_id} status: {status}")
-                return None, None
-        else:
-            logger.warning(f"Missing or incomplete data for match_id {match_id}.")
-            return None, None
-    else:
-        logger.error(
-            f"Failed to fetch match info for match_id {match_id}. "
-            f"Status Code: {response.status_code}"
-        )
-        return None, None
\ No newline at end of file
+    data = _cricapi_get("match_info", {"apikey": api_key, "id": match_id})
+    if data is None:
+        logger.error(f"Failed to fetch match info for match_id {match_id}.")
+        return None, None
+
+    return MatchSnapshot(data, match_id).result()
+
+
+# -------------------------------------------------------------------
+#  Async API
+#
+#  The coroutines below mirror the sync helpers. Each request runs in a worker thread
+#  over the same pooled session, so they share its connections, timeouts and retries.
+#  The *_many helpers fan out over many match IDs on their own pool of `concurrency`
+#  threads (not the event loop's default executor, whose size would cap them) and
+#  return results in input order. Sync callers use `_fetch_many` directly, which
+#  needs no event loop at all.
+# -------------------------------------------------------------------
+
+async def get_current_matches_async(api_key: str) -> list:
+    """
+    Async version of `get_current_matches`.
+    """
+    return await asyncio.to_thread(get_current_matches, api_key)
+
+
+async def get_match_info_async(api_key: str, match_id: str) -> dict:
+    """
+    Async version of `get_match_info`.
+    """
+    return await asyncio.to_thread(get_match_info, api_key, match_id)
+
+
+async def get_match_result_async(api_key: str, match_id: str) -> tuple:
+    """
+    Async version of `get_match_result`.
+    """
+    return await asyncio.to_thread(get_match_result, api_key, match_id)
+
+
+def _fetch_or(fetch, api_key: str, match_id: str, failed):
+    """
+    Return `fetch(api_key, match_id)`; a call that raises is logged and replaced by
+    `failed`, so one bad match does not lose the whole batch.
+    """
+    try:
+        return fetch(api_key, match_id)
+    except Exception as exc:
+        logger.error(f"Fetching match_id {match_id} failed: {exc}")
+        return failed
+
+
+def _fetch_many(fetch, api_key: str, match_ids: list, concurrency: int, failed) -> list:
+    """
+    Run the blocking `fetch(api_key, match_id)` for every match ID on a pool of at
+    most `concurrency` threads, and return the results in input order. Each call
+    runs in a copy of the caller's context, so it keeps its `request_priority`.
+    """
+    if not match_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(match_ids)))) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _fetch_or, fetch, api_key, match_id, failed)
+            for match_id in match_ids
+        ]
+        return [future.result() for future in futures]
+
+
+async def _gather_bounded(fetch, api_key: str, match_ids: list, concurrency: int, failed) -> list:
+    """
+    Async version of `_fetch_many`: the calls run on the same kind of dedicated pool,
+    awaited from the running event loop.
+    """
+    if not match_ids:
+        return []
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(match_ids)))) as executor:
+        return await asyncio.gather(*(
+            loop.run_in_executor(
+                executor, partial(contextvars.copy_context().run, _fetch_or, fetch, api_key, match_id, failed)
+            )
+            for match_id in match_ids
+        ))
+
+
+async def get_match_info_many(
+    api_key: str, match_ids: list, concurrency: int = CRICAPI_CONCURRENCY
+) -> list:
+    """
+    Fetch match info for many matches concurrently.
+
+    Parameters
+    ----------
+    api_key : str
+        The API key used to authenticate with the CricAPI.
+    match_ids : list of str
+        The CricAPI match identifiers.
+    concurrency : int
+        Maximum number of requests in flight at once.
+
+    Returns
+    -------
+    list
+        One `get_match_info` result (dict or None) per match ID, in input order.
+    """
+    return await _gather_bounded(get_match_info, api_key, match_ids, concurrency, None)
+
+
+async def get_match_result_many(
+    api_key: str, match_ids: list, concurrency: int = CRICAPI_CONCURRENCY
+) -> list:
+    """
+    Determine the results of many matches concurrently.
+
+    Parameters
+    ----------
+    api_key : str
+        The API key used to authenticate with the CricAPI.
+    match_ids : list of str
+        The CricAPI match identifiers.
+    concurrency : int
+        Maximum number of requests in flight at once.
+
+    Returns
+    -------
+    list of tuple
+        One `get_match_result` tuple (result_string, chasing_team_won) per match ID,
+        in input order.
+    """
+    return await _gather_bounded(get_match_result, api_key, match_ids, concurrency, (None, None))
+
+
+class MatchSnapshots:
+    """
+    A per-run memo of `MatchSnapshot`s, so no match is fetched from CricAPI twice.
+
+    Create one per unit of work (e.g. one Lambda invocation) and pass it to every
+    step that needs match data; the same fetch then serves both result resolution
+    and prediction. Failed fetches are remembered too (as None) for the same reason.
+    Because the memo lives only as long as the run, its data never goes stale.
+    """
+
+    def __init__(self, api_key: str, concurrency: int = CRICAPI_CONCURRENCY):
+        """
+        Parameters
+        ----------
+        api_key : str
+            The API key used to authenticate with the CricAPI.
+        concurrency : int
+            Maximum number of concurrent requests in `get_many`.
+        """
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._snapshots
+
+    def get(self, match_id: str) -> Optional[MatchSnapshot]:
+        """
+        Return the snapshot of `match_id`, fetching it on first use.
+
+        Returns
+        -------
+        MatchSnapshot or None
+            The snapshot, or None if the match info could not be retrieved.
+        """
+        with self._lock:
+            if match_id not in self._snapshots:
+                match_info = get_match_info(self.api_key, match_id)
+                self._snapshots[match_id] = MatchSnapshot(match_info, match_id) if match_info else None
+            return self._snapshots[match_id]
+
+    def get_many(self, match_ids: list) -> list:
+        """
+        Return snapshots for `match_ids` in input order, fetching the ones not yet
+        seen concurrently. Blocking, but safe to call whether or not an event loop
+        is running in this thread.
+        """
+        with self._lock:
+            missing = list(dict.fromkeys(m for m in match_ids if m not in self._snapshots))
+            if missing:
+                infos = _fetch_many(get_match_info, self.api_key, missing, self.concurrency, None)
+                for match_id, match_info in zip(missing, infos):
+                    self._snapshots[match_id] = MatchSnapshot(match_info, match_id) if match_info else None
+            return [self._snapshots[match_id] for match_id in match_ids]
+
+
+def get_match_results(api_key: str, match_ids: list, concurrency: int = CRICAPI_CONCURRENCY) -> list:
+    """
+    Blocking version of `get_match_result_many` for synchronous callers; it runs no
+    event loop of its own, so it also works where one is already running.
+    """
+    return _fetch_many(get_match_result, api_key, match_ids, concurrency, (None, None))
@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Default location of the shared cache: a local directory every worker on the host can see
+SHARED_CACHE_DIR = os.environ.get(
+    "SHARED_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rickety-cricket-cache")
+)
+
+
+class SharedCache:
+    """
+    A small file-backed cache shared by every process on the host (e.g. all gunicorn
+    workers), with stale-while-revalidate semantics.
+
+    Each key is stored as a JSON file holding the value and the time it was stored,
+    written atomically so readers never see a partial file. For a key:
+
+    - younger than `ttl`, the cached value is returned;
+    - older than `ttl` but younger than `max_stale`, the stale value is returned at
+      once while one worker (whichever takes the key's file lock first) reloads it in
+      a background thread; other workers keep getting the stale value meanwhile;
+    - missing or older than `max_stale`, the caller loads it itself, holding the file
+      lock so concurrent workers wait for that one load instead of repeating it.
+
+    If a reload fails, the previous value keeps being served until it is older than
+    `max_stale`. Values must be JSON-serialisable.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl: float = 30.0,
+        max_stale: float = 600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Parameters
+        ----------
+        cache_dir : str or None
+            Directory holding the cache files; defaults to SHARED_CACHE_DIR.
+        ttl : float
+            Seconds a value is considered fresh.
+        max_stale : float
+            Seconds after which a stale value is no longer served.
+        clock : callable
+            Wall-clock time source in seconds (shared across processes).
+        """
+        self.cache_dir = cache_dir or SHARED_CACHE_DIR
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Guards against two threads of one process refreshing the same key where
+        # file locks are unavailable
+        self._thread_locks = {}
+        self._thread_locks_guard = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _read(self, key: str) -> Optional[dict]:
+        """
+        Return the stored entry for `key` ({"stored_at": ..., "value": ...}), or None.
+        """
+        try:
+            with open(self._path(key, ".json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {exc}")
+            return None
+
+    def _write(self, key: str, value: Any) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": self.clock(), "value": value}, f)
+        os.replace(tmp_path, self._path(key, ".json"))
+
+    def _acquire(self, key: str, blocking: bool):
+        """
+        Take the key's refresh lock; returns a handle for `_release`, or None if
+        `blocking` is False and another thread or process holds it.
+        """
+        with self._thread_locks_guard:
+            thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+        if not thread_lock.acquire(blocking=blocking):
+            return None
+        if fcntl is None:
+            return thread_lock, None
+
+        lock_file = open(self._path(key, ".lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock_file.close()
+            thread_lock.release()
+            return None
+        return thread_lock, lock_file
+
+    @staticmethod
+    def _release(handle) -> None:
+        thread_lock, lock_file = handle
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        thread_lock.release()
+
+    def _age(self, entry: Optional[dict]) -> float:
+        return float("inf") if entry is None else self.clock() - entry["stored_at"]
+
+    def _reload(self, key: str, loader: Callable[[], Any], handle) -> None:
+        """
+        Background refresh of a stale key; the caller already holds its lock.
+        """
+        try:
+            self._write(key, loader())
+        except Exception as exc:
+            logger.warning(f"Refreshing cache entry {key} failed; serving the stale value: {exc}")
+        finally:
+            self._release(handle)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the value for `key`, calling `loader()` to (re)load it when needed.
+
+        Parameters
+        ----------
+        key : str
+            Cache key; used as a file name, so keep it to simple characters.
+        loader : callable
+            Produces a fresh value.
+
+        Returns
+        -------
+        Any
+            The cached (possibly stale) or freshly loaded value.
+
+        Raises
+        ------
+        Exception
+            Whatever `loader` raises, when there is no usable stale value.
+        """
+        entry = self._read(key)
+        age = self._age(entry)
+        if age < self.ttl:
+            return entry["value"]
+
+        if age < self.max_stale:
+            handle = self._acquire(key, blocking=False)
+            if handle is not None:
+                threading.Thread(
+                    target=self._reload, args=(key, loader, handle),
+                    name=f"cache-refresh-{key}", daemon=True,
+                ).start()
+            return entry["value"]
+
+        handle = self._acquire(key, blocking=True)
+        try:
+            # Another worker may have loaded it while we waited for the lock
+            entry = self._read(key)
+            if self._age(entry) < self.ttl:
+                return entry["value"]
+            value = loader()
+            self._write(key, value)
+            return value
+        finally:
+            self._release(handle)
+
+    def peek(self, key: str) -> Any:
+        """
+        Return the stored value for `key` (fresh or stale) without loading, or None.
+        """
+        entry = self._read(key)
+        return None if entry is None else entry["value"]
+
+    def peek_entry(self, key: str) -> Optional[tuple]:
+        """
+        Return (value, stored_at) for `key` without loading, or None; `stored_at` is
+        in the cache's clock (seconds since the epoch by default).
+        """
+        entry = self._read(key)
+        return None if entry is None else (entry["value"], entry["stored_at"])
+
+    def invalidate(self, key: str) -> None:
+        """
+        Remove `key` from the cache.
+        """
+        try:
+            os.remove(self._path(key, ".json"))
+        except FileNotFoundError:
+            pass
+
+
+class CoalescingCache:
+    """
+    An in-process keyed TTL cache that coalesces concurrent misses.
+
+    When several threads ask for the same missing (or expired) key at once, only the
+    first calls the loader; the others wait for its result instead of repeating the
+    upstream work. A loader exception is passed on to every waiting caller and
+    nothing is cached. None results are not cached either, so a failed lookup
+    reported as None is retried on the next request.
+
+    An optional `validator` lets callers drop an entry before its TTL runs out
+    (e.g. when the live score has moved on).
+    """
+
+    def __init__(
+        self,
+        ttl: float = 15.0,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Parameters
+        ----------
+        ttl : float
+            Seconds an entry stays valid.
+        max_entries : int
+            Maximum number of keys kept; the oldest entries are evicted first.
+        clock : callable
+            Monotonic time source, in seconds.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._in_flight = {}
+
+    def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        validator: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the value for `key`, calling `loader()` at most once per miss.
+
+        Parameters
+        ----------
+        key : hashable
+            Cache key, e.g. a match ID.
+        loader : callable
+            Produces the value on a miss.
+        validator : callable or None
+            Called with a cached value (without holding the cache's lock); returning
+            False discards it and reloads.
+
+        Returns
+        -------
+        Any
+            The cached or freshly loaded value.
+        """
+        with self._lock:
+            checked = self._fresh_entry(key)
+        # The validator may be slow (e.g. read a file), so it runs without the lock
+        if checked is not None and (validator is None or validator(checked[1])):
+            return checked[1]
+
+        with self._lock:
+            entry = self._fresh_entry(key)
+            if entry is not None and entry is not checked:
+                # Reloaded by another thread while we validated
+                return entry[1]
+            self._entries.pop(key, None)
+
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._in_flight[key] = Future()
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if value is not None:
+                self._entries[key] = (self.clock(), value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def peek(self, key: Hashable) -> Any:
+        """
+        Return the value for `key` if it is within its TTL, without loading, or None.
+        """
+        with self._lock:
+            entry = self._fresh_entry(key)
+        return None if entry is None else entry[1]
+
+    def _fresh_entry(self, key: Hashable) -> Optional[tuple]:
+        """
+        Return the (stored_at, value) entry for `key` if it is within its TTL; the
+        caller holds the lock.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self.clock() - entry[0] < self.ttl:
+            return entry
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop `key` from the cache.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
@@ -6,9 +6,34 @@ import random
 from decimal import Decimal
 from datetime import datetime, date
 
+from src.utils.timing import timed
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Legal deliveries in a T20 innings
+BALLS_PER_INNINGS = 120
+
+# The model's input columns, in the order it expects them. Every code path that
+# builds model input (the web app, the Lambda, the lookup table and training
+# backtests) takes its column order from here.
+FEATURE_COLUMNS = ["innings", "ball", "runs", "wickets", "total_chasing"]
+
+# Window sizes (in legal balls) for the recent-momentum features
+MOMENTUM_WINDOWS = (6, 12, 30)
+
+# Features derived from the match state. They are defined once, here, and used both
+# by model_training/preprocess_data.py (vectorized over the whole dataset) and by
+# prepare_features (for a live match), so training and serving always agree.
+DERIVED_FEATURES = [
+    "run_rate",
+    "required_run_rate",
+    "balls_remaining",
+    "runs_needed",
+] + [
+    f"{stat}_last_{window}" for window in MOMENTUM_WINDOWS for stat in ("runs", "wickets")
+]
+
 
 def to_decimal(value):
     """
@@ -167,38 +192,141 @@ def extract_batting_order(score_data, all_teams):
         )
 
 
-def prepare_features(match_info):
+def derive_features(innings, ball, runs, total_chasing):
     """
-    Extract key features (innings, ball, runs, wickets, total_chasing) 
-    from 'match_info' for use in a predictive model.
-    Also infers which teams are batting first vs second 
-    using match_info["data"]["teams"] and the first innings in 'score'.
+    Compute the state-derived features from the base match state.
+
+    Works element-wise on NumPy arrays (the training dataset) as well as on
+    scalars (a live match), returning arrays of the broadcast shape.
+
+    Definitions:
+      - run_rate: runs per over so far, runs * 6 / ball (NaN before the first ball).
+      - balls_remaining: BALLS_PER_INNINGS - ball, floored at 0.
+      - runs_needed: total_chasing + 1 - runs in the second innings, NaN in the first.
+      - required_run_rate: runs_needed * 6 / balls_remaining in the second innings
+        (NaN in the first innings or when no balls remain).
 
     Parameters
     ----------
-    match_info : dict
-        A dictionary containing match information, including:
-          - match_info["data"]["score"]
-          - match_info["data"]["teams"]
+    innings, ball, runs, total_chasing : array-like or scalar
+        The base features, as in the model's input.
 
     Returns
     -------
     dict
-        A dictionary with feature keys (innings, ball, runs, wickets, total_chasing)
-        and team names (team_batting_first, team_batting_second).
+        Maps 'run_rate', 'required_run_rate', 'balls_remaining' and 'runs_needed'
+        to float arrays.
+    """
+    innings = np.asarray(innings, dtype=float)
+    ball = np.asarray(ball, dtype=float)
+    runs = np.asarray(runs, dtype=float)
+    total_chasing = np.asarray(total_chasing, dtype=float)
+    shape = np.broadcast(innings, ball, runs, total_chasing).shape
+
+    balls_remaining = np.clip(BALLS_PER_INNINGS - ball, 0, None)
+    run_rate = np.divide(runs * 6, ball, out=np.full(shape, np.nan), where=ball > 0)
+
+    chasing = innings == 2
+    runs_needed = np.where(chasing, total_chasing + 1 - runs, np.nan)
+    required_run_rate = np.divide(
+        runs_needed * 6,
+        balls_remaining,
+        out=np.full(shape, np.nan),
+        where=chasing & (balls_remaining > 0),
+    )
 
-    Raises
-    ------
-    ValueError
-        If we cannot determine the batting order or parse the innings details.
+    return {
+        "run_rate": run_rate,
+        "required_run_rate": required_run_rate,
+        "balls_remaining": np.broadcast_to(balls_remaining, shape).astype(float),
+        "runs_needed": np.broadcast_to(runs_needed, shape).astype(float),
+    }
+
+
+def momentum_from_history(ball, runs, wickets, history):
     """
-    data_section = match_info.get("data", {})
-    score_data = data_section.get("score", [])
-    all_teams = data_section.get("teams", [])
+    Compute the recent-momentum features for a single live match state.
 
-    # Determine batting order (may raise ValueError if mismatch)
-    team_batting_first, team_batting_second = extract_batting_order(score_data, all_teams)
+    For each window k in MOMENTUM_WINDOWS, runs_last_k (wickets_last_k) is the runs
+    (wickets) scored in the innings since ball - k, i.e. runs(ball) - runs(ball - k),
+    where the state before the first ball is 0 runs for 0 wickets. This is the same
+    definition the training data uses (a grouped shift over each innings).
+
+    Training sees every ball, but a live innings is only observed now and then (each
+    Lambda run stores one state). When the state at ball - k wasn't observed, it is
+    interpolated linearly between the nearest observed states around it; the start
+    of the innings and the current state always count as observed, so the features
+    are never NaN, and they are exact whenever ball - k was observed.
+
+    Parameters
+    ----------
+    ball, runs, wickets : int
+        The current state of the innings.
+    history : dict or None
+        Previously observed states of the same innings, as {ball: (runs, wickets)}.
+
+    Returns
+    -------
+    dict
+        The momentum features.
+    """
+    observed = {0: (0, 0)}
+    observed.update({past_ball: state for past_ball, state in (history or {}).items() if 0 < past_ball < ball})
+    observed[ball] = (runs, wickets)
+    balls = sorted(observed)
+    past_runs = [observed[past_ball][0] for past_ball in balls]
+    past_wickets = [observed[past_ball][1] for past_ball in balls]
+
+    features = {}
+    for window in MOMENTUM_WINDOWS:
+        past_ball = max(ball - window, 0)
+        features[f"runs_last_{window}"] = runs - float(np.interp(past_ball, balls, past_runs))
+        features[f"wickets_last_{window}"] = wickets - float(np.interp(past_ball, balls, past_wickets))
+
+    return features
+
+
+def history_from_predictions(items, innings):
+    """
+    Build the `history` for `momentum_from_history` from stored predictions.
+
+    Parameters
+    ----------
+    items : list of dict
+        Prediction items stored for one match (numbers may be Decimals).
+    innings : int
+        The innings whose states to keep.
+
+    Returns
+    -------
+    dict
+        {ball: (runs, wickets)} for every stored state of that innings; a later
+        prediction for the same ball replaces an earlier one.
+    """
+    history = {}
+    for item in sorted(items, key=lambda item: item.get("predicted_at") or ""):
+        values = [item.get(name) for name in ("innings", "ball", "runs", "wickets")]
+        if any(value is None for value in values) or int(values[0]) != innings:
+            continue
+        history[int(values[1])] = (int(values[2]), int(values[3]))
+    return history
+
+
+def match_state(score_data):
+    """
+    Extract the base match state from a CricAPI 'score' list.
+
+    Parameters
+    ----------
+    score_data : list of dict
+        Innings totals ({"r", "w", "o", ...}), in batting order.
 
+    Returns
+    -------
+    tuple
+        (innings, ball, runs, wickets, total_chasing), in FEATURE_COLUMNS order;
+        total_chasing is NaN in the first innings.
+    """
     # Innings info
     innings = len(score_data)
     innings_index = innings - 1 if innings > 0 else 0
@@ -212,18 +340,96 @@ def prepare_features(match_info):
         wickets = score_data[innings_index].get("w", 0)
         overs_float = score_data[innings_index].get("o", 0.0)
 
-    # Convert overs to balls (e.g., 5.2 overs -> 5 overs, 2 balls)
+    # Convert overs to legal balls bowled (e.g., 5.2 overs -> 5 overs, 2 balls -> 32),
+    # the training data's 'ball': the state after that many legal deliveries
     overs_int = int(overs_float)
     fraction = overs_float - overs_int
     fractional_balls = round(fraction * 10)
-    ball_count = overs_int * 6 + fractional_balls + 1
+    ball_count = overs_int * 6 + fractional_balls
 
     # If there's at least one innings, that total is the "chasing" target for the second
     total_chasing = np.nan
     if innings > 1:
         total_chasing = score_data[0].get("r", np.nan)
 
-    return {
+    return innings, ball_count, runs, wickets, total_chasing
+
+
+@timed("feature_prep")
+def build_feature_matrix(match_infos):
+    """
+    Build the model input for many matches at once.
+
+    Fills a preallocated float array in FEATURE_COLUMNS order, one row per match,
+    without building the per-match feature dict of `prepare_features`. Matches whose
+    batting order or score can't be parsed get a row of NaN and an error message.
+
+    Parameters
+    ----------
+    match_infos : list of dict
+        CricAPI /match_info responses, each with a "data" section.
+
+    Returns
+    -------
+    (np.ndarray, list)
+        X, a float array of shape (len(match_infos), len(FEATURE_COLUMNS)), and
+        errors, a list with None for each parsed row and the error message otherwise.
+    """
+    X = np.full((len(match_infos), len(FEATURE_COLUMNS)), np.nan)
+    errors = [None] * len(match_infos)
+
+    for row, match_info in enumerate(match_infos):
+        data_section = (match_info or {}).get("data", {}) or {}
+        score_data = data_section.get("score", []) or []
+        try:
+            # Same validation as prepare_features: the batting order must be known
+            extract_batting_order(score_data, data_section.get("teams", []) or [])
+            X[row] = match_state(score_data)
+        except (ValueError, TypeError, AttributeError) as e:
+            errors[row] = str(e)
+
+    return X, errors
+
+
+@timed("feature_prep")
+def prepare_features(match_info, history=None):
+    """
+    Extract key features (innings, ball, runs, wickets, total_chasing) 
+    from 'match_info' for use in a predictive model, along with the DERIVED_FEATURES.
+    Also infers which teams are batting first vs second 
+    using match_info["data"]["teams"] and the first innings in 'score'.
+
+    Parameters
+    ----------
+    match_info : dict
+        A dictionary containing match information, including:
+          - match_info["data"]["score"]
+          - match_info["data"]["teams"]
+    history : dict or None
+        Earlier observed states of the current innings as {ball: (runs, wickets)},
+        used for the momentum features (see `momentum_from_history`).
+
+    Returns
+    -------
+    dict
+        A dictionary with feature keys (innings, ball, runs, wickets, total_chasing),
+        the DERIVED_FEATURES, and team names (team_batting_first, team_batting_second).
+
+    Raises
+    ------
+    ValueError
+        If we cannot determine the batting order or parse the innings details.
+    """
+    data_section = match_info.get("data", {})
+    score_data = data_section.get("score", [])
+    all_teams = data_section.get("teams", [])
+
+    # Determine batting order (may raise ValueError if mismatch)
+    team_batting_first, team_batting_second = extract_batting_order(score_data, all_teams)
+
+    innings, ball_count, runs, wickets, total_chasing = match_state(score_data)
+
+    features = {
         "innings": innings,
         "ball": ball_count,
         "runs": runs,
@@ -233,6 +439,13 @@ def prepare_features(match_info):
         "team_batting_second": team_batting_second
     }
 
+    # Derived features share their definitions with the training data
+    for name, value in derive_features(innings, ball_count, runs, total_chasing).items():
+        features[name] = float(value)
+    features.update(momentum_from_history(ball_count, runs, wickets, history))
+
+    return features
+
 
 def extract_winning_team(status, teams):
     """
@@ -290,6 +503,127 @@ def determine_chasing_team(score):
     return None
 
 
+# Phrases in a CricAPI match status that mean the match is over
+FINISHED_KEYWORDS = ["won by", "tie", "draw", "no result", "abandoned"]
+
+
+class MatchSnapshot:
+    """
+    A normalized view of one CricAPI /match_info response.
+
+    One fetch serves every consumer: the model features (as from `prepare_features`),
+    the batting order, and the finished/result state used to resolve predictions.
+    Derived values are computed on first use and kept.
+    """
+
+    def __init__(self, match_info, match_id=None):
+        """
+        Parameters
+        ----------
+        match_info : dict
+            The CricAPI response, as returned by `get_match_info` (with a "data" section).
+        match_id : str or None
+            The match's CricAPI identifier; defaults to match_info["data"]["id"].
+        """
+        self.match_info = match_info
+        data_section = match_info.get("data", {}) or {}
+        self.match_id = match_id or data_section.get("id")
+        self.status = data_section.get("status", "") or ""
+        self.teams = data_section.get("teams", []) or []
+        self.score = data_section.get("score", []) or []
+        self.history = None
+        self._features = None
+
+    def set_history(self, history):
+        """
+        Use `history` ({ball: (runs, wickets)} of the current innings, e.g. from
+        `history_from_predictions`) for the momentum features.
+        """
+        self.history = history
+        self._features = None
+
+    @property
+    def innings(self):
+        """
+        The number of the innings in progress (0 before the first ball).
+        """
+        return len(self.score)
+
+    @property
+    def features(self):
+        """
+        The model features and batting teams, as returned by `prepare_features`
+        (with the history set by `set_history`, if any).
+
+        Raises
+        ------
+        ValueError
+            If the batting order or innings details cannot be parsed.
+        """
+        if self._features is None:
+            self._features = prepare_features(self.match_info, history=self.history)
+        return self._features
+
+    @property
+    def batting_order(self):
+        """
+        (team_batting_first, team_batting_second); raises ValueError if unknown.
+        """
+        return extract_batting_order(self.score, self.teams)
+
+    @property
+    def fingerprint(self):
+        """
+        A compact fingerprint of the current score, "innings:runs/wickets@overs"
+        (e.g. "2:87/3@11.4"); it only changes when the match state moves on.
+        """
+        if not self.score:
+            return "0:0/0@0"
+        current = self.score[-1]
+        return f"{len(self.score)}:{current.get('r', 0)}/{current.get('w', 0)}@{current.get('o', 0)}"
+
+    @property
+    def is_finished(self):
+        """
+        True if the match status says the match is over.
+        """
+        status_lower = self.status.lower()
+        return any(keyword in status_lower for keyword in FINISHED_KEYWORDS)
+
+    def result(self):
+        """
+        Determine the match result and whether the chasing team won.
+
+        Returns
+        -------
+        tuple
+            (result_string, chasing_team_won), where chasing_team_won is 1 if the
+            chasing team won and 0 if they lost. Returns (None, None) if the match is
+            still ongoing or the result cannot be determined.
+        """
+        if not (self.status and self.teams and self.score):
+            logger.warning(f"Missing or incomplete data for match_id {self.match_id}.")
+            return None, None
+
+        if not self.is_finished:
+            # Match is still ongoing
+            logger.info(f"Match {self.match_id} status: {self.status}")
+            return None, None
+
+        winning_team = extract_winning_team(self.status, self.teams)
+        if not winning_team:
+            logger.warning(f"Could not determine winning team from status '{self.status}'.")
+            return None, None
+
+        chasing_team = determine_chasing_team(self.score)
+        if not chasing_team:
+            logger.warning(f"Could not determine chasing team for match_id {self.match_id}.")
+            return None, None
+
+        chasing_team_won = 1 if winning_team == chasing_team else 0
+        return self.status, chasing_team_won
+
+
 def process_predictions(items):
     """
     Process a list of DynamoDB items (predictions). Convert Decimals to floats, 
@@ -1,14 +1,39 @@
+import argparse
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import boto3
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer
 from datetime import datetime, timedelta
 
-from src.utils.api_helpers import get_match_result
+from src.utils.api_helpers import MatchSnapshots
+from src.utils.data_helpers import history_from_predictions
+from src.utils.quota_helpers import Priority, request_priority
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Global secondary index of the Predictions table: a match's predictions, sorted by time.
+# New tables are created with it; add it to an existing table once with
+#     python -m src.utils.db_helpers add-match-index
+MATCH_INDEX_NAME = "match_id-predicted_at-index"
+MATCH_INDEX = {
+    "IndexName": MATCH_INDEX_NAME,
+    "KeySchema": [
+        {"AttributeName": "match_id", "KeyType": "HASH"},
+        {"AttributeName": "predicted_at", "KeyType": "RANGE"},
+    ],
+    "Projection": {"ProjectionType": "ALL"},
+}
+MATCH_INDEX_ATTRIBUTES = [
+    {"AttributeName": "match_id", "AttributeType": "S"},
+    {"AttributeName": "predicted_at", "AttributeType": "S"},
+]
+
 class Predictions:
     """
     Encapsulates an Amazon DynamoDB table for storing and updating cricket match predictions.
@@ -18,7 +43,8 @@ class Predictions:
       - Inserting new predictions as top-level attributes (rather than a nested 'info' map).
       - Fetching pending predictions (i.e., matches whose 'result' is not yet determined).
       - Updating results in the table once the match outcome is known.
-      - Fetching all predictions from the table.
+      - Fetching all predictions from the table, or one match's predictions through
+        the match_id/predicted_at index.
     """
 
     def __init__(self, dyn_resource, table_name):
@@ -64,7 +90,8 @@ class Predictions:
 
     def create_table(self, table_name):
         """
-        Create a new DynamoDB table with the specified name and a simple schema.
+        Create a new DynamoDB table with the specified name, keyed by prediction_id,
+        with the match_id/predicted_at index.
 
         Parameters
         ----------
@@ -89,7 +116,8 @@ class Predictions:
                 ],
                 AttributeDefinitions=[
                     {"AttributeName": "prediction_id", "AttributeType": "N"},
-                ],
+                ] + MATCH_INDEX_ATTRIBUTES,
+                GlobalSecondaryIndexes=[MATCH_INDEX],
                 BillingMode="PAY_PER_REQUEST",
             )
             table.wait_until_exists()
@@ -127,6 +155,34 @@ class Predictions:
             )
             raise
 
+    def insert_predictions(self, items):
+        """
+        Insert many prediction items at once using DynamoDB batch writes.
+
+        Parameters
+        ----------
+        items : list of dict
+            Prediction records, as for `insert_prediction`.
+
+        Raises
+        ------
+        ClientError
+            If a batch write fails.
+        """
+        try:
+            # batch_writer groups puts into BatchWriteItem calls of up to 25 items
+            # and resends any unprocessed items
+            with self.table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+            logger.info(f"Inserted {len(items)} predictions into DynamoDB.")
+        except ClientError as err:
+            logger.error(
+                f"Couldn't batch insert data into table '{self.table.name}'. "
+                f"Error: {err.response['Error']['Code']}: {err.response['Error']['Message']}"
+            )
+            raise
+
     def get_recent_pending_predictions(self):
         """
         Retrieve all prediction records from the table where:
@@ -199,13 +255,14 @@ class Predictions:
             )
             raise
 
-    def update_pending_results(self, api_key):
+    def update_pending_results(self, api_key, snapshots=None):
         """
         Check all pending predictions in last 2 days and update their result if the match has concluded.
 
         Steps:
         1. Retrieve all pending predictions in last x (where 'result' is missing/None).
-        2. For each pending prediction, call `get_match_result` to see if the match is finished.
+        2. Fetch all their matches concurrently as `MatchSnapshot`s (each distinct
+           match is only requested once) and read each result from its snapshot.
         3. If finished, update the table with the final 'result' and 'chasing_team_won'.
         4. If still ongoing, do nothing (leave it pending).
 
@@ -213,8 +270,16 @@ class Predictions:
         ----------
         api_key : str
             The API key required for retrieving match info.
+        snapshots : MatchSnapshots or None
+            The run's snapshot memo, so matches fetched here are not fetched again
+            later in the same run (e.g. for a prediction). A new one is used if None.
         """
+        if snapshots is None:
+            snapshots = MatchSnapshots(api_key)
+
         items = self.get_recent_pending_predictions()
+
+        pending = []
         for item in items:
             if not isinstance(item, dict):
                 logger.error(f"Skipped an invalid item: {item}")
@@ -232,8 +297,17 @@ class Predictions:
                 )
                 continue
 
-            # Retrieve the final match result if available
-            result, chasing_team_won = get_match_result(api_key, match_id)
+            pending.append((prediction_id, match_id))
+
+        # Retrieve the final match results, if available, in one concurrent batch.
+        # Result resolution has the highest priority for the CricAPI budget.
+        match_ids = list(dict.fromkeys(match_id for _, match_id in pending))
+        with request_priority(Priority.RESULT):
+            match_snapshots = dict(zip(match_ids, snapshots.get_many(match_ids)))
+
+        for prediction_id, match_id in pending:
+            snapshot = match_snapshots[match_id]
+            result, chasing_team_won = snapshot.result() if snapshot else (None, None)
             if result is not None and chasing_team_won is not None:
                 self.update_match_result(prediction_id, result, chasing_team_won)
             else:
@@ -242,6 +316,123 @@ class Predictions:
                     f"Leaving prediction_id={prediction_id} as pending."
                 )
 
+    def fetch_match_predictions(self, match_id, since=None):
+        """
+        Retrieve the predictions stored for one match, optionally only those made
+        after a given time, by querying the match_id/predicted_at index.
+
+        Parameters
+        ----------
+        match_id : str
+            The CricAPI match identifier.
+        since : str or None
+            An ISO 'predicted_at' timestamp; only later predictions are returned.
+
+        Returns
+        -------
+        list of dict
+            The matching items, ordered by 'predicted_at'.
+
+        Raises
+        ------
+        ClientError
+            If the query fails.
+        """
+        key_condition = Key("match_id").eq(match_id)
+        if since:
+            key_condition = key_condition & Key("predicted_at").gt(since)
+
+        try:
+            response = self.table.query(IndexName=MATCH_INDEX_NAME, KeyConditionExpression=key_condition)
+            items = response.get("Items", [])
+
+            while "LastEvaluatedKey" in response:
+                response = self.table.query(
+                    IndexName=MATCH_INDEX_NAME,
+                    KeyConditionExpression=key_condition,
+                    ExclusiveStartKey=response["LastEvaluatedKey"]
+                )
+                items.extend(response.get("Items", []))
+
+            return items
+
+        except ClientError as e:
+            logger.error(
+                f"Error fetching predictions for match {match_id} from table '{self.table_name}'. "
+                f"Error: {e.response['Error']['Code']}: {e.response['Error']['Message']}"
+            )
+            raise
+
+    def _fetch_match_states(self, match_id):
+        """
+        Read the match state of every prediction stored for a match from the index,
+        through the low-level client (which, unlike the table resource, can be shared
+        between threads), projecting only the state attributes.
+        """
+        client = self.dyn_resource.meta.client
+        params = {
+            "TableName": self.table_name,
+            "IndexName": MATCH_INDEX_NAME,
+            "KeyConditionExpression": "match_id = :match_id",
+            "ExpressionAttributeValues": {":match_id": {"S": match_id}},
+            "ProjectionExpression": "#p, #i, #b, #r, #w",
+            "ExpressionAttributeNames": {
+                "#p": "predicted_at", "#i": "innings", "#b": "ball", "#r": "runs", "#w": "wickets",
+            },
+        }
+        deserializer = TypeDeserializer()
+        items = []
+        while True:
+            response = client.query(**params)
+            items.extend(
+                {name: deserializer.deserialize(value) for name, value in item.items()}
+                for item in response.get("Items", [])
+            )
+            if "LastEvaluatedKey" not in response:
+                return items
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def match_histories(self, requests, max_workers=8):
+        """
+        Return the states stored for several match innings, as the `history` used for
+        the live momentum features (see `history_from_predictions`). The matches are
+        read concurrently, so a run pays for about one query rather than one per match.
+
+        A failed read, e.g. while the index is missing or still backfilling, is logged
+        and gives an empty history rather than failing the prediction.
+
+        Parameters
+        ----------
+        requests : list of (str, int)
+            (match_id, innings in progress) pairs.
+        max_workers : int
+            Maximum number of queries in flight.
+
+        Returns
+        -------
+        list of dict
+            {ball: (runs, wickets)} for each request, in order.
+        """
+        def history(request):
+            match_id, innings = request
+            try:
+                return history_from_predictions(self._fetch_match_states(match_id), innings)
+            except ClientError as err:
+                logger.warning(f"Couldn't read the stored states of match {match_id}: {err}")
+                return {}
+
+        requests = list(requests)
+        if not requests:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as pool:
+            return list(pool.map(history, requests))
+
+    def match_history(self, match_id, innings):
+        """
+        Return the states stored for one innings of a match (see `match_histories`).
+        """
+        return self.match_histories([(match_id, innings)])[0]
+
     def fetch_predictions(self):
         """
         Retrieve all predictions from the DynamoDB table associated with this Predictions instance.
@@ -275,4 +466,167 @@ class Predictions:
                 f"Error fetching predictions from table '{self.table_name}'. "
                 f"Error: {e.response['Error']['Code']}: {e.response['Error']['Message']}"
             )
-            raise
\ No newline at end of file
+            raise
+
+
+class MatchFingerprints:
+    """
+    Remembers the last score fingerprint seen per match (see `MatchSnapshot.fingerprint`),
+    so the Lambda can skip predicting and storing a match whose state hasn't changed
+    since its last run (rain delays, innings breaks, timeouts).
+
+    Fingerprints live in a small DynamoDB table keyed by match_id, whose items expire
+    after `ttl_days`, and are also memoized in memory so a warm container only reads
+    the table for matches it hasn't seen yet.
+    """
+
+    def __init__(self, dyn_resource, table_name="MatchFingerprints", ttl_days=3):
+        """
+        Parameters
+        ----------
+        dyn_resource : boto3.resource
+            A DynamoDB resource object.
+        table_name : str
+            The name of the DynamoDB table to use or create.
+        ttl_days : int
+            Days after which a stored fingerprint expires.
+        """
+        self.dyn_resource = dyn_resource
+        self.table_name = table_name
+        self.ttl_days = ttl_days
+        self._memo = {}
+        self._lock = threading.Lock()
+
+        try:
+            dyn_resource.meta.client.describe_table(TableName=table_name)
+            self.table = dyn_resource.Table(table_name)
+        except dyn_resource.meta.client.exceptions.ResourceNotFoundException:
+            self.table = self.create_table(table_name)
+
+    def create_table(self, table_name):
+        """
+        Create the fingerprint table (keyed by match_id, with expiring items).
+
+        Raises
+        ------
+        ClientError
+            If the table creation fails for any reason.
+        """
+        try:
+            table = self.dyn_resource.create_table(
+                TableName=table_name,
+                KeySchema=[{"AttributeName": "match_id", "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": "match_id", "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            table.wait_until_exists()
+            self.dyn_resource.meta.client.update_time_to_live(
+                TableName=table_name,
+                TimeToLiveSpecification={"Enabled": True, "AttributeName": "expires_at"},
+            )
+            logger.info(f"Created table '{table_name}'.")
+            return table
+        except ClientError as err:
+            logger.error(
+                f"Couldn't create table '{table_name}'. "
+                f"Error: {err.response['Error']['Code']}: {err.response['Error']['Message']}"
+            )
+            raise
+
+    def last_fingerprint(self, match_id):
+        """
+        Return the last recorded fingerprint for `match_id`, or None.
+        """
+        with self._lock:
+            if match_id in self._memo:
+                return self._memo[match_id]
+
+        try:
+            item = self.table.get_item(Key={"match_id": match_id}).get("Item")
+        except ClientError as err:
+            # Without the stored fingerprint we just predict as usual
+            logger.warning(f"Couldn't read the fingerprint of match {match_id}: {err}")
+            return None
+
+        fingerprint = item.get("fingerprint") if item else None
+        with self._lock:
+            self._memo[match_id] = fingerprint
+        return fingerprint
+
+    def is_unchanged(self, match_id, fingerprint):
+        """
+        True if `fingerprint` equals the last one recorded for `match_id`.
+        """
+        return fingerprint is not None and self.last_fingerprint(match_id) == fingerprint
+
+    def record(self, match_id, fingerprint):
+        """
+        Store `fingerprint` as the latest state seen for `match_id`.
+        """
+        self.table.put_item(
+            Item={
+                "match_id": match_id,
+                "fingerprint": fingerprint,
+                "updated_at": datetime.utcnow().isoformat(),
+                "expires_at": int(time.time()) + self.ttl_days * 86400,
+            }
+        )
+        with self._lock:
+            self._memo[match_id] = fingerprint
+
+
+def add_match_index(dyn_resource, table_name="Predictions"):
+    """
+    Add the match_id/predicted_at index to a Predictions table created without it.
+
+    A one-off migration, run from the command line (not by the app or the Lambda,
+    which only query the index and do without it until it is active). DynamoDB
+    backfills the index in the background.
+
+    Returns
+    -------
+    str
+        The index status, e.g. 'CREATING' or 'ACTIVE'.
+
+    Raises
+    ------
+    ClientError
+        If the table can't be described or updated.
+    """
+    client = dyn_resource.meta.client
+    description = client.describe_table(TableName=table_name)
+    for index in description.get("Table", {}).get("GlobalSecondaryIndexes", []):
+        if index["IndexName"] == MATCH_INDEX_NAME:
+            logger.info(f"Index '{MATCH_INDEX_NAME}' on table '{table_name}' is {index.get('IndexStatus')}.")
+            return index.get("IndexStatus")
+
+    try:
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=MATCH_INDEX_ATTRIBUTES,
+            GlobalSecondaryIndexUpdates=[{"Create": MATCH_INDEX}],
+        )
+    except ClientError as err:
+        logger.error(
+            f"Couldn't create index '{MATCH_INDEX_NAME}' on table '{table_name}'. "
+            f"Error: {err.response['Error']['Code']}: {err.response['Error']['Message']}"
+        )
+        raise
+    logger.info(f"Creating index '{MATCH_INDEX_NAME}' on table '{table_name}'.")
+    return "CREATING"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="One-off DynamoDB migrations for the Predictions table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("add-match-index", help="Add the match_id/predicted_at index.")
+    index.add_argument("--table", default="Predictions", help="The Predictions table name.")
+    index.add_argument("--region", default="eu-north-1", help="The table's AWS region.")
+    args = parser.parse_args(argv)
+
+    status = add_match_index(boto3.resource("dynamodb", region_name=args.region), args.table)
+    print(f"{MATCH_INDEX_NAME}: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,606 @@
+"""
+Fast inference for the win-probability model, without CatBoost at serving time.
+
+Two engines stand in for `CatBoostClassifier.predict_proba`:
+
+- A tree bundle: the model's oblivious trees exported to plain arrays (split
+  features, borders and leaf values), evaluated with NumPy alone.
+- A lookup table. The model's inputs are small integers (innings, ball, runs,
+  wickets and the target being chased), and the model is piecewise constant
+  between its split borders. So it can be evaluated once over every reachable
+  integer state and the probabilities stored in a memory-mapped array. Serving
+  then costs one array lookup per row, with the trees as a fallback for states
+  outside the table.
+
+Export the trees (needs catboost) and build the table (from the repository root):
+    python -m src.utils.model_helpers export --model src/model.cbm --output src/model_trees.npz
+    python -m src.utils.model_helpers table --output src/model_lookup
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from src.utils.data_helpers import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+current_dir = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(os.path.dirname(current_dir), "model.cbm")
+TREE_BUNDLE_PATH = os.environ.get(
+    "TREE_BUNDLE_PATH", os.path.join(os.path.dirname(current_dir), "model_trees.npz")
+)
+LOOKUP_TABLE_PATH = os.environ.get(
+    "LOOKUP_TABLE_PATH", os.path.join(os.path.dirname(current_dir), "model_lookup")
+)
+
+TREE_BUNDLE_VERSION = 2
+LOOKUP_TABLE_VERSION = 1
+
+# Probabilities are stored as uint16: p is kept as round(p * PROBABILITY_SCALE), an
+# error of at most 1 / (2 * PROBABILITY_SCALE) (under 0.001 percentage points)
+PROBABILITY_SCALE = np.iinfo(np.uint16).max
+
+# In a chase the score can pass the target by at most one delivery's runs; states
+# further past the target can't occur and are left out of the table
+RUN_SLACK = 7
+
+
+def _file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_catboost_model(model_path: str = MODEL_PATH):
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(model_path)
+    return model
+
+
+def export_tree_bundle(model_path: str = MODEL_PATH, output_path: str = TREE_BUNDLE_PATH) -> dict:
+    """
+    Export a CatBoost model's oblivious trees to a NumPy array bundle (.npz).
+
+    Trees shallower than the deepest one are padded with splits that are never
+    taken, so every tree has the same depth and the evaluator can work on all
+    trees at once. The bundle records the SHA-256 of the model file, so loading it
+    next to a different model.cbm fails rather than serving the old trees.
+
+    Parameters
+    ----------
+    model_path : str
+        The CatBoost model (.cbm). Only numeric features are supported.
+    output_path : str
+        Where to write the bundle.
+
+    Returns
+    -------
+    dict
+        Export report: number of trees, depth and bundle size in bytes.
+    """
+    model = _load_catboost_model(model_path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "model.json")
+        model.save_model(json_path, format="json")
+        with open(json_path, "r", encoding="utf-8") as f:
+            exported = json.load(f)
+
+    features_info = exported["features_info"]
+    if set(features_info) != {"float_features"}:
+        raise ValueError(f"Only numeric features can be exported; model has {sorted(features_info)}.")
+    float_features = sorted(features_info["float_features"], key=lambda f: f["flat_feature_index"])
+
+    # Features missing values: CatBoost's 'Max' treatment puts them above every border,
+    # the others ('Min', 'AsIs', 'AsFalse') below
+    nan_fill = np.array(
+        [np.inf if f.get("nan_value_treatment") == "Max" else -np.inf for f in float_features],
+        dtype=np.float32,
+    )
+
+    trees = exported["oblivious_trees"]
+    depth = max(len(tree["splits"]) for tree in trees)
+    split_features = np.zeros((len(trees), depth), dtype=np.int16)
+    split_borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    leaf_values = np.zeros((len(trees), 2 ** depth), dtype=np.float64)
+    for index, tree in enumerate(trees):
+        for level, split in enumerate(tree["splits"]):
+            if split.get("split_type", "FloatFeature") != "FloatFeature":
+                raise ValueError(f"Unsupported split type {split['split_type']} in tree {index}.")
+            split_features[index, level] = split["float_feature_index"]
+            split_borders[index, level] = split["border"]
+        # A padded level's split is never taken, so its leaves are never reached
+        leaf_values[index, :len(tree["leaf_values"])] = tree["leaf_values"]
+
+    scale, bias = exported.get("scale_and_bias", [1.0, [0.0]])
+    np.savez_compressed(
+        output_path,
+        version=np.array(TREE_BUNDLE_VERSION),
+        model_sha256=np.array(_file_sha256(model_path)),
+        feature_names=np.array([f.get("feature_id", str(i)) for i, f in enumerate(float_features)]),
+        nan_fill=nan_fill,
+        split_features=split_features,
+        split_borders=split_borders,
+        leaf_values=leaf_values,
+        scale=np.array(scale, dtype=np.float64),
+        bias=np.array(bias[0] if isinstance(bias, list) else bias, dtype=np.float64),
+    )
+
+    report = {"trees": len(trees), "depth": depth, "bytes": os.path.getsize(output_path)}
+    logger.info(f"Exported {model_path} to {output_path}: {report}")
+    return report
+
+
+class TreeEnsemble:
+    """
+    Evaluates an exported oblivious-tree ensemble with NumPy, as a drop-in for
+    `CatBoostClassifier.predict_proba` and `get_borders`.
+
+    In an oblivious tree every node at a level applies the same split, so a row's
+    leaf index is the binary number formed by its split outcomes, level j giving bit j.
+    """
+
+    # Rows evaluated per chunk; small chunks keep the (trees x rows) arrays in cache
+    CHUNK_ROWS = 256
+
+    def __init__(self, nan_fill, split_features, split_borders, leaf_values, scale=1.0, bias=0.0, feature_names=None):
+        self.nan_fill = np.asarray(nan_fill, dtype=np.float32)
+        self.split_features = np.asarray(split_features, dtype=np.intp)
+        self.split_borders = np.asarray(split_borders, dtype=np.float32)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+        # Leaf indices are computed into the flattened leaf array: tree t's leaves
+        # start at t * 2**depth
+        n_trees, depth = self.split_features.shape
+        self._flat_leaf_values = self.leaf_values.ravel()
+        self._leaf_offsets = (np.arange(n_trees) * self.leaf_values.shape[1])[:, None]
+        self._level_borders = [self.split_borders[:, level, None] for level in range(depth)]
+
+    @classmethod
+    def load(cls, path: str = TREE_BUNDLE_PATH, model_path: Optional[str] = None) -> "TreeEnsemble":
+        """
+        Load a bundle written by `export_tree_bundle`.
+
+        If `model_path` is given and exists, the bundle must have been exported from
+        that model file; otherwise a ValueError asks for it to be re-exported.
+        """
+        with np.load(path) as bundle:
+            if int(bundle["version"]) != TREE_BUNDLE_VERSION:
+                raise ValueError(f"Unsupported tree bundle version {int(bundle['version'])} in {path}; "
+                                 f"re-export it with `python -m src.utils.model_helpers export`.")
+            if model_path is not None and os.path.exists(model_path):
+                if str(bundle["model_sha256"]) != _file_sha256(model_path):
+                    raise ValueError(f"Tree bundle {path} was not exported from {model_path}; "
+                                     f"re-export it with `python -m src.utils.model_helpers export`.")
+            return cls(
+                bundle["nan_fill"],
+                bundle["split_features"],
+                bundle["split_borders"],
+                bundle["leaf_values"],
+                scale=bundle["scale"],
+                bias=bundle["bias"],
+                feature_names=bundle["feature_names"].tolist(),
+            )
+
+    def get_borders(self) -> dict:
+        """
+        Return {feature index: sorted borders used by the trees}, like CatBoost's.
+        """
+        borders = {}
+        finite = np.isfinite(self.split_borders)
+        for feature in np.unique(self.split_features[finite]):
+            used = self.split_borders[finite & (self.split_features == feature)]
+            borders[int(feature)] = sorted(float(border) for border in np.unique(used))
+        return borders
+
+    def predict_raw(self, X) -> np.ndarray:
+        """
+        Return the raw ensemble score (log-odds of the positive class) for each row.
+        """
+        X = np.asarray(X, dtype=np.float32).reshape(-1, len(self.nan_fill))
+        X = np.where(np.isnan(X), self.nan_fill, X)
+        # Feature-major, so each level's split values are one gather of whole rows
+        columns = np.ascontiguousarray(X.T)
+        raw = np.empty(len(X))
+        for start in range(0, len(X), self.CHUNK_ROWS):
+            chunk = columns[:, start:start + self.CHUNK_ROWS]
+            leaves = np.repeat(self._leaf_offsets, chunk.shape[1], axis=1)
+            for level, borders in enumerate(self._level_borders):
+                leaves += (chunk[self.split_features[:, level]] > borders) << level
+            raw[start:start + chunk.shape[1]] = self._flat_leaf_values[leaves].sum(axis=0)
+        return raw * self.scale + self.bias
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Return an (n, 2) array of [P(chasing side loses), P(chasing side wins)].
+        """
+        probabilities = 1.0 / (1.0 + np.exp(-self.predict_raw(X)))
+        return np.column_stack([1 - probabilities, probabilities])
+
+
+def load_model(model_path: str = MODEL_PATH, bundle_path: str = TREE_BUNDLE_PATH):
+    """
+    Return the model as a NumPy `TreeEnsemble` if its tree bundle exists, otherwise
+    as a CatBoost model (which needs catboost installed). Where the model file is
+    present too, the bundle is checked against it (see `TreeEnsemble.load`).
+    """
+    if os.path.exists(bundle_path):
+        return TreeEnsemble.load(bundle_path, model_path)
+    logger.info(f"No tree bundle at {bundle_path}; loading {model_path} with CatBoost.")
+    return _load_catboost_model(model_path)
+
+
+def _grid_limits(model, max_runs: Optional[int], max_target: Optional[int]) -> dict:
+    """
+    Work out the integer range covered for each feature from the model's borders.
+
+    A feature's values above its highest border all fall into the same leaf, so
+    when the table reaches one past that border ("clamped"), larger values can be
+    clamped to it without changing the prediction. The same holds for values
+    below 0, as all borders are non-negative.
+    """
+    borders = model.get_borders()
+    limits = {}
+    for index, name in enumerate(FEATURE_COLUMNS):
+        # Ignore the sentinel border CatBoost adds to separate missing values
+        real_borders = [border for border in borders.get(index, []) if border > -1e38]
+        if real_borders and min(real_borders) < 0:
+            raise ValueError(f"Feature '{name}' has negative borders; the lookup table assumes none.")
+        limits[name] = {"max": int(np.floor(max(real_borders))) + 1 if real_borders else 0}
+
+    for name, cap in (("runs", max_runs), ("total_chasing", max_target)):
+        if cap is not None and cap < limits[name]["max"]:
+            limits[name]["max"] = int(cap)
+            limits[name]["clamped"] = False
+
+    for name in FEATURE_COLUMNS:
+        limits[name].setdefault("clamped", True)
+    return limits
+
+
+class LookupTable:
+    """
+    A memory-mapped table of win probabilities over the integer match-state grid.
+
+    The table has two blocks:
+      - no target (total_chasing missing, i.e. the first innings):
+        innings x ball x wickets x runs;
+      - a target t, for the chasing innings: for each t, ball x wickets x runs,
+        with runs only up to t + RUN_SLACK.
+    """
+
+    def __init__(self, values: np.ndarray, meta: dict):
+        """
+        Parameters
+        ----------
+        values : np.ndarray
+            The flat uint16 probability array (usually memory-mapped).
+        meta : dict
+            The table's metadata, as written by `build_lookup_table`.
+        """
+        self.values = values
+        self.meta = meta
+        self.limits = meta["limits"]
+        self.run_slack = meta["run_slack"]
+        self.offsets = np.asarray(meta["target_offsets"], dtype=np.int64)
+
+        self.n_innings = self.limits["innings"]["max"] + 1
+        self.n_balls = self.limits["ball"]["max"] + 1
+        self.n_wickets = self.limits["wickets"]["max"] + 1
+        self.n_runs = self.limits["runs"]["max"] + 1
+
+    @classmethod
+    def load(cls, path: str = LOOKUP_TABLE_PATH) -> "LookupTable":
+        """
+        Open the table stored at `path` (`path`.npy plus `path`.json), memory-mapped.
+        """
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != LOOKUP_TABLE_VERSION:
+            raise ValueError(f"Unsupported lookup table version {meta.get('version')} in {path}.json.")
+        return cls(np.load(path + ".npy", mmap_mode="r"), meta)
+
+    def _bounded(self, values: np.ndarray, name: str, ok: np.ndarray) -> np.ndarray:
+        """
+        Clip `values` into the feature's grid, marking rows that can't be clipped
+        exactly as misses in `ok`.
+        """
+        limit = self.limits[name]
+        if not limit["clamped"]:
+            ok &= values <= limit["max"]
+        return np.clip(values, 0, limit["max"]).astype(np.int64)
+
+    def lookup(self, X) -> tuple:
+        """
+        Look up the chasing side's win probability for each row of `X`.
+
+        Parameters
+        ----------
+        X : array-like of shape (n, 5)
+            Rows in FEATURE_COLUMNS order.
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            Probabilities (float64) and a boolean mask of the rows found in the table;
+            probabilities of rows not found are NaN.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        innings, ball, runs, wickets, target = X.T
+        no_target = np.isnan(target)
+
+        # Only whole-number states are in the table
+        filled = np.where(no_target, 0.0, target)
+        ok = np.all(np.isfinite(X[:, :4]), axis=1) & np.isfinite(filled)
+        ok &= np.all(X[:, :4] == np.round(X[:, :4]), axis=1) & (filled == np.round(filled))
+        X_int = np.where(np.isfinite(X), X, 0)
+        innings_i = self._bounded(X_int[:, 0], "innings", ok)
+        ball_i = self._bounded(X_int[:, 1], "ball", ok)
+        runs_i = self._bounded(X_int[:, 2], "runs", ok)
+        wickets_i = self._bounded(X_int[:, 3], "wickets", ok)
+        target_i = self._bounded(np.where(no_target, 0, X_int[:, 4]), "total_chasing", ok)
+
+        # The target block only covers the chasing innings, and scores that can occur
+        # in a chase
+        max_runs = np.minimum(target_i + self.run_slack, self.limits["runs"]["max"])
+        ok &= no_target | ((innings_i == self.limits["innings"]["max"]) & (runs_i <= max_runs))
+
+        state = ball_i * self.n_wickets + wickets_i
+        no_target_index = (innings_i * self.n_balls * self.n_wickets + state) * self.n_runs + runs_i
+        target_index = self.meta["no_target_size"] + self.offsets[target_i] + state * (max_runs + 1) + runs_i
+        index = np.where(no_target, no_target_index, target_index)
+
+        probabilities = np.full(len(X), np.nan)
+        probabilities[ok] = self.values[index[ok]] / PROBABILITY_SCALE
+        return probabilities, ok
+
+
+class TablePredictor:
+    """
+    Answers `predict_proba` from a `LookupTable`, falling back to the model for rows
+    outside the table. The model is only loaded if a fallback is actually needed.
+    """
+
+    def __init__(self, table: LookupTable, model_loader=load_model):
+        self.table = table
+        self.model_loader = model_loader
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.model_loader()
+        return self._model
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Return an (n, 2) array of [P(chasing side loses), P(chasing side wins)],
+        like `CatBoostClassifier.predict_proba`.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        probabilities, found = self.table.lookup(X)
+        if not found.all():
+            probabilities[~found] = self.model.predict_proba(X[~found])[:, 1]
+        return np.column_stack([1 - probabilities, probabilities])
+
+
+def load_predictor(
+    model_path: str = MODEL_PATH,
+    table_path: str = LOOKUP_TABLE_PATH,
+    bundle_path: str = TREE_BUNDLE_PATH,
+):
+    """
+    Return the fastest available predictor: the lookup table if it has been built,
+    falling back to the model (see `load_model`) for states outside it; otherwise
+    the model itself.
+    """
+    if os.path.exists(table_path + ".npy") and os.path.exists(table_path + ".json"):
+        logger.info(f"Serving predictions from lookup table {table_path}.")
+        return TablePredictor(LookupTable.load(table_path), lambda: load_model(model_path, bundle_path))
+    return load_model(model_path, bundle_path)
+
+
+def _target_block_rows(limits: dict, target: int, run_slack: int) -> np.ndarray:
+    """
+    All states with a given target, in table order: ball, then wickets, then runs.
+    """
+    max_runs = min(target + run_slack, limits["runs"]["max"])
+    ball, wickets, runs = np.meshgrid(
+        np.arange(limits["ball"]["max"] + 1),
+        np.arange(limits["wickets"]["max"] + 1),
+        np.arange(max_runs + 1),
+        indexing="ij",
+    )
+    innings = np.full(ball.size, limits["innings"]["max"])
+    return np.column_stack([innings, ball.ravel(), runs.ravel(), wickets.ravel(), np.full(ball.size, target)])
+
+
+def build_lookup_table(
+    model=None,
+    output_path: str = LOOKUP_TABLE_PATH,
+    max_runs: Optional[int] = None,
+    max_target: Optional[int] = None,
+    run_slack: int = RUN_SLACK,
+    verify_samples: int = 100_000,
+    seed: int = 0,
+) -> dict:
+    """
+    Evaluate the model over the whole state grid and write the lookup table.
+
+    Parameters
+    ----------
+    model : CatBoostClassifier, TreeEnsemble or None
+        The model to tabulate; defaults to src/model.cbm, read with CatBoost
+        (about 10x faster than the NumPy evaluator over the whole grid).
+    output_path : str
+        Writes `output_path`.npy (the values) and `output_path`.json (metadata).
+    max_runs, max_target : int or None
+        Cap the run and target ranges (smaller table; larger values then fall back
+        to the model). By default they extend past the model's highest borders, so
+        every whole-number state is answered from the table.
+    run_slack : int
+        How far past the target chasing scores are tabulated.
+    verify_samples : int
+        Random states (including ones beyond the grid edges) compared against the
+        model after the build.
+    seed : int
+        Seed for the verification sample.
+
+    Returns
+    -------
+    dict
+        Build report: entries, bytes, seconds, the maximum deviation from the model
+        over the grid ('max_abs_deviation') and over the verification sample
+        ('verify_max_abs_deviation', 'verify_coverage').
+    """
+    model = model if model is not None else _load_catboost_model()
+    start = time.perf_counter()
+    limits = _grid_limits(model, max_runs, max_target)
+
+    def tabulate(rows):
+        probabilities = model.predict_proba(rows.astype(np.float64))[:, 1]
+        quantized = np.round(probabilities * PROBABILITY_SCALE).astype(np.uint16)
+        deviation = np.max(np.abs(quantized / PROBABILITY_SCALE - probabilities)) if len(rows) else 0.0
+        return quantized, deviation
+
+    # Block 1: no target, over innings x ball x wickets x runs
+    innings, ball, wickets, runs = np.meshgrid(
+        np.arange(limits["innings"]["max"] + 1),
+        np.arange(limits["ball"]["max"] + 1),
+        np.arange(limits["wickets"]["max"] + 1),
+        np.arange(limits["runs"]["max"] + 1),
+        indexing="ij",
+    )
+    rows = np.column_stack([innings.ravel(), ball.ravel(), runs.ravel(), wickets.ravel(), np.full(innings.size, np.nan)])
+    blocks, max_deviation = [], 0.0
+    quantized, deviation = tabulate(rows)
+    blocks.append(quantized)
+    max_deviation = max(max_deviation, deviation)
+    no_target_size = len(quantized)
+
+    # Block 2: one ragged slice per target, evaluated in batches of ~1M rows
+    offsets, offset, pending = [], 0, []
+    for target in range(limits["total_chasing"]["max"] + 1):
+        target_rows = _target_block_rows(limits, target, run_slack)
+        offsets.append(offset)
+        offset += len(target_rows)
+        pending.append(target_rows)
+        if sum(len(p) for p in pending) >= 1_000_000 or target == limits["total_chasing"]["max"]:
+            quantized, deviation = tabulate(np.concatenate(pending))
+            blocks.append(quantized)
+            max_deviation = max(max_deviation, deviation)
+            pending = []
+
+    values = np.concatenate(blocks)
+    meta = {
+        "version": LOOKUP_TABLE_VERSION,
+        "features": FEATURE_COLUMNS,
+        "limits": limits,
+        "run_slack": run_slack,
+        "no_target_size": no_target_size,
+        "target_offsets": offsets,
+        "scale": PROBABILITY_SCALE,
+        "max_abs_deviation": float(max_deviation),
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    np.save(output_path + ".npy", values)
+    with open(output_path + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    report = {
+        "entries": int(len(values)),
+        "bytes": int(values.nbytes),
+        "seconds": round(time.perf_counter() - start, 1),
+        "max_abs_deviation": float(max_deviation),
+    }
+    report.update(verify_lookup_table(LookupTable.load(output_path), model, verify_samples, seed))
+    logger.info(f"Built lookup table {output_path}: {report}")
+    return report
+
+
+def verify_lookup_table(table: LookupTable, model, samples: int = 100_000, seed: int = 0) -> dict:
+    """
+    Compare table lookups with the model on random whole-number states, drawn to
+    also cover values beyond the table's edges (which are clamped or fall back).
+
+    Returns
+    -------
+    dict
+        'verify_max_abs_deviation' over the states found in the table, and
+        'verify_coverage', the share of states that were found.
+    """
+    if samples <= 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    limits = table.limits
+    innings = rng.integers(1, 3, samples)
+    target = rng.integers(0, limits["total_chasing"]["max"] + 40, samples).astype(float)
+    target[innings == 1] = np.nan
+    X = np.column_stack([
+        innings,
+        rng.integers(0, limits["ball"]["max"] + 5, samples),
+        rng.integers(0, limits["runs"]["max"] + 40, samples),
+        rng.integers(0, limits["wickets"]["max"] + 2, samples),
+        target,
+    ]).astype(float)
+
+    probabilities, found = table.lookup(X)
+    if not found.any():
+        return {"verify_max_abs_deviation": None, "verify_coverage": 0.0}
+    expected = model.predict_proba(X[found])[:, 1]
+    return {
+        "verify_max_abs_deviation": float(np.max(np.abs(probabilities[found] - expected))),
+        "verify_coverage": float(found.mean()),
+    }
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export the model's trees or build its lookup table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export model.cbm to a NumPy tree bundle (needs catboost).")
+    export.add_argument("--model", default=MODEL_PATH, help="CatBoost model file.")
+    export.add_argument("--output", default=TREE_BUNDLE_PATH, help="Output bundle (.npz).")
+
+    table = commands.add_parser("table", help="Build the win-probability lookup table.")
+    table.add_argument("--model", default=MODEL_PATH,
+                       help="CatBoost model file, or an exported tree bundle (.npz) to build without catboost.")
+    table.add_argument("--output", default=LOOKUP_TABLE_PATH,
+                       help="Output path prefix (writes .npy and .json).")
+    table.add_argument("--max-runs", type=int, default=None, help="Cap the tabulated run range.")
+    table.add_argument("--max-target", type=int, default=None, help="Cap the tabulated target range.")
+    table.add_argument("--verify-samples", type=int, default=100_000,
+                       help="Random states compared against the model after the build.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        report = export_tree_bundle(args.model, args.output)
+    else:
+        model = TreeEnsemble.load(args.model) if args.model.endswith(".npz") else _load_catboost_model(args.model)
+        report = build_lookup_table(
+            model,
+            args.output,
+            max_runs=args.max_runs,
+            max_target=args.max_target,
+            verify_samples=args.verify_samples,
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
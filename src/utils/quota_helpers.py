@@ -0,0 +1,286 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# CricAPI budget; the daily limit is updated from the 'hitsLimit' CricAPI reports
+CRICAPI_DAILY_LIMIT = int(os.environ.get("CRICAPI_DAILY_LIMIT", 100))
+CRICAPI_MINUTE_LIMIT = int(os.environ.get("CRICAPI_MINUTE_LIMIT", 10))
+
+# Oldest cached response (seconds) served in place of a refused call; older ones are
+# not passed off as current, and the call is denied instead
+CRICAPI_MAX_RESPONSE_AGE = float(os.environ.get("CRICAPI_MAX_RESPONSE_AGE", 900))
+
+
+class Priority(IntEnum):
+    """
+    Priority classes for CricAPI calls; lower values are more important.
+    """
+    RESULT = 0       # resolving the results of stored predictions
+    LAMBDA = 1       # scheduled Lambda predictions
+    PAGE_VIEW = 2    # user page views
+
+
+# Share of each budget (daily and per-minute) held back for more important classes:
+# a call is only admitted while more than this share of the budget remains.
+RESERVED_SHARE = {
+    Priority.RESULT: 0.0,
+    Priority.LAMBDA: 0.1,
+    Priority.PAGE_VIEW: 0.3,
+}
+
+_current_priority = contextvars.ContextVar("cricapi_priority", default=Priority.PAGE_VIEW)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """
+    Run the enclosed CricAPI calls with `priority`, e.g.:
+
+        with request_priority(Priority.RESULT):
+            get_match_results(api_key, match_ids)
+
+    The priority is held in a context variable, so it also applies to calls the
+    fan-out helpers make on their worker threads. Calls outside any block are page views.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """
+    Return the priority of CricAPI calls made from the current context.
+    """
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """
+    A token bucket holding up to `capacity` tokens, refilled continuously at
+    `refill_per_second`.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.clock = clock
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+
+    def available(self) -> float:
+        """
+        Return the number of tokens currently in the bucket.
+        """
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+        return self._tokens
+
+    def take(self, tokens: float = 1.0) -> None:
+        """
+        Remove `tokens` from the bucket (callers check `available` first).
+        """
+        self._tokens = self.available() - tokens
+
+
+class QuotaScheduler:
+    """
+    Admission control for CricAPI calls against a daily and a per-minute budget.
+
+    Every call has a `Priority`. A call is admitted while more than the class's
+    `RESERVED_SHARE` of both the daily budget and the minute bucket remains, so page
+    views stop spending hits well before the budget is gone, Lambda predictions a
+    little later, and result resolution only when nothing is left.
+
+    When a call is not admitted, the last successful response for the same request
+    is returned instead (a "saved" hit), provided it is at most `max_response_age`
+    seconds old; its age is logged. Otherwise the call is refused (a "denied" call)
+    and the caller sees its normal failure value, so the share reserved for more
+    important classes is never spent by less important ones.
+
+    Retries of an admitted call are further hits: `admit_retry` charges each one to
+    the same budget (see `JitteredRetry` in api_helpers).
+
+    CricAPI reports the account-wide 'hitsToday' and 'hitsLimit' in each response.
+    Passing its 'info' block to `observe` keeps the daily count in step with hits
+    made by other processes (the other web workers and the Lambda).
+    """
+
+    def __init__(
+        self,
+        daily_limit: int = CRICAPI_DAILY_LIMIT,
+        per_minute: int = CRICAPI_MINUTE_LIMIT,
+        max_cached_responses: int = 256,
+        max_response_age: float = CRICAPI_MAX_RESPONSE_AGE,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Parameters
+        ----------
+        daily_limit : int
+            CricAPI hits allowed per (UTC) day.
+        per_minute : int
+            Burst size of the per-minute bucket, refilled at `per_minute` hits per minute.
+        max_cached_responses : int
+            How many distinct requests keep their last response for fallback.
+        max_response_age : float
+            Oldest cached response, in seconds, served in place of a refused call.
+        clock : callable
+            Wall-clock time source, in seconds since the epoch.
+        """
+        self.daily_limit = daily_limit
+        self.clock = clock
+        self.minute_bucket = TokenBucket(per_minute, per_minute / 60.0, clock)
+        self.max_cached_responses = max_cached_responses
+        self.max_response_age = max_response_age
+
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._used_today = 0
+        self._responses = OrderedDict()
+        self._counters = {
+            name: {priority.name: 0 for priority in Priority}
+            for name in ("hits_used", "hits_saved", "hits_denied")
+        }
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock(), tz=timezone.utc).date().isoformat()
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._used_today = 0
+
+    def remaining_today(self) -> int:
+        """
+        Return the number of hits left in today's budget.
+        """
+        with self._lock:
+            self._roll_day()
+            return max(0, self.daily_limit - self._used_today)
+
+    def _admit(self, priority: Priority) -> bool:
+        """
+        Decide whether a call may spend a hit, and record it if so. Caller holds the lock.
+        """
+        self._roll_day()
+        reserve = RESERVED_SHARE[priority]
+        remaining_today = self.daily_limit - self._used_today
+        tokens = self.minute_bucket.available()
+
+        if remaining_today <= reserve * self.daily_limit or remaining_today < 1:
+            return False
+        if tokens <= reserve * self.minute_bucket.capacity or tokens < 1:
+            return False
+
+        self._used_today += 1
+        self.minute_bucket.take()
+        self._counters["hits_used"][priority.name] += 1
+        return True
+
+    def call(self, key: Hashable, fetch: Callable[[], Any], priority: Optional[Priority] = None) -> Any:
+        """
+        Run `fetch()` if the budget allows, otherwise answer from the cached response.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the request (without the API key), e.g. ("match_info", match_id).
+        fetch : callable
+            Performs the CricAPI request, returning the decoded JSON or None on failure.
+        priority : Priority or None
+            The call's priority; defaults to `current_priority()`.
+
+        Returns
+        -------
+        Any
+            The fetched or cached response, or None if the call was denied with
+            nothing cached.
+        """
+        priority = current_priority() if priority is None else priority
+
+        with self._lock:
+            admitted = self._admit(priority)
+            if not admitted:
+                fetched_at, cached = self._responses.get(key, (None, None))
+                age = None if cached is None else self.clock() - fetched_at
+                if cached is not None and age <= self.max_response_age:
+                    self._counters["hits_saved"][priority.name] += 1
+                else:
+                    self._counters["hits_denied"][priority.name] += 1
+
+        if not admitted:
+            if cached is not None and age <= self.max_response_age:
+                logger.info(f"CricAPI budget tight; answering {priority.name} request {key} "
+                            f"with the response from {age:.0f}s ago.")
+                return cached
+            logger.warning(f"CricAPI budget exhausted; refusing {priority.name} request {key}.")
+            return None
+
+        response = fetch()
+        if response is not None:
+            with self._lock:
+                self._responses[key] = (self.clock(), response)
+                self._responses.move_to_end(key)
+                while len(self._responses) > self.max_cached_responses:
+                    self._responses.popitem(last=False)
+        return response
+
+    def admit_retry(self, priority: Optional[Priority] = None) -> bool:
+        """
+        Charge a retry of an admitted call as another hit, if the budget allows.
+
+        Returns
+        -------
+        bool
+            True if the retry may go ahead; False if the budget refuses it.
+        """
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            admitted = self._admit(priority)
+            if not admitted:
+                self._counters["hits_denied"][priority.name] += 1
+        return admitted
+
+    def observe(self, info: Optional[dict]) -> None:
+        """
+        Sync the daily budget with the usage CricAPI reports in a response's 'info' block.
+        """
+        if not info:
+            return
+        with self._lock:
+            self._roll_day()
+            if "hitsToday" in info:
+                self._used_today = max(self._used_today, int(info["hitsToday"]))
+            if "hitsLimit" in info:
+                self.daily_limit = int(info["hitsLimit"])
+
+    def counters(self) -> dict:
+        """
+        Return a snapshot of the scheduler's counters: hits used, saved (served from
+        cache) and denied per priority, plus the remaining daily and minute budget.
+        """
+        with self._lock:
+            self._roll_day()
+            snapshot = {name: dict(values) for name, values in self._counters.items()}
+            snapshot["daily_limit"] = self.daily_limit
+            snapshot["remaining_today"] = max(0, self.daily_limit - self._used_today)
+            snapshot["minute_tokens"] = round(self.minute_bucket.available(), 2)
+        return snapshot
+
+
+# Process-wide scheduler used by src/utils/api_helpers.py
+quota_scheduler = QuotaScheduler()
@@ -0,0 +1,192 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class StageTimer:
+    """
+    Records how long each named stage of a request or invocation takes.
+
+    Typical use:
+        timer = StageTimer()
+        with timer.stage("load_model"):
+            model.load_model(model_path)
+        logger.info(f"Stage timings (ms): {timer.summary()}")
+
+    A stage entered more than once accumulates its time (stages running concurrently
+    in several threads add up their durations). Stages may be nested, e.g. a 'cricapi'
+    call timed inside a coarser 'predict' stage counts towards both, so the stages of
+    a timer can add up to more than its total; time a block under one name only.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stages = {}
+        self._started_at = clock()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the enclosed block as stage `name` (also when it raises).
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        Add `seconds` to stage `name`.
+        """
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        """
+        Seconds since the timer was created.
+        """
+        return self.clock() - self._started_at
+
+    def summary(self) -> dict:
+        """
+        Return {stage: milliseconds} in the order the stages first ran, plus 'total'.
+        """
+        with self._lock:
+            summary = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        summary["total"] = round(self.total() * 1000, 1)
+        return summary
+
+    def server_timing(self) -> str:
+        """
+        Format the summary as an HTTP Server-Timing header value, e.g.
+        'cricapi;dur=182.4, predict;dur=0.3, total;dur=190.2'.
+        """
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.summary().items())
+
+
+# Default histogram bucket upper bounds, in milliseconds
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistograms:
+    """
+    In-process latency histograms, one per name, with fixed millisecond buckets.
+
+    Each process (e.g. each gunicorn worker) keeps its own; they count every
+    observation since the process started or the last `reset`.
+    """
+
+    def __init__(self, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Record one duration for `name`.
+        """
+        ms = seconds * 1000
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = {
+                    "counts": [0] * (len(self.buckets_ms) + 1), "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                }
+            histogram["counts"][bisect.bisect_left(self.buckets_ms, ms)] += 1
+            histogram["count"] += 1
+            histogram["total_ms"] += ms
+            histogram["max_ms"] = max(histogram["max_ms"], ms)
+
+    def _quantile(self, counts: list, count: int, q: float, max_ms: float) -> float:
+        """
+        Upper bound of the bucket holding the q-quantile (the maximum for the last bucket).
+        """
+        rank, seen = q * count, 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else round(max_ms, 1)
+        return round(max_ms, 1)
+
+    def snapshot(self) -> dict:
+        """
+        Return {name: {"count", "mean_ms", "max_ms", "p50_ms", "p95_ms", "p99_ms",
+        "buckets"}}, where "buckets" lists [upper bound, cumulative count] pairs in
+        ascending order, ending with ["+Inf", count].
+        """
+        with self._lock:
+            histograms = {name: dict(h, counts=list(h["counts"])) for name, h in self._histograms.items()}
+
+        snapshot = {}
+        for name, h in sorted(histograms.items()):
+            cumulative, buckets = 0, []
+            for bound, bucket_count in zip(list(self.buckets_ms) + ["+Inf"], h["counts"]):
+                cumulative += bucket_count
+                buckets.append([bound, cumulative])
+            snapshot[name] = {
+                "count": h["count"],
+                "mean_ms": round(h["total_ms"] / h["count"], 2),
+                "max_ms": round(h["max_ms"], 2),
+                "p50_ms": self._quantile(h["counts"], h["count"], 0.50, h["max_ms"]),
+                "p95_ms": self._quantile(h["counts"], h["count"], 0.95, h["max_ms"]),
+                "p99_ms": self._quantile(h["counts"], h["count"], 0.99, h["max_ms"]),
+                "buckets": buckets,
+            }
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+# Process-wide histograms fed by `timed`, served by the web app's /metrics endpoint
+latency_histograms = LatencyHistograms()
+
+_current_timer = contextvars.ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def use_timer(timer: StageTimer):
+    """
+    Make `timer` collect the stages timed with `timed` in the enclosed block (and in
+    threads started from it with `asyncio.to_thread`, which copies the context).
+    """
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+def current_timer() -> Optional[StageTimer]:
+    """
+    Return the timer collecting stages in the current context, if any.
+    """
+    return _current_timer.get()
+
+
+@contextmanager
+def timed(name: str, histograms: Optional[LatencyHistograms] = None):
+    """
+    Time a stage, as a context manager or decorator:
+
+        @timed("cricapi")
+        def _request_json(endpoint, params): ...
+
+    The duration goes to the current timer (see `use_timer`), if any, and to the
+    process-wide latency histograms.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(name, seconds)
+        (histograms or latency_histograms).observe(name, seconds)
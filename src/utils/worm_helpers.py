@@ -0,0 +1,145 @@
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from src.utils.data_helpers import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def _to_float(value):
+    # DynamoDB returns numbers as Decimal and stores NaN as None
+    return np.nan if value is None else float(value)
+
+
+def state_from_item(item: dict) -> Optional[list]:
+    """
+    Return a stored prediction's match state as a row in FEATURE_COLUMNS order,
+    or None if the item lacks the innings or ball.
+    """
+    row = [_to_float(item.get(name)) for name in FEATURE_COLUMNS]
+    if math.isnan(row[0]) or math.isnan(row[1]):
+        return None
+    return row
+
+
+class _Worm:
+    """
+    One match's curve: its states keyed by (innings, ball), their probabilities, and
+    the newest 'predicted_at' read from the store.
+    """
+
+    def __init__(self):
+        self.states = {}
+        self.probabilities = {}
+        self.last_predicted_at = None
+
+
+class WormCache:
+    """
+    Per-match win-probability curves ("worms"): the chasing side's probability at
+    every match state observed so far.
+
+    States come from the predictions stored for the match plus its live state. A
+    match's states and their probabilities are kept between requests, so each
+    request only reads the predictions stored since the last one, and the states
+    that are new (or whose score changed) are scored together in one batched
+    `predict_proba` call.
+
+    CricAPI's match info only reports innings totals, so the curve has a point for
+    each state the Lambda or a page view captured, not necessarily every ball.
+    """
+
+    def __init__(self, model, max_matches: int = 64):
+        """
+        Parameters
+        ----------
+        model : object
+            Anything with a CatBoost-style `predict_proba` (see `load_predictor`).
+        max_matches : int
+            Maximum number of matches kept; the least recently used are evicted.
+        """
+        self.model = model
+        self.max_matches = max_matches
+        self._lock = threading.Lock()
+        self._worms = OrderedDict()
+
+    def since(self, match_id: str) -> Optional[str]:
+        """
+        Return the newest 'predicted_at' already merged for the match, or None.
+        """
+        with self._lock:
+            worm = self._worms.get(match_id)
+            return worm.last_predicted_at if worm else None
+
+    def extend(self, match_id: str, items: list, live_state: Optional[list] = None) -> list:
+        """
+        Merge newly stored predictions and the live state into the match's curve,
+        score the new states in one batch, and return the whole curve.
+
+        Parameters
+        ----------
+        match_id : str
+            The CricAPI match identifier.
+        items : list of dict
+            Prediction items stored since `since(match_id)`.
+        live_state : list or None
+            The current state, in FEATURE_COLUMNS order.
+
+        Returns
+        -------
+        list of dict
+            One point per state, ordered by innings then ball, with the features and
+            'probability' (the chasing side's win probability, as a percentage).
+        """
+        rows = []
+        for item in sorted(items, key=lambda item: item.get("predicted_at") or ""):
+            row = state_from_item(item)
+            if row is not None:
+                rows.append(row)
+        if live_state is not None:
+            rows.append([_to_float(value) for value in live_state])
+
+        # Later rows for the same ball replace earlier ones
+        latest = {(int(row[0]), int(row[1])): row for row in rows}
+
+        with self._lock:
+            worm = self._worms.pop(match_id, None) or _Worm()
+            self._worms[match_id] = worm
+            while len(self._worms) > self.max_matches:
+                self._worms.popitem(last=False)
+
+            # Only states not yet scored (or whose score changed) need the model
+            pending = {
+                key: row for key, row in latest.items()
+                if key not in worm.states or not np.array_equal(worm.states[key], row, equal_nan=True)
+            }
+
+        # Score outside the lock, so requests for other matches aren't held up
+        probabilities = []
+        if pending:
+            probabilities = self.model.predict_proba(np.array(list(pending.values()), dtype=float))[:, 1]
+            logger.info(f"Scored {len(pending)} new states for match {match_id}.")
+
+        with self._lock:
+            for (key, row), probability in zip(pending.items(), probabilities):
+                worm.states[key] = row
+                worm.probabilities[key] = round(float(probability) * 100, 2)
+
+            # Only advance past these items once their states are merged
+            predicted_at = [item["predicted_at"] for item in items if item.get("predicted_at")]
+            if predicted_at:
+                worm.last_predicted_at = max([worm.last_predicted_at or ""] + predicted_at)
+
+            return [self._point(worm.states[key], worm.probabilities[key]) for key in sorted(worm.states)]
+
+    @staticmethod
+    def _point(row: list, probability: float) -> dict:
+        point = {name: (None if math.isnan(value) else int(value)) for name, value in zip(FEATURE_COLUMNS, row)}
+        point["probability"] = probability
+        return point
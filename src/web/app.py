@@ -1,24 +1,31 @@
 import os
+import hmac
 import logging
+import time
+from functools import wraps
 
-import numpy as np
-from flask import Flask, render_template, request
-from catboost import CatBoostClassifier
+from flask import Flask, abort, g, jsonify, render_template, request
 import boto3
+from botocore.exceptions import ClientError
 
 from src.utils.api_helpers import (
     get_api_key,
     get_current_matches,
     get_match_info
 )
+from src.utils.cache_helpers import CoalescingCache, SharedCache
 from src.utils.data_helpers import (
+    build_feature_matrix,
     filter_mens_t20,
-    prepare_features,
     process_predictions,
     calculate_weekly_accuracy,
     prepare_chart_data
 )
 from src.utils.db_helpers import Predictions
+from src.utils.model_helpers import load_predictor
+from src.utils.quota_helpers import quota_scheduler
+from src.utils.timing import StageTimer, latency_histograms, timed, use_timer
+from src.utils.worm_helpers import WormCache
 
 app = Flask(__name__)
 
@@ -26,14 +33,51 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # -------------------------------------------------------------------
-#  Load the CatBoost model
+#  Per-request stage timings: stages timed with `timed` (Secrets Manager,
+#  CricAPI, feature prep, inference, rendering) are collected per request,
+#  returned in a Server-Timing header and added to the /metrics histograms
+# -------------------------------------------------------------------
+@app.before_request
+def start_request_timer():
+    g.timer = StageTimer()
+    g.timer_context = use_timer(g.timer)
+    g.timer_context.__enter__()
+
+
+@app.after_request
+def add_server_timing(response):
+    timer = g.get("timer")
+    if timer is not None:
+        response.headers["Server-Timing"] = timer.server_timing()
+        latency_histograms.observe(f"request.{request.endpoint}", timer.total())
+    return response
+
+
+@app.teardown_request
+def stop_request_timer(exc=None):
+    timer_context = g.pop("timer_context", None)
+    if timer_context is not None:
+        timer_context.__exit__(None, None, None)
+
+
+def render(template_name, **context):
+    """
+    Render a template, timed as the 'render' stage.
+    """
+    with timed("render"):
+        return render_template(template_name, **context)
+
+
+# -------------------------------------------------------------------
+#  Load the model: the precomputed lookup table if it has been built
+#  (falling back to the model for states outside it), else the model's
+#  trees evaluated with NumPy (src/model_trees.npz), so catboost isn't needed
 # -------------------------------------------------------------------
 current_dir = os.path.dirname(__file__) 
 parent_dir = os.path.dirname(current_dir)
 model_path = os.path.join(parent_dir, "model.cbm")
 
-model = CatBoostClassifier()
-model.load_model(model_path)
+model = load_predictor(model_path=model_path)
 
 # -------------------------------------------------------------------
 #  Initialize the DynamoDB resource and Predictions table helper
@@ -41,15 +85,119 @@ model.load_model(model_path)
 dynamodb_resource = boto3.resource("dynamodb", region_name="eu-north-1")
 predictions_table = Predictions(dynamodb_resource, "Predictions")
 
+# -------------------------------------------------------------------
+#  Cache of the in-progress men's T20 matches, shared by all workers
+# -------------------------------------------------------------------
+current_matches_cache = SharedCache(
+    ttl=float(os.environ.get("CURRENT_MATCHES_TTL", 30)),
+    max_stale=float(os.environ.get("CURRENT_MATCHES_MAX_STALE", 600)),
+)
+
+
+def load_current_matches():
+    """
+    Fetch the current matches from CricAPI and keep only men's T20 matches in progress.
+
+    A failed fetch raises (rather than returning an empty list), so the shared cache
+    keeps serving the last good list instead of storing "no matches".
+    """
+    api_key = get_api_key()
+    return filter_mens_t20(get_current_matches(api_key, raise_on_error=True))
+
+
+# -------------------------------------------------------------------
+#  Per-match prediction cache, shared by the threads of this worker
+# -------------------------------------------------------------------
+prediction_cache = CoalescingCache(ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 20)))
+
+
+def predict_match(match_id):
+    """
+    Fetch a match's info from CricAPI and predict the chasing team's win probability.
+
+    Parameters
+    ----------
+    match_id : str
+        The CricAPI match identifier.
+
+    Returns
+    -------
+    dict or None
+        {"match_info", "features", "probability" (a percentage), "score", "predicted_at"
+        (epoch seconds)}, or None if the match information could not be retrieved.
+    """
+    api_key = get_api_key()
+    match_info = get_match_info(api_key, match_id)
+    if not match_info:
+        return None
+
+    # Build the model input (one row, in FEATURE_COLUMNS order)
+    X, errors = build_feature_matrix([match_info])
+    if errors[0]:
+        raise ValueError(errors[0])
+
+    # Probability that the chasing team will win, in percentage form
+    with timed("predict"):
+        probability = model.predict_proba(X)[:, 1][0] * 100
+
+    return {
+        "match_info": match_info,
+        "features": X[0].tolist(),
+        "probability": round(probability, 2),
+        "score": match_info.get("data", {}).get("score", []),
+        "predicted_at": time.time(),
+    }
+
+
+def score_unchanged(match_id, prediction):
+    """
+    Check a cached prediction against the score in the cached current-matches list.
+
+    Returns False only when that list was stored after the prediction was made,
+    contains the match, and shows a different score. An older list can't tell us
+    the prediction is out of date (it may simply predate the latest ball), so then
+    the prediction's TTL alone decides.
+    """
+    entry = current_matches_cache.peek_entry("current_matches")
+    if entry is None:
+        return True
+    matches, stored_at = entry
+    if stored_at <= prediction["predicted_at"]:
+        return True
+    for match in matches or []:
+        if match.get("id") == match_id and "score" in match:
+            return match["score"] == prediction["score"]
+    return True
+
+
+def cached_prediction(match_id):
+    """
+    Return the match's prediction from the per-match cache, predicting it on a miss
+    or once the score has changed. Concurrent requests for the same match share a
+    single fetch and prediction.
+    """
+    return prediction_cache.get(
+        match_id,
+        lambda: predict_match(match_id),
+        validator=lambda cached: score_unchanged(match_id, cached),
+    )
+
+
+# -------------------------------------------------------------------
+#  Per-match win-probability curves, extended as new states arrive
+# -------------------------------------------------------------------
+worm_cache = WormCache(model)
+
+
 @app.route("/")
 def index():
     """
     Main endpoint for listing ongoing men's T20 matches.
     
-    1. Retrieves an API key from AWS Secrets Manager.
-    2. Fetches all current matches via CricAPI.
-    3. Filters only men's T20 matches that are in progress.
-    4. Renders an index page with a list of filtered matches or a message if none.
+    1. Reads the men's T20 matches in progress from the shared cache, which
+       (at most once per TTL across all workers) retrieves the API key, fetches all
+       current matches via CricAPI and filters them.
+    2. Renders an index page with a list of filtered matches or a message if none.
 
     Returns
     -------
@@ -57,23 +205,21 @@ def index():
         A rendered template 'index.html' containing match data or an error message.
     """
     try:
-        api_key = get_api_key()
-        matches = get_current_matches(api_key)
-        filtered_matches = filter_mens_t20(matches)
+        filtered_matches = current_matches_cache.get("current_matches", load_current_matches)
 
         # If no matches are in progress, display a friendly message on the page.
         message = None
         if not filtered_matches:
             message = "There are currently no men's T20 matches in progress."
 
-        return render_template(
+        return render(
             "index.html",
             matches=filtered_matches,
             message=message
         )
     except Exception as exc:
         logger.error(f"Error accessing matches: {exc}", exc_info=True)
-        return render_template(
+        return render(
             "index.html",
             matches=[],
             message="Unable to fetch match data. Please try again later."
@@ -86,10 +232,10 @@ def predict():
     Handle the 'Predict' action triggered by a form submission.
 
     1. Retrieve the match_id from the POST form data.
-    2. Use the API key to fetch detailed match information from CricAPI.
-    3. Prepare feature vectors using local data_helpers.
-    4. Make a prediction (probability of the chasing team winning).
-    5. Render a results page with the prediction outcome.
+    2. Look the match up in the per-match prediction cache; on a miss (or once the
+       score has changed), `predict_match` fetches the match info and predicts.
+       Concurrent requests for the same match share a single fetch and prediction.
+    3. Render a results page with the prediction outcome.
 
     Returns
     -------
@@ -99,38 +245,61 @@ def predict():
     """
     match_id = request.form.get("match_id")
     if not match_id:
-        return render_template("error.html", message="No match selected.")
-
-    api_key = get_api_key()
-    data = get_match_info(api_key, match_id)
-    if data is None:
-        return render_template("error.html", message="Failed to retrieve match data.")
-
-    match_info = data
-    if not match_info:
-        return render_template("error.html", message="No match information available.")
-
-    # Prepare the feature vector for the model
-    feature_vector = prepare_features(match_info)
-    feature_names = ["innings", "ball", "runs", "wickets", "total_chasing"]
-    X = [feature_vector.get(f, np.nan) for f in feature_names]
-    X = np.array(X).reshape(1, -1)
+        return render("error.html", message="No match selected.")
 
     try:
-        # Probability that the chasing team will win, in percentage form
-        probability = model.predict_proba(X)[:, 1][0] * 100
-        probability = round(probability, 2)
+        prediction = cached_prediction(match_id)
     except Exception as exc:
         logger.error(f"Error making prediction: {exc}", exc_info=True)
-        return render_template("error.html", message=f"Error making prediction: {str(exc)}")
+        return render("error.html", message=f"Error making prediction: {str(exc)}")
+
+    if prediction is None:
+        return render("error.html", message="Failed to retrieve match data.")
 
-    return render_template(
+    return render(
         "result.html",
-        match_info=match_info,
-        probability=probability
+        match_info=prediction["match_info"],
+        probability=prediction["probability"]
     )
 
 
+@app.route("/worm/<match_id>")
+def worm(match_id):
+    """
+    Return the match's win-probability curve (the "worm") as JSON.
+
+    1. Read the predictions stored for the match since the last request for it.
+    2. Add the live state if a current prediction for the match is already in the
+       per-match prediction cache. The curve never calls CricAPI itself, so polling
+       it spends none of the CricAPI budget.
+    3. Score all states not seen before in one batch and return every point,
+       ordered by innings and ball.
+
+    Returns
+    -------
+    flask.Response
+        {"match_id": ..., "points": [{"innings", "ball", "runs", "wickets",
+        "total_chasing", "probability"}, ...]}, or an error with status 500.
+    """
+    try:
+        try:
+            items = predictions_table.fetch_match_predictions(match_id, since=worm_cache.since(match_id))
+        except ClientError as exc:
+            # E.g. the match index is missing or still backfilling: show the live state only
+            logger.warning(f"Couldn't read the stored predictions of match {match_id}: {exc}")
+            items = []
+        prediction = prediction_cache.peek(match_id)
+        if prediction is not None and not score_unchanged(match_id, prediction):
+            prediction = None
+        live_state = prediction["features"] if prediction else None
+        points = worm_cache.extend(match_id, items, live_state)
+    except Exception as exc:
+        logger.error(f"Error building win-probability curve: {exc}", exc_info=True)
+        return jsonify({"error": "Unable to build the win-probability curve."}), 500
+
+    return jsonify({"match_id": match_id, "points": points})
+
+
 @app.route("/track_model_performance")
 def track_model_performance():
     """
@@ -166,7 +335,7 @@ def track_model_performance():
     total_predictions = len(processed_data)
     overall_accuracy = (total_correct / total_predictions) * 100 if total_predictions > 0 else 0
 
-    return render_template(
+    return render(
         "track_model_performance.html",
         weeks=weeks,
         accuracies=accuracies,
@@ -174,5 +343,48 @@ def track_model_performance():
     )
 
 
+# -------------------------------------------------------------------
+#  Operational endpoints (/metrics, /quota): off unless OPS_TOKEN is set,
+#  then only answered for requests carrying "Authorization: Bearer <OPS_TOKEN>"
+# -------------------------------------------------------------------
+OPS_TOKEN = os.environ.get("OPS_TOKEN")
+
+
+def ops_only(view):
+    """
+    Restrict a view to holders of OPS_TOKEN; without one configured it is not found.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not OPS_TOKEN:
+            abort(404)
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {OPS_TOKEN}".encode()):
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/metrics")
+@ops_only
+def metrics():
+    """
+    Report this worker's latency histograms as JSON: per-stage timings (e.g.
+    'cricapi', 'secrets_manager', 'feature_prep', 'predict', 'render') and whole
+    requests per endpoint ('request.<endpoint>'), in milliseconds.
+    """
+    return jsonify({"pid": os.getpid(), "latency": latency_histograms.snapshot()})
+
+
+@app.route("/quota")
+@ops_only
+def quota():
+    """
+    Report this worker's CricAPI quota counters (hits used, saved by answering from
+    cache and denied, per priority) and the remaining budget, as JSON.
+    """
+    return jsonify(quota_scheduler.counters())
+
+
 if __name__ == "__main__":
     app.run(debug=False)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+
+from benchmarks.synthetic import write_synthetic_corpus
+from model_training.aggregate import (
+    STATE_FEATURES,
+    aggregate_states,
+    compare_with_raw,
+    to_weighted_training_set,
+)
+from model_training.preprocess_data import read_and_process_data
+
+
+def test_aggregate_states_preserves_counts():
+    """
+    Aggregation drops ties, gives one row per distinct state, and its weights and win
+    counts add back up to the raw rows.
+    """
+    df = read_and_process_data("tests/test_data")
+    decided_df = df[df["chasing_team_won"].notna()]
+    aggregated_df = aggregate_states(df)
+
+    assert len(aggregated_df) < len(decided_df)
+    assert not aggregated_df.duplicated(STATE_FEATURES).any()
+    assert aggregated_df["weight"].sum() == len(decided_df)
+    assert aggregated_df["wins"].sum() == decided_df["chasing_team_won"].astype(int).sum()
+    assert (aggregated_df["wins"] <= aggregated_df["weight"]).all()
+
+    # First-innings states (no chasing total) are kept
+    assert aggregated_df["total_chasing"].isna().any()
+
+
+def test_weighted_training_set_matches_raw_labels():
+    """
+    Expanding aggregated states gives weighted labels that sum to the raw label counts.
+    """
+    df = read_and_process_data("tests/test_data")
+    X, y, w = to_weighted_training_set(aggregate_states(df))
+
+    decided = df["chasing_team_won"].dropna().astype(int)
+    assert list(X.columns) == STATE_FEATURES
+    assert len(X) == len(y) == len(w)
+    assert (w > 0).all()
+    assert w[y == 1].sum() == decided.sum()
+    assert w[y == 0].sum() == len(decided) - decided.sum()
+
+
+def test_compare_with_raw(tmp_path, monkeypatch):
+    """
+    The comparison trains both models and reports the accuracy change on held-out matches.
+    """
+    folder = str(tmp_path / "synthetic_data")
+    write_synthetic_corpus(folder, 30, seed=3)
+    df = read_and_process_data(folder)
+
+    monkeypatch.chdir(tmp_path)
+    results = compare_with_raw(df, iterations=20)
+    assert not (tmp_path / "catboost_info").exists()
+
+    assert results["aggregated"]["train_rows"] < results["raw"]["train_rows"]
+    for name in ("raw", "aggregated"):
+        assert 0.0 <= results[name]["accuracy"] <= 1.0
+        assert np.isfinite(results[name]["log_loss"])
+    assert results["accuracy_change"] == results["aggregated"]["accuracy"] - results["raw"]["accuracy"]
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.utils import api_helpers
+from src.utils.api_helpers import (
+    MatchSnapshots,
+    SecretCache,
+    create_cricapi_session,
+    get_cricapi_session,
+    get_current_matches,
+    get_match_info,
+    get_match_info_many,
+    get_match_results,
+)
+from src.utils.quota_helpers import Priority, QuotaScheduler, current_priority, request_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_secret_cache_serves_until_expiry():
+    """
+    A cached secret is reused until its TTL runs out, then fetched again.
+    """
+    calls = []
+    clock = FakeClock()
+    cache = SecretCache(lambda name: calls.append(name) or f"value-{len(calls)}",
+                        ttl=100, refresh_ahead=0, clock=clock)
+
+    assert cache.get("key") == "value-1"
+    clock.now = 99
+    assert cache.get("key") == "value-1"
+    clock.now = 100
+    assert cache.get("key") == "value-2"
+    assert calls == ["key", "key"]
+
+
+def test_secret_cache_falls_back_to_last_value():
+    """
+    A failed refresh keeps serving the last known value; with no value it raises.
+    """
+    clock = FakeClock()
+    values = iter(["first"])
+
+    def fetch(name):
+        try:
+            return next(values)
+        except StopIteration:
+            raise RuntimeError("Secrets Manager unavailable")
+
+    cache = SecretCache(fetch, ttl=10, refresh_ahead=0, clock=clock)
+    assert cache.get("key") == "first"
+    clock.now = 50
+    assert cache.get("key") == "first"
+
+    with pytest.raises(RuntimeError):
+        cache.get("other")
+
+
+def test_secret_cache_single_flight():
+    """
+    Concurrent misses for the same secret trigger only one fetch.
+    """
+    calls = []
+
+    def fetch(name):
+        calls.append(name)
+        time.sleep(0.05)
+        return "value"
+
+    cache = SecretCache(fetch, ttl=100)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("key"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_secret_cache_refreshes_ahead_of_expiry():
+    """
+    Close to expiry the current value is returned and a refresh runs in the background.
+    """
+    clock = FakeClock()
+    refreshed = threading.Event()
+    values = iter(["old", "new"])
+
+    def fetch(name):
+        value = next(values)
+        if value == "new":
+            refreshed.set()
+        return value
+
+    cache = SecretCache(fetch, ttl=100, refresh_ahead=20, clock=clock)
+    assert cache.get("key") == "old"
+
+    clock.now = 90
+    assert cache.get("key") == "old"
+    assert refreshed.wait(timeout=2)
+
+    # Wait for the background thread to store the new value
+    deadline = time.monotonic() + 2
+    while cache.get("key") != "new" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("key") == "new"
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answers 503 to the first request and 200 with a JSON body afterwards.
+    """
+    requests_seen = 0
+
+    def do_GET(self):
+        type(self).requests_seen += 1
+        status = 503 if type(self).requests_seen == 1 else 200
+        body = json.dumps({"status": "success", "data": [{"id": "m1"}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_flaky(monkeypatch, daily_limit):
+    monkeypatch.setattr(FlakyHandler, "requests_seen", 0)
+    scheduler = QuotaScheduler(daily_limit=daily_limit, per_minute=100)
+    monkeypatch.setattr(api_helpers, "quota_scheduler", scheduler)
+    server = HTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api_helpers, "CRICAPI_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(api_helpers, "_sessions", {os.getpid(): create_cricapi_session(backoff_factor=0)})
+    return server, scheduler
+
+
+def test_cricapi_session_retries_server_errors(monkeypatch):
+    """
+    The pooled session retries a 503 and the helper returns the successful response;
+    the retry is charged to the CricAPI budget like the first attempt.
+    """
+    server, scheduler = serve_flaky(monkeypatch, daily_limit=100)
+    try:
+        assert get_current_matches("key") == [{"id": "m1"}]
+        assert FlakyHandler.requests_seen == 2
+        assert scheduler.counters()["hits_used"]["PAGE_VIEW"] == 2
+    finally:
+        server.shutdown()
+
+
+def test_cricapi_retries_stop_when_the_budget_refuses_them(monkeypatch):
+    """
+    With one hit left in the budget, the 503 is not retried and the call fails.
+    """
+    server, scheduler = serve_flaky(monkeypatch, daily_limit=1)
+    try:
+        with request_priority(Priority.RESULT):
+            assert get_current_matches("key") == []
+        assert FlakyHandler.requests_seen == 1
+        counters = scheduler.counters()
+        assert counters["hits_used"]["RESULT"] == 1
+        assert counters["hits_denied"]["RESULT"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_cricapi_get_handles_connection_errors(monkeypatch):
+    """
+    A request that cannot connect is logged and reported as a failed fetch.
+    """
+    monkeypatch.setattr(api_helpers, "CRICAPI_BASE_URL", "http://127.0.0.1:1")
+    monkeypatch.setattr(api_helpers, "_sessions", {os.getpid(): create_cricapi_session(retries=0)})
+
+    assert get_current_matches("key") == []
+    assert get_match_info("key", "m1") is None
+    assert get_cricapi_session() is get_cricapi_session()
+
+
+def test_match_results_fan_out_in_order_with_bounded_concurrency(monkeypatch):
+    """
+    Results come back in input order, at most `concurrency` requests run at once, and
+    a failing match is reported as (None, None) without losing the others.
+    """
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fake_get_match_result(api_key, match_id):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02 * (len(match_id) % 3))
+        with lock:
+            state["running"] -= 1
+        if match_id == "bad":
+            raise ValueError("unexpected payload")
+        return f"{match_id} won", 1
+
+    monkeypatch.setattr(api_helpers, "get_match_result", fake_get_match_result)
+
+    match_ids = ["m1", "match-2", "bad", "m-4", "m5", "match-6"]
+    results = get_match_results("key", match_ids, concurrency=2)
+
+    assert results == [(f"{match_id} won", 1) for match_id in match_ids[:2]] + [(None, None)] + [
+        (f"{match_id} won", 1) for match_id in match_ids[3:]
+    ]
+    assert state["peak"] <= 2
+
+
+def test_match_snapshots_fetch_each_match_once(monkeypatch):
+    """
+    The per-run memo fetches each match once, whether asked singly or in a batch,
+    and remembers failed fetches as None.
+    """
+    calls = []
+
+    def fake_get_match_info(api_key, match_id):
+        calls.append(match_id)
+        if match_id == "missing":
+            return None
+        return {"status": "success", "data": {"id": match_id, "status": "live", "teams": [], "score": []}}
+
+    monkeypatch.setattr(api_helpers, "get_match_info", fake_get_match_info)
+
+    snapshots = MatchSnapshots("key")
+    batch = snapshots.get_many(["m1", "m2", "m1", "missing"])
+    assert [snapshot.match_id if snapshot else None for snapshot in batch] == ["m1", "m2", "m1", None]
+
+    assert snapshots.get("m2") is batch[1]
+    assert snapshots.get("missing") is None
+    assert snapshots.get("m3").match_id == "m3"
+    assert sorted(calls) == ["m1", "m2", "m3", "missing"]
+
+
+def test_async_fan_out_is_not_capped_by_the_default_executor(monkeypatch):
+    """
+    All `concurrency` requests run at once, even beyond the default executor's size.
+    """
+    concurrency = 40
+    barrier = threading.Barrier(concurrency, timeout=5)
+
+    def fake_get_match_info(api_key, match_id):
+        barrier.wait()
+        return {"id": match_id}
+
+    monkeypatch.setattr(api_helpers, "get_match_info", fake_get_match_info)
+
+    match_ids = [f"m{n}" for n in range(concurrency)]
+    infos = asyncio.run(get_match_info_many("key", match_ids, concurrency=concurrency))
+    assert infos == [{"id": match_id} for match_id in match_ids]
+
+
+def test_match_snapshots_get_many_inside_a_running_loop(monkeypatch):
+    """
+    The blocking batch fetch works from a coroutine, and keeps the caller's priority.
+    """
+    priorities = []
+
+    def fake_get_match_info(api_key, match_id):
+        priorities.append(current_priority())
+        return {"status": "success", "data": {"id": match_id, "status": "live", "teams": [], "score": []}}
+
+    monkeypatch.setattr(api_helpers, "get_match_info", fake_get_match_info)
+
+    async def run():
+        with request_priority(Priority.RESULT):
+            return MatchSnapshots("key").get_many(["m1", "m2"])
+
+    assert [snapshot.match_id for snapshot in asyncio.run(run())] == ["m1", "m2"]
+    assert priorities == [Priority.RESULT, Priority.RESULT]
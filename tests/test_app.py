@@ -0,0 +1,111 @@
+import importlib
+import threading
+
+import boto3
+import pytest
+
+from src.utils import api_helpers
+from src.utils.api_helpers import CricAPIError
+from src.utils.cache_helpers import SharedCache
+from tests.test_db_helpers import FakeResource, FakeTable
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    """
+    The web app module, imported with a fake DynamoDB resource.
+    """
+    patch = pytest.MonkeyPatch()
+    patch.setattr(boto3, "resource", lambda *args, **kwargs: FakeResource(FakeTable()))
+    try:
+        yield importlib.import_module("src.web.app")
+    finally:
+        patch.undo()
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_score_unchanged_only_trusts_lists_newer_than_the_prediction(app_module, monkeypatch, tmp_path):
+    clock = FakeClock()
+    cache = SharedCache(str(tmp_path), clock=clock)
+    monkeypatch.setattr(app_module, "current_matches_cache", cache)
+    old_score = [{"r": 50, "w": 1, "o": 6.2}]
+    new_score = [{"r": 54, "w": 1, "o": 6.4}]
+
+    # The list was loaded before the prediction: its older score says nothing
+    cache.get("current_matches", lambda: [{"id": "m1", "score": old_score}])
+    prediction = {"score": new_score, "predicted_at": clock.now + 5}
+    assert app_module.score_unchanged("m1", prediction)
+
+    # A list loaded after the prediction with a different score invalidates it
+    clock.now += 60
+    cache.invalidate("current_matches")
+    cache.get("current_matches", lambda: [{"id": "m1", "score": [{"r": 60, "w": 2, "o": 7.1}]}])
+    assert not app_module.score_unchanged("m1", prediction)
+    assert app_module.score_unchanged("m2", prediction)
+
+
+def test_load_current_matches_failure_keeps_the_last_good_list(app_module, monkeypatch, tmp_path):
+    clock = FakeClock()
+    cache = SharedCache(str(tmp_path), ttl=30, max_stale=600, clock=clock)
+    monkeypatch.setattr(app_module, "get_api_key", lambda: "key")
+    monkeypatch.setattr(api_helpers, "_cricapi_get", lambda endpoint, params: None)
+
+    # With nothing cached, the failure reaches the caller instead of caching []
+    with pytest.raises(CricAPIError):
+        cache.get("current_matches", app_module.load_current_matches)
+    assert cache.peek("current_matches") is None
+
+    # Once a good list is cached, a failed refresh keeps serving it
+    matches = [{"id": "m1", "matchType": "t20", "name": "A vs B", "matchStarted": True, "matchEnded": False}]
+    cache.get("current_matches", lambda: matches)
+    clock.now += 60
+    assert cache.get("current_matches", app_module.load_current_matches) == matches
+    for thread in threading.enumerate():
+        if thread.name == "cache-refresh-current_matches":
+            thread.join()
+    assert cache.peek("current_matches") == matches
+
+
+
+def test_worm_never_calls_cricapi(app_module, monkeypatch):
+    """
+    The curve is built from stored predictions plus a live prediction only if one is
+    already cached; it never fetches the match from CricAPI.
+    """
+    def no_cricapi(*args, **kwargs):
+        raise AssertionError("/worm called CricAPI")
+
+    monkeypatch.setattr(app_module, "get_match_info", no_cricapi)
+    monkeypatch.setattr(app_module.predictions_table, "fetch_match_predictions", lambda match_id, since=None: [])
+    client = app_module.app.test_client()
+
+    assert client.get("/worm/m1").get_json() == {"match_id": "m1", "points": []}
+
+    live = {"features": [2, 60, 80, 3, 170], "score": [], "predicted_at": 0.0}
+    app_module.prediction_cache.get("m1", lambda: live)
+    points = client.get("/worm/m1").get_json()["points"]
+    assert [(point["innings"], point["ball"], point["runs"]) for point in points] == [(2, 60, 80)]
+
+
+def test_ops_endpoints_need_the_token(app_module, monkeypatch):
+    """
+    /metrics and /quota are off without OPS_TOKEN, and then need it as a bearer token.
+    """
+    client = app_module.app.test_client()
+    monkeypatch.setattr(app_module, "OPS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/quota", headers={"Authorization": "Bearer "}).status_code == 404
+
+    monkeypatch.setattr(app_module, "OPS_TOKEN", "s3cret")
+    for path in ("/metrics", "/quota"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    assert "pid" in client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).get_json()
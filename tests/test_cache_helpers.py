@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils.cache_helpers import CoalescingCache, SharedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_shared_cache_fresh_and_stale_while_revalidate(tmp_path):
+    """
+    Fresh values are served as-is; a stale value is served immediately while it is
+    reloaded in the background.
+    """
+    clock = FakeClock()
+    cache = SharedCache(str(tmp_path), ttl=30, max_stale=600, clock=clock)
+    reloaded = threading.Event()
+    values = iter(["first", "second"])
+
+    def loader():
+        value = next(values)
+        if value == "second":
+            reloaded.set()
+        return value
+
+    assert cache.get("matches", loader) == "first"
+    clock.now += 10
+    assert cache.get("matches", loader) == "first"
+
+    clock.now += 30
+    assert cache.get("matches", loader) == "first"
+    assert reloaded.wait(timeout=2)
+
+    deadline = time.monotonic() + 2
+    while cache.get("matches", lambda: "unused") != "second" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("matches", lambda: "unused") == "second"
+
+
+def test_shared_cache_missing_value_raises_and_stale_survives_failures(tmp_path):
+    """
+    A failing loader raises when nothing is cached, but not when a stale value exists.
+    """
+    clock = FakeClock()
+    cache = SharedCache(str(tmp_path), ttl=30, max_stale=600, clock=clock)
+
+    def failing_loader():
+        raise RuntimeError("CricAPI unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get("matches", failing_loader)
+
+    assert cache.get("matches", lambda: ["m1"]) == ["m1"]
+    clock.now += 60
+    assert cache.get("matches", failing_loader) == ["m1"]
+
+
+def _slow_loader(count_path):
+    with open(count_path, "a") as f:
+        f.write("x")
+    time.sleep(0.2)
+    return ["m1", "m2"]
+
+
+def _get_from_worker(cache_dir, count_path):
+    cache = SharedCache(cache_dir, ttl=30)
+    return cache.get("matches", lambda: _slow_loader(count_path))
+
+
+def test_shared_cache_is_loaded_once_across_processes(tmp_path):
+    """
+    Concurrent workers missing the same key wait for a single load.
+    """
+    cache_dir = str(tmp_path / "cache")
+    count_path = str(tmp_path / "loads.txt")
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        results = pool.starmap(_get_from_worker, [(cache_dir, count_path)] * 4)
+
+    assert results == [["m1", "m2"]] * 4
+    with open(count_path) as f:
+        assert f.read() == "x"
+    assert os.path.exists(os.path.join(cache_dir, "matches.json"))
+
+
+def test_coalescing_cache_single_upstream_call():
+    """
+    Concurrent misses for one key share a single load; other keys load separately.
+    """
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return {"match": key}
+
+    cache = CoalescingCache(ttl=60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda key=key: results.append(cache.get(key, lambda: loader(key))))
+        for key in ["final"] * 8 + ["semi"] * 2
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ["final", "semi"]
+    assert results.count({"match": "final"}) == 8
+
+
+def test_coalescing_cache_expiry_validation_and_failures():
+    """
+    Entries expire after the TTL (also for `peek`) or when the validator rejects them;
+    None results and exceptions are not cached.
+    """
+    clock = FakeClock()
+    cache = CoalescingCache(ttl=20, clock=clock)
+    loads = iter([1, 2, 3])
+
+    assert cache.get("m1", lambda: next(loads)) == 1
+    assert cache.get("m1", lambda: next(loads)) == 1
+    assert cache.peek("m1") == 1
+    clock.now += 20
+    assert cache.peek("m1") is None
+    assert cache.get("m1", lambda: next(loads)) == 2
+    assert cache.get("m1", lambda: next(loads), validator=lambda value: value != 2) == 3
+
+    assert cache.get("m2", lambda: None) is None
+    assert cache.get("m2", lambda: "loaded") == "loaded"
+
+    def failing_loader():
+        raise RuntimeError("CricAPI unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get("m3", failing_loader)
+    assert cache.get("m3", lambda: "recovered") == "recovered"
+
+
+def test_coalescing_cache_validates_without_the_lock():
+    """
+    A slow validator (e.g. one reading a file) doesn't hold up lookups of other keys.
+    """
+    cache = CoalescingCache(ttl=20, clock=FakeClock())
+    cache.get("m1", lambda: 1)
+    cache.get("m2", lambda: 2)
+
+    def validator(value):
+        # Another thread's lookup of "m2" would block here if the lock were held
+        looked_up = []
+        thread = threading.Thread(target=lambda: looked_up.append(cache.get("m2", lambda: None)))
+        thread.start()
+        thread.join(timeout=5)
+        return looked_up == [2]
+
+    assert cache.get("m1", lambda: "reloaded", validator=validator) == 1
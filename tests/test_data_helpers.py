@@ -0,0 +1,185 @@
+import math
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from model_training.preprocess_data import add_derived_features, process_json, process_match_data
+from src.utils.data_helpers import (
+    FEATURE_COLUMNS,
+    MatchSnapshot,
+    build_feature_matrix,
+    history_from_predictions,
+    momentum_from_history,
+    prepare_features,
+)
+
+
+def match_response(status, score, teams=("Perth Scorchers", "Brisbane Heat")):
+    return {
+        "status": "success",
+        "data": {"id": "abc", "status": status, "teams": list(teams), "score": score},
+    }
+
+
+FINISHED_SCORE = [
+    {"r": 165, "w": 6, "o": 20, "inning": "Perth Scorchers Inning 1"},
+    {"r": 150, "w": 9, "o": 20, "inning": "Brisbane Heat Inning 1"},
+]
+
+
+def test_match_snapshot_result_and_features():
+    """
+    One snapshot gives the features, batting order and result of a match.
+    """
+    snapshot = MatchSnapshot(match_response("Perth Scorchers won by 15 runs", FINISHED_SCORE))
+
+    assert snapshot.match_id == "abc"
+    assert snapshot.is_finished
+    assert snapshot.batting_order == ("Perth Scorchers", "Brisbane Heat")
+    assert snapshot.result() == ("Perth Scorchers won by 15 runs", 0)
+    assert snapshot.fingerprint == "2:150/9@20"
+
+    features = snapshot.features
+    assert features["innings"] == 2
+    assert features["runs"] == 150
+    assert features["total_chasing"] == 165
+    assert features["team_batting_second"] == "Brisbane Heat"
+    assert snapshot.features is features
+
+
+def test_match_snapshot_ongoing_and_incomplete():
+    live_score = [{"r": 80, "w": 2, "o": 9.3, "inning": "Perth Scorchers Inning 1"}]
+    snapshot = MatchSnapshot(match_response("Perth Scorchers opt to bat", live_score))
+    assert not snapshot.is_finished
+    assert snapshot.result() == (None, None)
+    assert math.isnan(snapshot.features["total_chasing"])
+
+    assert MatchSnapshot({"data": {}}, "xyz").result() == (None, None)
+    assert MatchSnapshot({"data": {}}, "xyz").match_id == "xyz"
+
+
+def test_build_feature_matrix_matches_prepare_features():
+    """
+    Each parsed match gives the same row as prepare_features, in FEATURE_COLUMNS
+    order; unparseable matches give a NaN row and an error message.
+    """
+    live = match_response("live", [{"r": 80, "w": 2, "o": 9.3, "inning": "Perth Scorchers Inning 1"}])
+    finished = match_response("Perth Scorchers won by 15 runs", FINISHED_SCORE)
+    unknown_team = match_response("live", [{"r": 10, "w": 0, "o": 1, "inning": "Sydney Sixers Inning 1"}])
+
+    X, errors = build_feature_matrix([live, unknown_team, finished])
+
+    assert X.shape == (3, len(FEATURE_COLUMNS))
+    assert errors[0] is None and errors[2] is None
+    assert "Sydney Sixers" in errors[1]
+    assert np.isnan(X[1]).all()
+    for row, match_info in ((0, live), (2, finished)):
+        features = prepare_features(match_info)
+        np.testing.assert_array_equal(X[row], [features[name] for name in FEATURE_COLUMNS])
+    assert math.isnan(X[0, FEATURE_COLUMNS.index("total_chasing")])
+
+
+def stored_state(predicted_at, innings, ball, runs, wickets):
+    return {"predicted_at": predicted_at, "innings": Decimal(innings), "ball": Decimal(ball),
+            "runs": Decimal(runs), "wickets": Decimal(wickets)}
+
+
+def test_match_snapshot_momentum_uses_stored_history():
+    """
+    The live momentum features are exact where the state k balls back was stored,
+    and interpolated between the nearest stored states (or the innings start and the
+    current state) otherwise, so they are never NaN.
+    """
+    live_score = [{"r": 80, "w": 2, "o": 9.3, "inning": "Perth Scorchers Inning 1"}]  # ball 57
+    snapshot = MatchSnapshot(match_response("live", live_score))
+    # No history: a straight line from 0/0 at ball 0 to 80/2 at ball 57
+    assert snapshot.features["runs_last_6"] == pytest.approx(80 * 6 / 57)
+
+    history = history_from_predictions([
+        stored_state("2025-01-01T10:09:00", 1, 51, 72, 2),
+        stored_state("2025-01-01T10:08:00", 1, 51, 70, 2),  # older, replaced
+        stored_state("2025-01-01T10:07:00", 1, 45, 60, 1),
+        stored_state("2025-01-01T10:01:00", 2, 28, 30, 0),  # another innings
+        {"predicted_at": "2025-01-01T10:00:00", "innings": Decimal(1)},
+    ], innings=snapshot.innings)
+    assert history == {51: (72, 2), 45: (60, 1)}
+
+    snapshot.set_history(history)
+    features = snapshot.features
+    assert (features["runs_last_6"], features["wickets_last_6"]) == (8, 0)
+    assert (features["runs_last_12"], features["wickets_last_12"]) == (20, 1)
+    # Ball 27 lies between the innings start and the state stored at ball 45
+    assert features["runs_last_30"] == pytest.approx(80 - 60 * 27 / 45)
+    assert features["wickets_last_30"] == pytest.approx(2 - 27 / 45)
+
+
+def test_sparse_history_momentum_tracks_the_training_values():
+    """
+    With states stored only every 12 balls (roughly one Lambda run every two overs),
+    no live momentum feature is NaN, and the interpolated values stay close to the
+    training values computed from every ball.
+    """
+    result_df = add_derived_features(process_json("tests/test_data", "222678.json"))
+    innings_df = result_df[result_df["innings"] == 1]
+    states = {row["ball"]: (row["runs"], row["wickets"]) for _, row in innings_df.iterrows()}
+
+    errors = []
+    for ball in range(31, max(states) + 1):
+        history = {past: state for past, state in states.items() if past % 12 == 0 and past < ball}
+        live = momentum_from_history(ball, *states[ball], history)
+        row = innings_df[innings_df["ball"] == ball].iloc[0]
+        for name, value in live.items():
+            assert not math.isnan(value), name
+            errors.append(abs(value - row[name]))
+
+    assert np.mean(errors) < 2
+
+
+# A CricAPI /match_info response for a chase in progress (12.4 overs = 76 legal balls)
+CRICAPI_LIVE_MATCH_INFO = {
+    "apikey": "xxxx",
+    "data": {
+        "id": "4ac7e5a6-52c4-4bb5-a1e0-1f0e2f1c4b2a",
+        "name": "Perth Scorchers vs Brisbane Heat, 12th Match",
+        "matchType": "t20",
+        "status": "Brisbane Heat need 80 runs in 44 balls",
+        "venue": "Perth Stadium, Perth",
+        "date": "2025-01-05",
+        "dateTimeGMT": "2025-01-05T10:45:00",
+        "teams": ["Perth Scorchers", "Brisbane Heat"],
+        "teamInfo": [
+            {"name": "Brisbane Heat", "shortname": "BH", "img": "https://h.cricapi.com/img/icon512.png"},
+            {"name": "Perth Scorchers", "shortname": "PS", "img": "https://h.cricapi.com/img/icon512.png"},
+        ],
+        "score": [
+            {"r": 176, "w": 6, "o": 20, "inning": "Perth Scorchers Inning 1"},
+            {"r": 97, "w": 3, "o": 12.4, "inning": "Brisbane Heat Inning 1"},
+        ],
+        "tossWinner": "Brisbane Heat",
+        "tossChoice": "bowl",
+        "matchStarted": True,
+        "matchEnded": False,
+    },
+    "status": "success",
+}
+
+
+def test_live_ball_counts_legal_balls_bowled_as_in_training():
+    """
+    A live score's overs convert to the training data's 'ball' (legal balls bowled,
+    wides and no-balls excluded), so the rate features agree with training.
+    """
+    features = prepare_features(CRICAPI_LIVE_MATCH_INFO)
+    assert features["ball"] == 76
+    assert features["balls_remaining"] == 44
+    assert features["run_rate"] == 97 * 6 / 76
+    assert features["required_run_rate"] == (176 + 1 - 97) * 6 / 44
+
+    # The same point in a Cricsheet innings: 76 legal deliveries plus a wide
+    delivery = {"runs": {"total": 1}}
+    overs = [{"deliveries": [delivery] * 6} for _ in range(12)] + [{"deliveries": [delivery] * 4}]
+    overs[3]["deliveries"] = overs[3]["deliveries"] + [{"runs": {"total": 1}, "extras": {"wides": 1}}]
+    innings = [{"overs": [{"deliveries": [delivery] * 6} for _ in range(20)]}, {"overs": overs}]
+    match_df = process_match_data({"innings": innings}, "m1")
+    assert match_df[match_df["innings"] == 2]["ball"].max() == features["ball"]
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from model_training.dataset_io import DATASET_DTYPES, load_dataset, save_dataset
+from model_training.preprocess_data import read_and_process_data
+
+
+@pytest.fixture(scope="module")
+def preprocessed_df():
+    """
+    Returns the preprocessed DataFrame for all matches in tests/test_data.
+    """
+    return read_and_process_data("tests/test_data")
+
+
+@pytest.mark.parametrize("filename", ["data.npy", "data.parquet", "data.feather", "data.csv"])
+def test_round_trip_uses_compact_dtypes(preprocessed_df, tmp_path, filename):
+    """
+    Every format loads back the same values with the compact dtypes from DATASET_DTYPES.
+    """
+    if not filename.endswith((".npy", ".csv")):
+        pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / filename)
+    save_dataset(preprocessed_df, path)
+    loaded_df = load_dataset(path)
+
+    assert {column: str(dtype) for column, dtype in loaded_df.dtypes.items()} == DATASET_DTYPES
+
+    expected_df = preprocessed_df.reset_index()
+    for column in ["innings", "over", "ball", "runs", "wickets"]:
+        assert loaded_df[column].tolist() == expected_df[column].tolist()
+    assert loaded_df["matchid"].astype(str).tolist() == expected_df["matchid"].tolist()
+    assert loaded_df["chasing_team_won"].tolist() == expected_df["chasing_team_won"].tolist()
+    pd.testing.assert_series_equal(
+        loaded_df["total_chasing"], expected_df["total_chasing"].astype("float32")
+    )
+
+
+def test_npy_projection_and_memory_map(preprocessed_df, tmp_path):
+    """
+    The npy loader reads only the requested columns and can memory-map them.
+    """
+    path = str(tmp_path / "data.npy")
+    save_dataset(preprocessed_df, path)
+
+    loaded_df = load_dataset(path, columns=["ball", "chasing_team_won"], memory_map=True)
+
+    assert list(loaded_df.columns) == ["ball", "chasing_team_won"]
+    assert len(loaded_df) == len(preprocessed_df)
@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from src.utils.db_helpers import MATCH_INDEX_NAME, MatchFingerprints, Predictions, add_match_index
+
+
+class FakeTable:
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def get_item(self, Key):
+        self.reads += 1
+        item = self.items.get(Key["match_id"])
+        return {"Item": item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item["match_id"]] = Item
+
+
+class FakeResource:
+    """
+    Just enough of a boto3 DynamoDB resource for MatchFingerprints and Predictions.
+    """
+
+    def __init__(self, table, indexes=()):
+        self.table = table
+        self.table_updates = []
+        client = SimpleNamespace(
+            describe_table=lambda TableName: {
+                "Table": {"GlobalSecondaryIndexes": [{"IndexName": name, "IndexStatus": "ACTIVE"} for name in indexes]}
+            },
+            update_table=lambda **kwargs: self.table_updates.append(kwargs),
+            query=lambda **kwargs: self.table.client_query(**kwargs),
+            exceptions=SimpleNamespace(ResourceNotFoundException=LookupError),
+        )
+        self.meta = SimpleNamespace(client=client)
+
+    def Table(self, name):
+        return self.table
+
+
+def test_match_fingerprints_detect_unchanged_matches():
+    """
+    Recorded fingerprints are detected as unchanged (from the table on a cold start,
+    then from memory), and any score change is not.
+    """
+    table = FakeTable()
+    fingerprints = MatchFingerprints(FakeResource(table))
+
+    assert not fingerprints.is_unchanged("m1", "1:45/1@5.2")
+    fingerprints.record("m1", "1:45/1@5.2")
+    assert fingerprints.is_unchanged("m1", "1:45/1@5.2")
+    assert not fingerprints.is_unchanged("m1", "1:46/1@5.3")
+    assert "expires_at" in table.items["m1"]
+
+    # A new container reads the table once, then answers from its memo
+    cold = MatchFingerprints(FakeResource(table))
+    reads_before = table.reads
+    assert cold.is_unchanged("m1", "1:45/1@5.2")
+    assert cold.is_unchanged("m1", "1:45/1@5.2")
+    assert table.reads == reads_before + 1
+
+
+def _matches(condition, item):
+    # Evaluate a boto3 key condition (Key(...).eq/gt combined with &) against an item
+    expression = condition.get_expression()
+    if expression["operator"] == "AND":
+        return all(_matches(part, item) for part in expression["values"])
+    key, value = expression["values"]
+    if expression["operator"] == "=":
+        return item.get(key.name) == value
+    if expression["operator"] == ">":
+        return item.get(key.name) is not None and item[key.name] > value
+    raise NotImplementedError(expression["operator"])
+
+
+class FakePredictionsTable:
+    """
+    Answers index queries from a list of items, one item per page.
+    """
+
+    name = "Predictions"
+
+    def __init__(self, items):
+        self.items = items
+        self.queries = []
+
+    def query(self, IndexName, KeyConditionExpression, ExclusiveStartKey=None):
+        self.queries.append(IndexName)
+        found = sorted(
+            (item for item in self.items if _matches(KeyConditionExpression, item)),
+            key=lambda item: item["predicted_at"],
+        )
+        start = ExclusiveStartKey["position"] if ExclusiveStartKey else 0
+        response = {"Items": found[start:start + 1]}
+        if start + 1 < len(found):
+            response["LastEvaluatedKey"] = {"position": start + 1}
+        return response
+
+    def scan(self, **kwargs):
+        raise AssertionError("fetch_match_predictions should not scan the table")
+
+    def client_query(self, TableName, IndexName, ExpressionAttributeValues, ExclusiveStartKey=None, **kwargs):
+        # The low-level client's query: typed attribute values, one item per page
+        self.queries.append(IndexName)
+        match_id = ExpressionAttributeValues[":match_id"]["S"]
+        found = [item for item in self.items if item["match_id"] == match_id]
+        start = ExclusiveStartKey["position"]["N"] if ExclusiveStartKey else 0
+        serializer = TypeSerializer()
+        response = {"Items": [{name: serializer.serialize(value) for name, value in item.items()}
+                              for item in found[start:start + 1]]}
+        if start + 1 < len(found):
+            response["LastEvaluatedKey"] = {"position": {"N": start + 1}}
+        return response
+
+
+def test_fetch_match_predictions_queries_the_match_index():
+    """
+    A match's predictions (optionally only those after `since`) are read from the
+    match_id/predicted_at index, across pages, and never by scanning the table.
+    """
+    table = FakePredictionsTable([
+        {"prediction_id": 1, "match_id": "m1", "predicted_at": "2024-05-01T10:00:00"},
+        {"prediction_id": 2, "match_id": "m2", "predicted_at": "2024-05-01T10:01:00"},
+        {"prediction_id": 3, "match_id": "m1", "predicted_at": "2024-05-01T10:05:00"},
+        {"prediction_id": 4, "match_id": "m1", "predicted_at": "2024-05-01T10:09:00"},
+    ])
+    predictions = Predictions(FakeResource(table, indexes=[MATCH_INDEX_NAME]), "Predictions")
+
+    items = predictions.fetch_match_predictions("m1")
+    assert [item["prediction_id"] for item in items] == [1, 3, 4]
+    items = predictions.fetch_match_predictions("m1", since="2024-05-01T10:00:00")
+    assert [item["prediction_id"] for item in items] == [3, 4]
+    assert set(table.queries) == {MATCH_INDEX_NAME}
+
+
+def test_match_index_is_only_added_by_the_migration():
+    # Opening the table never changes its schema
+    resource = FakeResource(FakePredictionsTable([]))
+    Predictions(resource, "Predictions")
+    assert resource.table_updates == []
+
+    assert add_match_index(resource, "Predictions") == "CREATING"
+    assert [update["GlobalSecondaryIndexUpdates"][0]["Create"]["IndexName"] for update in resource.table_updates] == [
+        MATCH_INDEX_NAME
+    ]
+
+    # Nothing to do once the index exists
+    resource = FakeResource(FakePredictionsTable([]), indexes=[MATCH_INDEX_NAME])
+    add_match_index(resource, "Predictions")
+    assert resource.table_updates == []
+
+
+def test_match_history_without_the_index_is_empty():
+    class BackfillingTable(FakePredictionsTable):
+        def client_query(self, **kwargs):
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "index is CREATING"}}, "Query")
+
+    predictions = Predictions(FakeResource(BackfillingTable([])), "Predictions")
+    assert predictions.match_history("m1", 1) == {}
+
+
+def test_match_histories_reads_each_match_innings():
+    def state(prediction_id, match_id, innings, ball, runs, wickets):
+        return {"prediction_id": prediction_id, "match_id": match_id,
+                "predicted_at": f"2024-05-01T10:{prediction_id:02d}:00",
+                "innings": innings, "ball": ball, "runs": runs, "wickets": wickets}
+
+    table = FakePredictionsTable([
+        state(1, "m1", 1, 90, 100, 3),
+        state(2, "m1", 2, 12, 20, 0),
+        state(3, "m1", 2, 24, 41, 1),
+        state(4, "m2", 2, 30, 45, 2),
+    ])
+    predictions = Predictions(FakeResource(table, indexes=[MATCH_INDEX_NAME]), "Predictions")
+
+    histories = predictions.match_histories([("m1", 2), ("m2", 2), ("m3", 1)])
+
+    assert histories == [{12: (20, 0), 24: (41, 1)}, {30: (45, 2)}, {}]
+    assert set(table.queries) == {MATCH_INDEX_NAME}
@@ -0,0 +1,134 @@
+import importlib
+
+import numpy as np
+
+from src.utils.data_helpers import MatchSnapshot
+
+# "lambda" is a keyword, so the module can't be imported with an import statement
+lambda_function = importlib.import_module("src.lambda.lambda_function")
+
+
+def live_snapshot(match_id, runs, overs=10.2):
+    score = [
+        {"r": 170, "w": 5, "o": 20, "inning": "Team A Inning 1"},
+        {"r": runs, "w": 3, "o": overs, "inning": "Team B Inning 1"},
+    ]
+    return MatchSnapshot({"data": {"id": match_id, "status": "live", "teams": ["Team A", "Team B"],
+                                   "score": score}})
+
+
+class FakeSnapshots:
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.batches = []
+
+    def get(self, match_id):
+        return self.snapshots.get(match_id)
+
+    def get_many(self, match_ids):
+        self.batches.append(list(match_ids))
+        return [self.snapshots.get(match_id) for match_id in match_ids]
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(X)
+        p = X[:, 2] / 200.0
+        return np.column_stack([1 - p, p])
+
+
+class FakeTable:
+    def __init__(self, histories=None):
+        self.items = []
+        self.histories = histories or {}
+        self.history_batches = []
+
+    def insert_prediction(self, item):
+        self.items.append(item)
+
+    def insert_predictions(self, items):
+        self.items.extend(items)
+
+    def match_histories(self, requests):
+        self.history_batches.append(list(requests))
+        return [self.histories.get(request, {}) for request in requests]
+
+    def match_history(self, match_id, innings):
+        return self.match_histories([(match_id, innings)])[0]
+
+
+class FakeFingerprints:
+    def __init__(self, seen):
+        self.seen = dict(seen)
+
+    def is_unchanged(self, match_id, fingerprint):
+        return self.seen.get(match_id) == fingerprint
+
+    def record(self, match_id, fingerprint):
+        self.seen[match_id] = fingerprint
+
+
+def test_predict_all_matches_batches_one_prediction_and_write():
+    """
+    All live matches are fetched in one batch and predicted with a single
+    predict_proba call; missing and unchanged matches are skipped.
+    """
+    snapshots = FakeSnapshots({
+        "m1": live_snapshot("m1", 80),
+        "m2": live_snapshot("m2", 120),
+        "m3": live_snapshot("m3", 60),
+    })
+    fingerprints = FakeFingerprints({"m3": live_snapshot("m3", 60).fingerprint})
+    model, table = FakeModel(), FakeTable()
+    matches = [{"id": "m1"}, {"id": "m2"}, {"id": "m3"}, {"id": "gone"}, {"name": "no id"}]
+
+    written = lambda_function.predict_all_matches(matches, snapshots, model, table, fingerprints)
+
+    assert written == 2
+    assert snapshots.batches == [["m1", "m2", "m3", "gone"]]
+    assert len(model.calls) == 1 and model.calls[0].shape == (2, 5)
+    assert [item["match_id"] for item in table.items] == ["m1", "m2"]
+    assert table.items[1]["prediction_id"] == table.items[0]["prediction_id"] + 1
+    assert float(table.items[1]["probability"]) == 0.6
+
+    # Histories are read once for all matches; only the match state is stored
+    assert table.history_batches == [[("m1", 2), ("m2", 2)]]
+    assert "runs_last_6" not in table.items[0]
+    assert fingerprints.seen["m2"] == live_snapshot("m2", 120).fingerprint
+
+
+def test_both_modes_use_millisecond_prediction_ids(monkeypatch):
+    monkeypatch.setattr(lambda_function.time, "time", lambda: 1_700_000_000.123)
+    assert lambda_function.new_prediction_ids(3) == [1_700_000_000_123, 1_700_000_000_124, 1_700_000_000_125]
+
+    table = FakeTable()
+    lambda_function.predict_random_match(
+        [{"id": "m1"}], FakeSnapshots({"m1": live_snapshot("m1", 80)}), FakeModel(), table, FakeFingerprints({})
+    )
+    lambda_function.predict_all_matches(
+        [{"id": "m1"}], FakeSnapshots({"m1": live_snapshot("m1", 84)}), FakeModel(), table, FakeFingerprints({})
+    )
+    assert [item["prediction_id"] for item in table.items] == [1_700_000_000_123, 1_700_000_000_123]
+
+
+def test_warm_state_reuses_and_refreshes():
+    """
+    State is built lazily, reused while warm and rebuilt once it's older than max_age.
+    """
+    now = [0.0]
+    state = lambda_function.WarmState(max_age=100, clock=lambda: now[0])
+    built = []
+
+    def factory():
+        built.append(now[0])
+        return object()
+
+    first = state.get("model", factory)
+    now[0] = 99
+    assert state.get("model", factory) is first
+    now[0] = 100
+    assert state.get("model", factory) is not first
+    assert built == [0.0, 100]
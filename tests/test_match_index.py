@@ -0,0 +1,51 @@
+import os
+import shutil
+
+import pytest
+
+from model_training.match_index import select_matches, update_match_index
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """
+    Returns a temporary folder holding copies of the five test matches.
+    """
+    folder = tmp_path / "historical_data"
+    shutil.copytree(os.path.join("tests", "test_data"), folder)
+    return folder
+
+
+def test_index_reads_info_and_selects(corpus, tmp_path):
+    """
+    The index captures each match's 'info' block and supports selecting by date and team.
+    """
+    index_df = update_match_index(str(tmp_path / "match_index.npy"), folder=str(corpus))
+
+    assert len(index_df) == 5
+    row = index_df[index_df["matchid"] == "211028"].iloc[0]
+    assert (row["gender"], row["match_type"], row["team1"], row["team2"]) == (
+        "male", "T20", "England", "Australia"
+    )
+
+    assert select_matches(index_df, gender="male", match_type="t20", since="2006-01-01") == [
+        "225263.json", "225271.json"
+    ]
+    assert select_matches(index_df, team="Australia", since="2005-06-01") == ["211028.json"]
+    assert select_matches(index_df, gender="female") == []
+
+
+def test_index_updates_incrementally(corpus, tmp_path):
+    """
+    Re-running the index only rescans changed files and drops deleted ones.
+    """
+    index_path = str(tmp_path / "match_index.npy")
+    update_match_index(index_path, folder=str(corpus))
+
+    os.remove(corpus / "211028.json")
+    index_df = update_match_index(index_path, folder=str(corpus))
+
+    assert sorted(index_df["source"].astype(str)) == [
+        "211048.json", "222678.json", "225263.json", "225271.json"
+    ]
+    assert str(index_df["start_date"].max().date()) == "2006-08-28"
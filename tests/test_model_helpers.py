@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.model_helpers import (
+    MODEL_PATH,
+    LookupTable,
+    TablePredictor,
+    TreeEnsemble,
+    _load_catboost_model,
+    build_lookup_table,
+    export_tree_bundle,
+    load_model,
+    load_predictor,
+)
+
+
+@pytest.fixture(scope="module")
+def model():
+    pytest.importorskip("catboost")
+    return _load_catboost_model()
+
+
+def random_states(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 3, n),
+        rng.integers(0, 125, n),
+        rng.uniform(0, 300, n),
+        rng.integers(0, 11, n),
+        rng.uniform(0, 280, n),
+    ]).astype(float)
+    X[rng.random(n) < 0.4, 4] = np.nan
+    return X
+
+
+def test_tree_bundle_matches_catboost(model, tmp_path):
+    path = str(tmp_path / "trees.npz")
+    report = export_tree_bundle(output_path=path)
+    trees = TreeEnsemble.load(path)
+    X = random_states(3000)
+
+    assert report["trees"] == model.tree_count_
+    np.testing.assert_allclose(trees.predict_proba(X), model.predict_proba(X), atol=1e-9)
+    assert {k: len(v) for k, v in trees.get_borders().items()} == {k: len(v) for k, v in model.get_borders().items()}
+
+
+def test_shipped_tree_bundle_matches_catboost(model):
+    X = random_states(1000, seed=1)
+    shipped = TreeEnsemble.load(model_path=MODEL_PATH)
+    np.testing.assert_allclose(shipped.predict_proba(X), model.predict_proba(X), atol=1e-9)
+
+
+def test_tree_bundle_is_tied_to_its_model_file(model, tmp_path):
+    """
+    A bundle loads next to the model it was exported from, and fails next to another.
+    """
+    model_path = str(tmp_path / "model.cbm")
+    model.save_model(model_path)
+    bundle_path = str(tmp_path / "trees.npz")
+    export_tree_bundle(model_path, bundle_path)
+
+    assert isinstance(load_model(model_path, bundle_path), TreeEnsemble)
+    # Without the model file (as in the Lambda image) there is nothing to check against
+    assert isinstance(TreeEnsemble.load(bundle_path, str(tmp_path / "missing.cbm")), TreeEnsemble)
+
+    with open(model_path, "ab") as f:
+        f.write(b"retrained")
+    with pytest.raises(ValueError, match="re-export"):
+        load_model(model_path, bundle_path)
+
+
+def test_tree_ensemble_evaluates_oblivious_trees():
+    # Tree 0 splits on feature 0 (> 1) then feature 1 (> 5); tree 1 on feature 1 (> 2),
+    # padded with a level that is never taken
+    trees = TreeEnsemble(
+        nan_fill=[-np.inf, -np.inf],
+        split_features=[[0, 1], [1, 0]],
+        split_borders=[[1.0, 5.0], [2.0, np.inf]],
+        leaf_values=[[0.0, 1.0, 2.0, 3.0], [-1.0, 0.5, 0.0, 0.0]],
+        bias=0.25,
+    )
+    X = np.array([[0, 0], [2, 0], [0, 6], [2, 6], [np.nan, 3]])
+
+    np.testing.assert_allclose(trees.predict_raw(X), [-0.75, 0.25, 2.75, 3.75, 0.75])
+    probabilities = trees.predict_proba(X)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    np.testing.assert_allclose(probabilities[:, 1], 1 / (1 + np.exp(-trees.predict_raw(X))))
+    assert trees.get_borders() == {0: [1.0], 1: [2.0, 5.0]}
+
+
+@pytest.fixture(scope="module")
+def table_path(model, tmp_path_factory):
+    # A small grid keeps the build fast; larger runs and targets fall back to the model
+    path = str(tmp_path_factory.mktemp("lookup") / "model_lookup")
+    build_lookup_table(model, path, max_runs=40, max_target=30, verify_samples=0)
+    return path
+
+
+def test_build_reports_quantization_level_deviation(model, tmp_path):
+    report = build_lookup_table(model, str(tmp_path / "table"), max_runs=20, max_target=10, verify_samples=5000)
+
+    assert report["entries"] > 0
+    assert report["bytes"] == 2 * report["entries"]
+    assert report["max_abs_deviation"] < 1e-4
+    assert report["verify_max_abs_deviation"] < 1e-4
+    assert 0 < report["verify_coverage"] < 1
+
+
+def test_lookup_matches_model_inside_the_grid(model, table_path):
+    table = LookupTable.load(table_path)
+    X = np.array([
+        [1, 30, 35, 2, np.nan],
+        [2, 1, 0, 0, 25],
+        [2, 119, 31, 9, 30],
+        [0, 0, 0, 0, np.nan],     # no score yet
+        [2, 150, 20, 12, 18],     # beyond the last borders for ball and wickets: clamped
+    ])
+
+    probabilities, found = table.lookup(X)
+
+    assert found.all()
+    np.testing.assert_allclose(probabilities, model.predict_proba(X)[:, 1], atol=1e-4)
+
+
+def test_lookup_misses_states_outside_the_grid(table_path):
+    table = LookupTable.load(table_path)
+    X = np.array([
+        [2, 60, 41, 3, np.nan],   # runs above the capped range
+        [2, 60, 20, 3, 31],       # target above the capped range
+        [1, 60, 20, 3, 25],       # a target outside the chasing innings
+        [2, 60, 35, 3, 20],       # further past the target than a chase can go
+        [2, 60.5, 20, 3, 25],     # not a whole-number state
+    ])
+
+    probabilities, found = table.lookup(X)
+
+    assert not found.any()
+    assert np.isnan(probabilities).all()
+
+
+def test_predictor_falls_back_to_model_for_misses(model, table_path):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return model
+
+    predictor = TablePredictor(LookupTable.load(table_path), loader)
+    inside = np.array([[2, 60, 20, 3, 25]])
+    assert predictor.predict_proba(inside).shape == (1, 2)
+    assert loads == []
+
+    X = np.array([[2, 60, 20, 3, 25], [2, 60, 150, 3, 160]])
+    probabilities = predictor.predict_proba(X)
+
+    assert loads == [1]
+    np.testing.assert_allclose(probabilities, model.predict_proba(X), atol=1e-4)
+
+
+def test_load_predictor_uses_the_trees_without_a_table(tmp_path, table_path):
+    assert isinstance(load_predictor(table_path=str(tmp_path / "missing")), TreeEnsemble)
+    assert os.path.exists(table_path + ".npy")
+    assert isinstance(load_predictor(table_path=table_path), TablePredictor)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+from model_training.preprocess_cache import PreprocessCache, source_cache_dir
+from model_training.preprocess_data import read_and_process_data, read_and_process_zip
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """
+    Returns a temporary folder holding copies of three test matches.
+    """
+    folder = tmp_path / "historical_data"
+    folder.mkdir()
+    for filename in ["211028.json", "211048.json", "222678.json"]:
+        shutil.copy(os.path.join("tests", "test_data", filename), folder / filename)
+    return folder
+
+
+def test_cached_build_matches_uncached(corpus, tmp_path):
+    """
+    Building through the cache gives the same DataFrame as a plain build, both on the
+    first (cold) run and on a second (warm) run.
+    """
+    cache_dir = str(tmp_path / "cache")
+    expected_df = read_and_process_data(str(corpus))
+
+    cold_df = read_and_process_data(str(corpus), cache_dir=cache_dir)
+    warm_df = read_and_process_data(str(corpus), cache_dir=cache_dir)
+
+    pd.testing.assert_frame_equal(expected_df, cold_df)
+    pd.testing.assert_frame_equal(expected_df, warm_df)
+
+
+def test_only_new_or_changed_files_are_stale(corpus, tmp_path):
+    """
+    After an initial build, only added or modified files are reported as stale,
+    touched-but-identical files are not, and deleted files are dropped from the manifest.
+    """
+    cache_dir = str(tmp_path / "cache")
+    read_and_process_data(str(corpus), cache_dir=cache_dir)
+
+    # Touch one file without changing it, rewrite another, delete a third, add a fourth
+    os.utime(corpus / "211028.json", ns=(0, 0))
+    (corpus / "211048.json").write_text(
+        (corpus / "211048.json").read_text(encoding="utf-8") + "\n", encoding="utf-8"
+    )
+    os.remove(corpus / "222678.json")
+    shutil.copy(os.path.join("tests", "test_data", "225263.json"), corpus / "225263.json")
+
+    cache = PreprocessCache(source_cache_dir(cache_dir, str(corpus)))
+    deleted_output = cache.entries["222678.json"]["output"]
+    stale = cache.refresh(str(corpus), sorted(os.listdir(corpus)))
+
+    assert stale == ["211048.json", "225263.json"]
+    assert "222678.json" not in cache.entries
+    assert not os.path.exists(os.path.join(cache.cache_dir, deleted_output))
+
+
+def test_sources_sharing_a_cache_dir_keep_their_own_entries(corpus, tmp_path):
+    """
+    A folder and a zip archive cached under the same directory don't drop each
+    other's entries.
+    """
+    cache_dir = str(tmp_path / "cache")
+    zip_path = tmp_path / "t20s_json.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(os.path.join("tests", "test_data", "225263.json"), "225263.json")
+
+    read_and_process_data(str(corpus), cache_dir=cache_dir)
+    read_and_process_zip(str(zip_path), cache_dir=cache_dir)
+
+    folder_cache = PreprocessCache(source_cache_dir(cache_dir, str(corpus)))
+    assert folder_cache.refresh(str(corpus), sorted(os.listdir(corpus))) == []
+    zip_cache = PreprocessCache(source_cache_dir(cache_dir, str(zip_path)))
+    assert zip_cache.refresh_archive(str(zip_path), ["225263.json"]) == []
+    assert folder_cache.cache_dir != zip_cache.cache_dir
+
+
+def test_members_sharing_a_base_name_are_cached_apart(tmp_path):
+    """
+    Zip members with the same base name in different directories get their own
+    cached outputs, so neither overwrites the other.
+    """
+    zip_path = tmp_path / "t20s_json.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(os.path.join("tests", "test_data", "211028.json"), "2023/match.json")
+        archive.write(os.path.join("tests", "test_data", "211048.json"), "2024/match.json")
+    cache_dir = str(tmp_path / "cache")
+
+    expected_df = read_and_process_zip(str(zip_path))
+    cold_df = read_and_process_zip(str(zip_path), cache_dir=cache_dir)
+    warm_df = read_and_process_zip(str(zip_path), cache_dir=cache_dir)
+
+    pd.testing.assert_frame_equal(expected_df, cold_df)
+    pd.testing.assert_frame_equal(expected_df, warm_df)
+    cache = PreprocessCache(source_cache_dir(cache_dir, str(zip_path)))
+    assert cache.entries["2023/match.json"]["output"] != cache.entries["2024/match.json"]["output"]
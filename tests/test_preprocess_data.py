@@ -1,10 +1,21 @@
+import json
 import os
+import zipfile
 
 import numpy as np
 import pandas as pd
 import pytest
 
-from model_training.preprocess_data import process_json
+from benchmarks.synthetic import SyntheticConfig, write_synthetic_corpus
+from model_training.preprocess_data import (
+    add_derived_features,
+    main,
+    process_json,
+    process_match_data,
+    read_and_process_data,
+    read_and_process_zip,
+)
+from src.utils.data_helpers import DERIVED_FEATURES, prepare_features
 
 
 @pytest.fixture
@@ -137,4 +148,132 @@ def test_chasing_team_outcomes(sample_ten_matches, expected_chasing_outcomes):
         )
         assert total_chasing_values[0] == expected_outcome["total_chasing"], (
             f"Incorrect 'total_chasing' for match {match_id}"
-        )
\ No newline at end of file
+        )
+
+
+def test_leftover_extras_added_to_last_row():
+    """
+    Wides/no-balls bowled after the final legal delivery of an innings are added
+    to that innings' last row, and count towards the chasing target.
+    """
+    def delivery(total, extras=None, wickets=0):
+        item = {"runs": {"total": total}}
+        if extras:
+            item["extras"] = extras
+        if wickets:
+            item["wickets"] = [{"kind": "bowled"}] * wickets
+        return item
+
+    data = {
+        "innings": [
+            {"overs": [{"deliveries": [
+                delivery(1),
+                delivery(1, {"wides": 1}),
+                delivery(4),
+                delivery(2, {"noballs": 1}),
+            ]}]},
+            {"overs": [{"deliveries": [
+                delivery(0, wickets=1),
+                delivery(6),
+            ]}]},
+        ]
+    }
+
+    result_df = process_match_data(data, "1")
+
+    assert result_df["runs"].tolist() == [1, 8, 0, 6]
+    assert result_df["wickets"].tolist() == [0, 0, 1, 1]
+    assert result_df["ball"].tolist() == [1, 2, 1, 2]
+    assert result_df["chasing_team_won"].unique().tolist() == [0]
+    assert result_df["total_chasing"].dropna().unique().tolist() == [8]
+
+
+def test_parallel_matches_serial():
+    """
+    The process-pool mode must return exactly the same rows, in the same order,
+    as the serial mode.
+    """
+    serial_df = read_and_process_data("tests/test_data", workers=1)
+    parallel_df = read_and_process_data("tests/test_data", workers=2, chunksize=2)
+
+    pd.testing.assert_frame_equal(serial_df, parallel_df)
+    assert serial_df.index.unique().tolist() == ["211028", "211048", "222678", "225263", "225271"]
+
+
+def test_zip_source_matches_folder(tmp_path):
+    """
+    Streaming matches out of a zip archive gives the same rows as reading the extracted
+    folder, skips non-JSON members, and honours member filters.
+    """
+    zip_path = tmp_path / "t20s_json.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("README.txt", "Cricsheet")
+        for filename in sorted(os.listdir("tests/test_data")):
+            archive.write(os.path.join("tests/test_data", filename), filename)
+
+    folder_df = read_and_process_data("tests/test_data")
+    zip_df = read_and_process_zip(str(zip_path), workers=2, chunksize=2)
+    pd.testing.assert_frame_equal(folder_df, zip_df)
+
+    filtered_df = read_and_process_zip(str(zip_path), members=["22*.json"])
+    assert filtered_df.index.unique().tolist() == ["222678", "225263", "225271"]
+
+
+def test_synthetic_corpus_processes(tmp_path):
+    """
+    Synthetic benchmark matches go through preprocessing, and matches with super overs
+    (more than two innings) are rejected.
+    """
+    folder = str(tmp_path / "synthetic_data")
+    filenames = write_synthetic_corpus(folder, 40, seed=7, config=SyntheticConfig(super_over_rate=0.2))
+
+    result_df = read_and_process_data(folder)
+
+    super_over_ids = set()
+    for filename in filenames:
+        with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
+            if len(json.load(f)["innings"]) > 2:
+                super_over_ids.add(filename.split(".")[0])
+
+    assert super_over_ids
+    assert set(result_df.index.unique()) == {f.split(".")[0] for f in filenames} - super_over_ids
+    assert result_df["ball"].max() <= 120
+
+
+def test_derived_features_match_live_prepare_features():
+    """
+    The vectorized training features equal what `prepare_features` computes for a live
+    match in the same state, given the earlier states of the innings as history.
+    """
+    result_df = add_derived_features(process_json("tests/test_data", "222678.json"))
+
+    for _, row in result_df.iloc[[0, 7, 45, 119, 125, 150, -1]].iterrows():
+        innings = row["innings"]
+        ball = row["ball"]
+        innings_df = result_df[(result_df["innings"] == innings) & (result_df["ball"] < ball)]
+        history = {
+            past["ball"]: (past["runs"], past["wickets"]) for _, past in innings_df.iterrows()
+        }
+
+        # Live data reports overs bowled, e.g. 7.3 after the 45th legal ball
+        balls_bowled = ball
+        score = [{"r": row["runs"], "w": row["wickets"], "inning": "Team A Inning 1"}]
+        if innings == 2:
+            score = [
+                {"r": row["total_chasing"], "w": 10, "o": 20, "inning": "Team A Inning 1"},
+                {"r": row["runs"], "w": row["wickets"], "inning": "Team B Inning 1"},
+            ]
+        score[-1]["o"] = balls_bowled // 6 + (balls_bowled % 6) / 10
+        match_info = {"data": {"teams": ["Team A", "Team B"], "score": score}}
+
+        live_features = prepare_features(match_info, history=history)
+
+        assert live_features["ball"] == ball
+        for name in DERIVED_FEATURES:
+            np.testing.assert_allclose(live_features[name], row[name], rtol=1e-6, err_msg=name)
+
+
+def test_main_rejects_aggregated_output_with_shards(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--shard-dir", str(tmp_path / "shards"), "--aggregated-output", str(tmp_path / "agg.parquet")])
+    assert not (tmp_path / "shards").exists()
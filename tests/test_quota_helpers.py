@@ -0,0 +1,100 @@
+from src.utils.quota_helpers import Priority, QuotaScheduler, current_priority, request_priority
+
+
+class FakeClock:
+    def __init__(self):
+        # 2025-06-01 12:00 UTC
+        self.now = 1_748_779_200.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lower_priorities_are_answered_from_cache_when_budget_is_tight():
+    """
+    With 10 hits a day, page views stop spending hits first (30% reserved), then Lambda
+    calls (10% reserved); both fall back to cached responses, results keep going.
+    """
+    clock = FakeClock()
+    scheduler = QuotaScheduler(daily_limit=10, per_minute=100, clock=clock)
+    fetches = []
+
+    def fetch(label):
+        fetches.append(label)
+        return {"label": label}
+
+    for n in range(7):
+        assert scheduler.call(("match_info", "m1"), lambda n=n: fetch(n), Priority.PAGE_VIEW) == {"label": n}
+
+    # 3 hits left: page views get the cached response, Lambda and results still spend hits
+    assert scheduler.call(("match_info", "m1"), lambda: fetch("page"), Priority.PAGE_VIEW) == {"label": 6}
+    assert scheduler.call(("match_info", "m1"), lambda: fetch("lambda"), Priority.LAMBDA) == {"label": "lambda"}
+    assert scheduler.call(("match_info", "m1"), lambda: fetch("result"), Priority.RESULT) == {"label": "result"}
+
+    # 1 hit left: Lambda falls back to the cache as well
+    assert scheduler.call(("match_info", "m1"), lambda: fetch("lambda"), Priority.LAMBDA) == {"label": "result"}
+
+    counters = scheduler.counters()
+    assert counters["hits_used"] == {"RESULT": 1, "LAMBDA": 1, "PAGE_VIEW": 7}
+    assert counters["hits_saved"] == {"RESULT": 0, "LAMBDA": 1, "PAGE_VIEW": 1}
+    assert counters["remaining_today"] == 1
+
+    # Nothing cached for a new request: lower classes are denied rather than spend the
+    # hit reserved for results, which still gets it
+    assert scheduler.call(("match_info", "m2"), lambda: fetch("m2"), Priority.PAGE_VIEW) is None
+    assert scheduler.call(("match_info", "m2"), lambda: fetch("m2"), Priority.LAMBDA) is None
+    assert scheduler.call(("match_info", "m3"), lambda: fetch("m3"), Priority.RESULT) == {"label": "m3"}
+    assert "m2" not in fetches
+
+    # Budget exhausted: even results are denied when nothing is cached
+    assert scheduler.call(("match_info", "m4"), lambda: fetch("m4"), Priority.RESULT) is None
+    counters = scheduler.counters()
+    assert counters["hits_denied"] == {"RESULT": 1, "LAMBDA": 1, "PAGE_VIEW": 1}
+    assert counters["hits_used"]["RESULT"] == 2
+
+    # The budget resets at midnight UTC
+    clock.now += 24 * 3600
+    assert scheduler.remaining_today() == 10
+
+
+def test_stale_responses_are_not_served():
+    """
+    A cached response older than max_response_age is not passed off as current.
+    """
+    clock = FakeClock()
+    scheduler = QuotaScheduler(daily_limit=10, per_minute=100, max_response_age=600, clock=clock)
+    for n in range(7):
+        scheduler.call("m1", lambda n=n: {"n": n}, Priority.PAGE_VIEW)
+
+    clock.now += 600
+    assert scheduler.call("m1", lambda: {"n": "new"}, Priority.PAGE_VIEW) == {"n": 6}
+    clock.now += 1
+    assert scheduler.call("m1", lambda: {"n": "new"}, Priority.PAGE_VIEW) is None
+
+    counters = scheduler.counters()
+    assert counters["hits_saved"]["PAGE_VIEW"] == 1
+    assert counters["hits_denied"]["PAGE_VIEW"] == 1
+
+
+def test_minute_bucket_and_observed_usage():
+    """
+    The per-minute bucket refills over time, and CricAPI's reported usage is adopted.
+    """
+    clock = FakeClock()
+    scheduler = QuotaScheduler(daily_limit=1000, per_minute=2, clock=clock)
+
+    assert scheduler.call("a", lambda: {"n": 1}, Priority.RESULT) == {"n": 1}
+    assert scheduler.call("b", lambda: {"n": 2}, Priority.RESULT) == {"n": 2}
+    assert scheduler.call("c", lambda: {"n": 3}, Priority.RESULT) is None
+    clock.now += 30
+    assert scheduler.call("c", lambda: {"n": 3}, Priority.RESULT) == {"n": 3}
+
+    scheduler.observe({"hitsToday": 95, "hitsLimit": 100})
+    assert scheduler.remaining_today() == 5
+
+
+def test_request_priority_context():
+    assert current_priority() == Priority.PAGE_VIEW
+    with request_priority(Priority.RESULT):
+        assert current_priority() == Priority.RESULT
+    assert current_priority() == Priority.PAGE_VIEW
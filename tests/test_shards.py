@@ -0,0 +1,31 @@
+import pandas as pd
+
+from model_training.dataset_io import to_typed_frame
+from model_training.preprocess_data import iter_processed_data, read_and_process_data
+from model_training.shards import iter_shards, load_match, write_shards
+
+
+def test_shards_round_trip(tmp_path):
+    """
+    Streaming the test matches into small shards keeps every match whole, respects the
+    row limit, and the shard index points at each match's rows.
+    """
+    output_dir = str(tmp_path / "shards")
+    index_df = write_shards(iter_processed_data("tests/test_data"), output_dir, shard_rows=500)
+
+    expected_df = to_typed_frame(read_and_process_data("tests/test_data"))
+    shard_dfs = list(iter_shards(output_dir))
+
+    assert len(shard_dfs) > 1
+    assert all(len(shard_df) <= 500 for shard_df in shard_dfs)
+    assert index_df["row_stop"].iloc[-1] == len(expected_df)
+
+    combined_df = pd.concat(shard_dfs, ignore_index=True)
+    pd.testing.assert_frame_equal(
+        combined_df.astype({"matchid": str}), expected_df.astype({"matchid": str})
+    )
+
+    match_df = load_match(output_dir, "222678", index_df=index_df)
+    expected_match_df = expected_df[expected_df["matchid"] == "222678"].reset_index(drop=True)
+    assert match_df["runs"].tolist() == expected_match_df["runs"].tolist()
+    assert set(match_df["matchid"].astype(str)) == {"222678"}
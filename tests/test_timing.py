@@ -0,0 +1,56 @@
+import asyncio
+
+from src.utils.timing import LatencyHistograms, StageTimer, current_timer, timed, use_timer
+
+
+def test_stage_timer_accumulates_stages():
+    now = [0.0]
+    timer = StageTimer(clock=lambda: now[0])
+
+    with timer.stage("fetch"):
+        now[0] += 0.25
+    with timer.stage("predict"):
+        now[0] += 0.004
+    with timer.stage("fetch"):
+        now[0] += 0.05
+
+    assert timer.summary() == {"fetch": 300.0, "predict": 4.0, "total": 304.0}
+    assert list(timer.summary()) == ["fetch", "predict", "total"]
+    assert timer.server_timing() == "fetch;dur=300.0, predict;dur=4.0, total;dur=304.0"
+
+
+def test_latency_histograms_count_into_buckets():
+    histograms = LatencyHistograms(buckets_ms=(1, 10, 100))
+    for seconds in (0.0005, 0.004, 0.006, 0.05, 0.2):
+        histograms.observe("cricapi", seconds)
+
+    snapshot = histograms.snapshot()["cricapi"]
+
+    assert snapshot["count"] == 5
+    assert snapshot["max_ms"] == 200.0
+    assert snapshot["buckets"] == [[1, 1], [10, 3], [100, 4], ["+Inf", 5]]
+    assert snapshot["p50_ms"] == 10
+    assert snapshot["p99_ms"] == 200.0
+
+
+def test_timed_stages_reach_the_current_timer_and_histograms():
+    histograms = LatencyHistograms()
+
+    @timed("feature_prep", histograms)
+    def prepare():
+        return "features"
+
+    assert prepare() == "features"           # outside any timer: histograms only
+    timer = StageTimer()
+    with use_timer(timer):
+        assert current_timer() is timer
+        prepare()
+
+        async def fan_out():
+            await asyncio.gather(*(asyncio.to_thread(prepare) for _ in range(3)))
+
+        asyncio.run(fan_out())
+    assert current_timer() is None
+
+    assert "feature_prep" in timer.summary()
+    assert histograms.snapshot()["feature_prep"]["count"] == 5
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import numpy as np
+
+from src.utils.worm_helpers import WormCache
+
+
+class CountingModel:
+    """
+    Scores a state as runs / 200 and records the size of each batch.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, X):
+        self.batches.append(len(X))
+        probabilities = X[:, 2] / 200
+        return np.column_stack([1 - probabilities, probabilities])
+
+
+def stored(predicted_at, innings, ball, runs, wickets, total_chasing=None):
+    return {
+        "predicted_at": predicted_at,
+        "innings": Decimal(innings),
+        "ball": Decimal(ball),
+        "runs": Decimal(runs),
+        "wickets": Decimal(wickets),
+        "total_chasing": None if total_chasing is None else Decimal(total_chasing),
+    }
+
+
+def test_worm_scores_states_in_one_batch_and_extends_incrementally():
+    model = CountingModel()
+    worms = WormCache(model)
+    items = [
+        stored("2025-01-01T10:10:00", 2, 30, 40, 1, 160),
+        stored("2025-01-01T10:00:00", 1, 60, 80, 2),
+        stored("2025-01-01T10:05:00", 1, 120, 160, 6),
+    ]
+
+    points = worms.extend("m1", items, live_state=[2, 36, 50, 1, 160.0])
+
+    assert model.batches == [4]
+    assert [(p["innings"], p["ball"]) for p in points] == [(1, 60), (1, 120), (2, 30), (2, 36)]
+    assert points[0]["total_chasing"] is None
+    assert points[-1]["probability"] == 25.0
+    assert worms.since("m1") == "2025-01-01T10:10:00"
+
+    # Only the states that are new since the last request are scored
+    points = worms.extend("m1", [stored("2025-01-01T10:15:00", 2, 36, 50, 1, 160)], live_state=[2, 40, 58, 2, 160.0])
+    assert model.batches == [4, 1]
+    assert len(points) == 5
+    assert worms.since("m1") == "2025-01-01T10:15:00"
+
+    # Nothing new, nothing scored
+    worms.extend("m1", [], live_state=[2, 40, 58, 2, 160.0])
+    assert model.batches == [4, 1]
+
+
+def test_worm_rescores_a_ball_whose_score_changed_and_evicts_old_matches():
+    model = CountingModel()
+    worms = WormCache(model, max_matches=1)
+
+    worms.extend("m1", [], live_state=[1, 10, 12, 0, np.nan])
+    points = worms.extend("m1", [], live_state=[1, 10, 16, 0, np.nan])
+    assert model.batches == [1, 1]
+    assert points == [{"innings": 1, "ball": 10, "runs": 16, "wickets": 0, "total_chasing": None, "probability": 8.0}]
+
+    worms.extend("m2", [], live_state=[1, 5, 4, 0, np.nan])
+    assert worms.since("m1") is None
+    assert worms.extend("m1", []) == []
+
+
+def test_worm_scores_without_holding_the_cache_lock():
+    class LockCheckingModel(CountingModel):
+        def predict_proba(self, X):
+            # Other matches' requests can read the cache meanwhile (a held lock
+            # would deadlock here)
+            if self.batches:
+                assert worms.since("m2") == "2025-01-01T09:00:00"
+            return super().predict_proba(X)
+
+    model = LockCheckingModel()
+    worms = WormCache(model)
+    worms.extend("m2", [stored("2025-01-01T09:00:00", 1, 6, 10, 0)])
+
+    points = worms.extend("m1", [stored("2025-01-01T10:00:00", 1, 60, 80, 2)])
+    assert model.batches == [1, 1]
+    assert points[0]["probability"] == 40.0